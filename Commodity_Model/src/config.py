@@ -5,6 +5,8 @@ BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 RAW_DATA_PATH = os.path.join(BASE_DIR, "data", "raw", "commodity_prices.csv")  # Prices in quintals
 PROCESSED_DATA_PATH = os.path.join(BASE_DIR, "data", "processed", "features.csv")  # Converted to per kg
 MODEL_PATH = os.path.join(BASE_DIR, "models", "xgboost_model.pkl")
+BOOSTER_PATH = os.path.join(BASE_DIR, "models", "xgboost_model.ubj")  # Native export used for serving
+REPORTS_DIR = os.path.join(BASE_DIR, "reports")
 
 # Model params
 CUTOFF_DATE = "2024-07-01"
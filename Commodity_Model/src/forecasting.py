@@ -0,0 +1,107 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from src import config
+
+# lag_7 / rmean_7 / rstd_7 look back this many observations
+WINDOW = 7
+SERIES_KEYS = ['Commodity', 'Market']
+
+
+def series_state(history, default_step_days=7):
+    """
+    Per-series starting point for recursive forecasting.
+
+    history: rows with Commodity, Market, Arrival_Date (datetime) and Modal_Price,
+    sorted by date within each series (as load_and_clean() returns them).
+
+    Returns (series, prices, last_dates, step_days):
+      series      DataFrame of the (Commodity, Market) keys, one row per series
+      prices      array (n_series, WINDOW + 1) of the last prices, oldest first,
+                  NaN-padded on the left for short series
+      last_dates  datetime64 array of each series' latest observation
+      step_days   typical gap between observations per series (median of the
+                  recent gaps; default_step_days when there is only one)
+    """
+    tail = history.groupby(SERIES_KEYS, sort=True).tail(WINDOW + 1)
+    group = tail.groupby(SERIES_KEYS, sort=True)
+    index = group.ngroup().to_numpy()
+    # 0 for the latest observation of a series, 1 for the one before, ...
+    from_end = group.cumcount(ascending=False).to_numpy()
+
+    series = group.size().reset_index()[SERIES_KEYS]
+    prices = np.full((len(series), WINDOW + 1), np.nan)
+    prices[index, WINDOW - from_end] = tail['Modal_Price'].to_numpy(dtype=float)
+
+    last_dates = group['Arrival_Date'].max().to_numpy()
+    gaps = tail.groupby(SERIES_KEYS, sort=True)['Arrival_Date'].diff().dt.days
+    step_days = gaps.groupby(index).median().reindex(range(len(series))).to_numpy()
+    step_days = np.where(np.isnan(step_days), default_step_days, np.maximum(step_days, 1))
+    return series, prices, last_dates, step_days
+
+
+def step_features(prices, dates):
+    """
+    Feature rows (config.FEATURE_COLS) for the observation after the window.
+
+    Mirrors create_features(): for a row at t, lag_1 = p[t-1], lag_7 = p[t-7] and
+    the rolling stats cover p[t-7..t-1]; weekday/month come from the row's date.
+    """
+    window = prices[:, :-1]
+    with warnings.catch_warnings():
+        # Series with fewer than two prices have no mean/std, as in pandas
+        warnings.simplefilter('ignore', RuntimeWarning)
+        rmean = np.nanmean(window, axis=1)
+        rstd = np.nanstd(window, axis=1, ddof=1)
+    dates = pd.DatetimeIndex(dates)
+    features = pd.DataFrame({
+        'lag_1': window[:, -1],
+        'lag_7': window[:, 0],
+        'rmean_7': rmean,
+        'rstd_7': rstd,
+        'weekday': dates.weekday.astype('int64'),
+        'month': dates.month.astype('int64'),
+    })
+    return features[config.FEATURE_COLS]
+
+
+def recursive_forecast(model, prices, last_dates, step_days, steps):
+    """
+    Forecast `steps` observations ahead for every series at once.
+
+    Step k feeds the predictions of steps 1..k-1 back in as lags, so the cost is
+    `steps` vectorized model.predict calls whatever the number of series.
+    Returns (predictions, forecast_dates), both shaped (n_series, steps).
+    """
+    prices = np.array(prices, dtype=float)
+    last_dates = np.asarray(last_dates, dtype='datetime64[ns]')
+    step = (np.asarray(step_days, dtype=float) * 86400).astype('timedelta64[s]')
+
+    predictions = np.empty((len(prices), steps))
+    forecast_dates = np.empty((len(prices), steps), dtype='datetime64[ns]')
+    for k in range(steps):
+        # The model scores the row of the latest known observation (t) and predicts t + 1
+        row_dates = last_dates + k * step
+        predicted = np.asarray(model.predict(step_features(prices, row_dates)), dtype=float)
+        predictions[:, k] = predicted
+        forecast_dates[:, k] = row_dates + step
+        prices = np.concatenate([prices[:, 1:], predicted[:, None]], axis=1)
+    return predictions, forecast_dates
+
+
+def forecast_horizons(model, prices, last_dates, step_days, horizon_days):
+    """
+    Forecast every series at calendar horizons (e.g. 7, 14, 21, 28 days).
+
+    A step is one observation, and markets report at different cadences, so a
+    horizon is reached after round(days / step_days) steps for each series (at
+    least one). All series are rolled forward together for the largest step
+    count and each series' horizons are read off its own steps.
+    Returns (predictions, forecast_dates, steps), each shaped (n_series, len(horizon_days)).
+    """
+    step_days = np.asarray(step_days, dtype=float)
+    steps = np.maximum(1, np.rint(np.asarray(horizon_days, dtype=float)[None, :] / step_days[:, None])).astype(int)
+    predictions, dates = recursive_forecast(model, prices, last_dates, step_days, int(steps.max()))
+    rows = np.arange(len(steps))[:, None]
+    return predictions[rows, steps - 1], dates[rows, steps - 1], steps
@@ -28,4 +28,23 @@ def train_model():
 
     joblib.dump(model, config.MODEL_PATH)
     print(f"Model saved to {config.MODEL_PATH}")
+    export_booster(model)
     print(f"MAE: {mae}, RMSE: {rmse}")
+
+def export_booster(model=None, path=None):
+    """
+    Save the booster in XGBoost's native UBJSON format for serving.
+
+    The server loads it into a raw xgb.Booster and predicts with inplace_predict,
+    skipping the sklearn wrapper. Without `model` the saved pickle is exported.
+    """
+    if model is None:
+        model = joblib.load(config.MODEL_PATH)
+    path = path or config.BOOSTER_PATH
+    model.get_booster().save_model(path)
+    print(f"Booster exported to {path}")
+    return path
+
+if __name__ == "__main__":
+    # Export the existing pickle without retraining: python -m src.model_training
+    export_booster()
@@ -1,10 +1,11 @@
 # config.py
+import os
 
 
-# OpenWeather API Key & Coordinates
-OPENWEATHER_API_KEY = "0ac39ccedd304176acf850e805545e40"
+# OpenWeather API Key & Coordinates (env overrides the defaults below)
+OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "0ac39ccedd304176acf850e805545e40")
 LATITUDE = 25.3176
 LONGITUDE = 82.9739
 
 # OpenWeather One Call 3.0 API
-OPENWEATHER_BASE_URL = "https://api.openweathermap.org/data/3.0/onecall"
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/3.0/onecall")
@@ -33,3 +33,9 @@ class CropRecommender:
         X = [[float(temperature), float(humidity), float(rainfall), float(ph)]]
         Xs = self.scaler.transform(X)
         return str(self.model.predict(Xs)[0])
+
+    def predict_batch(self, rows) -> list:
+        # rows: [[temperature, humidity, rainfall, ph], ...]
+        X = pd.DataFrame(rows, columns=["temperature", "humidity", "rainfall", "ph"], dtype=float)
+        Xs = self.scaler.transform(X)
+        return [str(label) for label in self.model.predict(Xs)]
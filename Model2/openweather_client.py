@@ -18,8 +18,8 @@ def get_weather_forecast():
         print(f"[ERROR] OpenWeather API failed: {e}")
         return None
 
-def get_weather_forecast_for(lat, lon):
-    """Fetch forecast for given coordinates using One Call 3.0."""
+def fetch_weather_forecast_for(lat, lon, timeout=10):
+    """Like get_weather_forecast_for(), but raises requests' exceptions (timeouts included)."""
     params = {
         "lat": lat,
         "lon": lon,
@@ -27,10 +27,15 @@ def get_weather_forecast_for(lat, lon):
         "units": "metric",
         "exclude": "minutely,hourly,alerts"
     }
+    response = requests.get(OPENWEATHER_BASE_URL, params=params, timeout=timeout)
+    response.raise_for_status()
+    return response.json()
+
+
+def get_weather_forecast_for(lat, lon, timeout=10):
+    """Fetch forecast for given coordinates using One Call 3.0."""
     try:
-        response = requests.get(OPENWEATHER_BASE_URL, params=params)
-        response.raise_for_status()
-        return response.json()
+        return fetch_weather_forecast_for(lat, lon, timeout=timeout)
     except requests.exceptions.RequestException as e:
         print(f"[ERROR] OpenWeather API failed for {lat},{lon}: {e}")
         return None
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class AgriApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'agri_api'
+
+    def ready(self):
+        from django.conf import settings
+
+        level = getattr(settings, 'WARMUP', 'none')
+        if level != 'none':
+            from .warmup import warm_up
+
+            timings = warm_up(level)
+            print(f"[warmup] {level} in {sum(timings.values()):.2f}s: "
+                  + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
@@ -0,0 +1,243 @@
+"""
+Async (ASGI) versions of the network-bound agri_api views.
+
+They do the same work as advisory_view, process_speech_view and
+text_to_speech_view, but wait on OpenWeather, LibreTranslate and Sarvam with
+an httpx.AsyncClient instead of blocking a worker thread, and push CPU-bound
+model calls to a thread pool. Under an ASGI server (e.g. `uvicorn base.asgi:application`)
+one worker can keep hundreds of upstream calls in flight.
+"""
+import asyncio
+import json
+import os
+import time
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .breaker import guard
+from .cache import aget_or_compute
+from .metrics import span, upstream
+from .querylog import annotate
+from .tts import (
+    SarvamError,
+    asynthesize,
+    asynthesize_once,
+    audio_key,
+    audio_store,
+    resolve_api_key,
+    tts_success_response,
+)
+from .views import (
+    _cached_predict_price,
+    _detect_price_intent_en,
+    _detect_price_intent_hi,
+    _format_price_answer_en,
+    _normalize_commodity_hi,
+    _short_lang,
+    _timed,
+)
+
+# One client (and connection pool) per event loop. Under ASGI there is a single
+# long-lived loop; under WSGI each async view gets its own short-lived loop.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_connections=500, max_keepalive_connections=100),
+        )
+        _clients[loop] = client
+    return client
+
+
+def _in_thread(func):
+    # CPU-bound or blocking call off the event loop, on the shared worker pool
+    return sync_to_async(func, thread_sensitive=False)
+
+
+@require_GET
+async def advisory_view_async(request):
+    from smart_farming import aget_advisory
+
+    city = request.GET.get("city")
+    ph_raw = request.GET.get("ph")
+    try:
+        ph = float(ph_raw) if ph_raw is not None else None
+    except ValueError:
+        return JsonResponse({"ok": False, "error": "Invalid ph"}, status=400)
+
+    if ph is None:
+        return JsonResponse({"ok": False, "error": "ph is required"}, status=400)
+
+    result = await aget_advisory(city, ph, _http_client())
+    status = 200 if result.get("ok") else 400
+    return JsonResponse(result, status=status)
+
+
+@csrf_exempt
+@require_POST
+async def text_to_speech_view_async(request):
+    """
+    Async Sarvam AI TTS passthrough (same contract as the sync /api/text-to-speech/:
+    key override, learned endpoint and probing, audio cache).
+    Expects JSON body: {"text": "...", "language": "hi-IN", "voice": "Anushka"}
+    Returns: {"success": true, "audio_base64": "..."}
+    """
+    try:
+        body = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return JsonResponse({"success": False, "error": "Invalid JSON body"}, status=400)
+
+    text = (body.get("text") or "").strip()
+    language = (body.get("language") or "en-IN").strip()
+    annotate(request, language=language)
+    voice = (body.get("voice") or body.get("model") or "Anushka").strip()
+    if not text:
+        return JsonResponse({"success": False, "error": "text is required"}, status=400)
+
+    key = audio_key(text, language, voice)
+    cached_audio = await _in_thread(audio_store().get)(key)
+    if cached_audio:
+        return tts_success_response(request, body, cached_audio, key)
+
+    # Allow dev override via header/body; fallback to environment
+    api_key = resolve_api_key(request, body)
+    if not api_key:
+        return JsonResponse({"success": False, "error": "SARVAM_API_KEY not configured"}, status=500)
+
+    def fetch():
+        # The sync view's endpoint selection, learned endpoint included
+        return asynthesize(text, language, api_key, _http_client(), voice)
+
+    try:
+        with span("tts"):
+            # Shares the call with identical sync and async requests in flight
+            audio = await asynthesize_once(key, fetch)
+    except SarvamError as e:
+        return JsonResponse(e.payload, status=e.status)
+    except Exception as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=502)
+    return tts_success_response(request, body, audio, key)
+
+
+async def _atranslate_text(text: str, src_lang: str, tgt_lang: str) -> str | None:
+    """Async _translate_text(): same cache namespace and parts, None on failure."""
+    if not text:
+        return None
+    return await aget_or_compute(
+        "translate",
+        (src_lang, tgt_lang, text),
+        lambda: _atranslate_text_uncached(text, src_lang, tgt_lang),
+    )
+
+
+async def _atranslate_text_uncached(text: str, src_lang: str, tgt_lang: str) -> str | None:
+    url = os.getenv("TRANSLATE_URL", "https://libretranslate.de/translate")
+    try:
+        with guard("translate", 10) as call, upstream(url):
+            resp = await _http_client().post(url, timeout=call.timeout, data={
+                "q": text,
+                "source": src_lang,
+                "target": tgt_lang,
+                "format": "text",
+            }, headers={"accept": "application/json"})
+            call.check(resp.status_code)
+        if resp.status_code != 200:
+            return None
+        data = resp.json()
+        return data.get("translatedText") or data.get("translation")
+    except Exception:
+        return None
+
+
+async def _atimed(timings: dict, stage: str, awaitable):
+    stage_started = time.perf_counter()
+    try:
+        with span(stage):
+            return await awaitable
+    finally:
+        timings[stage] = round((time.perf_counter() - stage_started) * 1000, 1)
+
+
+@csrf_exempt
+@require_POST
+async def process_speech_view_async(request):
+    """
+    Async process_speech_view(): same dependency graph and response shape, with
+    the translations awaited on the event loop and predict_price run in a thread.
+    """
+    try:
+        body = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return JsonResponse({"success": False, "error": "Invalid JSON body"}, status=400)
+
+    text = (body.get("spoken_text") or "").strip()
+    user_lang = (body.get("language") or "en-US").strip()
+    if not text:
+        return JsonResponse({"success": False, "error": "spoken_text is required"}, status=400)
+
+    started = time.perf_counter()
+    timings = {}
+    default_market = request.GET.get("market") or "Varanasi"
+    src_lang = _short_lang(user_lang)
+
+    translated = None
+    if src_lang != "en":
+        translated = asyncio.ensure_future(_atimed(timings, "translate_in", _atranslate_text(text, src_lang, "en")))
+
+    predictions = {}
+
+    def predict(commodity, market, stage):
+        key = (commodity, market)
+        if key not in predictions:
+            lookup = _in_thread(_cached_predict_price)(commodity, market)
+            predictions[key] = asyncio.ensure_future(_atimed(timings, stage, lookup))
+        return predictions[key]
+
+    intent_hi = _timed(timings, "intent_hi", _detect_price_intent_hi, text)
+    hi_target = None
+    if intent_hi:
+        hi_target = (_normalize_commodity_hi(intent_hi.get("commodity")), intent_hi.get("market") or default_market)
+        predict(*hi_target, "predict_hi")
+
+    english_text = (await translated if translated else None) or text
+    intent = _timed(timings, "intent_en", _detect_price_intent_en, english_text)
+    target = (intent.get("commodity"), intent.get("market") or default_market) if intent else hi_target
+    annotate(request, intent="price" if target else "unknown", language=user_lang)
+    if target:
+        annotate(request, commodity=target[0], market=target[1])
+
+    if target is None:
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        return JsonResponse({
+            "success": True,
+            "chatbot_response": "I'm not sure I understood. You can ask for commodity prices, e.g., 'price of onion in Varanasi'.",
+            "detected_language": user_lang,
+            "timings": timings,
+        })
+
+    result = await predict(*target, "predict_en")
+    if not result.get("ok"):
+        return JsonResponse({"success": False, "error": result.get("error", "prediction failed")}, status=400)
+
+    answer_en = _format_price_answer_en(result)
+    final_text = answer_en
+    if src_lang != "en":
+        final_text = await _atimed(timings, "translate_out", _atranslate_text(answer_en, "en", src_lang)) or answer_en
+
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    return JsonResponse({
+        "success": True,
+        "chatbot_response": final_text,
+        "detected_language": user_lang,
+        "timings": timings,
+    })
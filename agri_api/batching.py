@@ -0,0 +1,123 @@
+"""
+Micro-batching: concurrent callers of one predict function share a single call.
+
+    predict = MicroBatcher(model.predict, window=0.002)
+    preds = predict(X)      # from many threads at once
+
+The first caller to arrive becomes the leader: it waits up to `window` seconds
+(less once `max_rows` rows are queued) for others to join, stacks every queued
+array, calls the function once and hands each caller its slice of the result.
+Callers arriving while that call runs form the next batch. An exception from
+the function is raised in every caller of the batch.
+
+With announced=True callers say they are coming before they get there:
+
+    with predict.expect():
+        X = build_rows()    # slow work other requests overlap with
+        preds = predict(X)
+
+The leader then waits only while announced calls are still on their way, so a
+lone request runs at once and a burst is flushed as soon as all of it is in.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class _Call:
+    __slots__ = ("rows", "result", "error", "done")
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    def __init__(self, func, window: float = 0.002, max_rows: int = 4096, announced: bool = False):
+        self.func = func
+        self.window = window
+        self.max_rows = max_rows
+        self.announced = announced
+        self._cond = threading.Condition()
+        self._queue = []
+        self._queued_rows = 0
+        self._collecting = False
+        # Announced (expect()) calls not queued yet, and whether this thread has one
+        self._incoming = 0
+        self._local = threading.local()
+        # Totals since start, for tests and benchmarks
+        self.calls = 0
+        self.batches = 0
+
+    @contextmanager
+    def expect(self):
+        """Announce one call from this thread for the duration of the block."""
+        with self._cond:
+            self._incoming += 1
+            self._local.expected = True
+        try:
+            yield self
+        finally:
+            # Left without calling (an error or an early return): stop waiting for it
+            if getattr(self._local, "expected", False):
+                with self._cond:
+                    self._incoming -= 1
+                    self._local.expected = False
+                    self._cond.notify()
+
+    def __call__(self, rows):
+        call = _Call(np.asarray(rows))
+        with self._cond:
+            if getattr(self._local, "expected", False):
+                self._incoming -= 1
+                self._local.expected = False
+            self._queue.append(call)
+            self._queued_rows += len(call.rows)
+            lead = not self._collecting
+            if lead:
+                self._collecting = True
+            elif self.announced or self._queued_rows >= self.max_rows:
+                self._cond.notify()
+        if lead:
+            self._lead()
+        else:
+            call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _lead(self) -> None:
+        deadline = time.monotonic() + self.window
+        with self._cond:
+            while self._queued_rows < self.max_rows:
+                if self.announced and not self._incoming:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, self._queue, self._queued_rows = self._queue, [], 0
+            self._collecting = False
+            self.calls += len(batch)
+            self.batches += 1
+        self._run(batch)
+
+    def _run(self, batch: list) -> None:
+        try:
+            rows = batch[0].rows if len(batch) == 1 else np.concatenate([call.rows for call in batch])
+            result = self.func(rows)
+            start = 0
+            for call in batch:
+                end = start + len(call.rows)
+                call.result = result[start:end]
+                start = end
+        except Exception as e:
+            for call in batch:
+                call.error = e
+        finally:
+            for call in batch:
+                call.done.set()
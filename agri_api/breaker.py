@@ -0,0 +1,282 @@
+"""
+Circuit breakers and a per-request deadline for the external providers
+(OpenWeather, LibreTranslate, Sarvam).
+
+    with guard("translate", timeout=10) as call:
+        resp = requests.post(url, timeout=call.timeout, ...)
+        call.check(resp.status_code)
+
+Deadline: DeadlineMiddleware gives every /api/ request REQUEST_DEADLINE_SECONDS
+for all of its upstream calls together. guard() cuts each call's timeout down
+to what is left and raises DeadlineExceeded once nothing is, so a request that
+already waited on a slow translation does not go on to wait for TTS as well.
+The deadline lives in a context variable: the speech pipeline's threads and
+sync_to_async inherit it.
+
+Breaker: one per provider and process, over the calls of the last
+BREAKER_WINDOW_SECONDS. Once at least BREAKER_MIN_CALLS were made and
+BREAKER_FAILURE_RATE of them failed (an exception, a 429 or 5xx) or took longer
+than BREAKER_SLOW_CALL_SECONDS, it opens: guard() raises CircuitOpen without
+calling. After BREAKER_OPEN_SECONDS one probe call is let through (half-open);
+if it succeeds the breaker closes, otherwise it stays open for another period.
+
+Both exceptions are UpstreamUnavailable, and callers answer with their local
+fallback: the untranslated text, no forecast, no audio.
+
+A call shared between requests (agri_api.singleflight) runs under its first
+caller's deadline. watch_deadline() tells the flight when that deadline, not
+the provider, decided the outcome, so the other callers try again on their own
+time instead of inheriting the first one's timeout.
+"""
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+
+class UpstreamUnavailable(Exception):
+    """The provider is not called: its breaker is open or the request is out of time."""
+
+
+class CircuitOpen(UpstreamUnavailable):
+    pass
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    pass
+
+
+def _setting(name: str, default):
+    # Service modules are also used outside Django (scripts, benchmarks)
+    return getattr(settings, name, default) if settings.configured else default
+
+
+# ---------------- Deadline ----------------
+
+# time.monotonic() by which the current request's upstream calls must be done
+_deadline = contextvars.ContextVar("agri_upstream_deadline", default=None)
+
+
+def remaining() -> float | None:
+    """Seconds left in the current request's budget, or None outside a deadline."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+class _Watch:
+    __slots__ = ("cut_short", "outer")
+
+    def __init__(self, outer):
+        self.cut_short = False
+        self.outer = outer
+
+
+# The innermost watch_deadline() block of the current context
+_watch = contextvars.ContextVar("agri_deadline_watch", default=None)
+
+
+@contextmanager
+def watch_deadline():
+    """Yield a handle whose `cut_short` says whether the deadline skipped or cut short a call in the block."""
+    watch = _Watch(_watch.get())
+    token = _watch.set(watch)
+    try:
+        yield watch
+    finally:
+        _watch.reset(token)
+
+
+def _cut_short() -> None:
+    # Enclosing blocks got the same result, so they were cut short too
+    watch = _watch.get()
+    while watch is not None:
+        watch.cut_short = True
+        watch = watch.outer
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Run the block with `seconds` for its upstream calls (or less, inside a tighter deadline)."""
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class DeadlineMiddleware:
+    """Puts every /api/ request under a REQUEST_DEADLINE_SECONDS upstream budget."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.seconds = float(getattr(settings, "REQUEST_DEADLINE_SECONDS", 0) or 0)
+        if self.seconds <= 0:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not request.path.startswith("/api/"):
+            return self.get_response(request)
+        with deadline(self.seconds):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        if not request.path.startswith("/api/"):
+            return await self.get_response(request)
+        with deadline(self.seconds):
+            return await self.get_response(request)
+
+
+# ---------------- Breaker ----------------
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: float = 30.0, min_calls: int = 5, failure_rate: float = 0.5,
+                 slow_call: float = 5.0, open_seconds: float = 15.0):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self._lock = threading.Lock()
+        # (monotonic time, failed or slow) of the calls in the window
+        self._calls = deque()
+        self._bad = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def before(self) -> bool:
+        """Raise CircuitOpen, or let the call through; True when it is the half-open probe."""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    raise CircuitOpen(f"{self.name} circuit open")
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self._probing:
+                    raise CircuitOpen(f"{self.name} circuit half-open, probe in flight")
+                self._probing = True
+                return True
+        return False
+
+    def record(self, ok: bool, seconds: float, probe: bool = False) -> None:
+        bad = not ok or seconds > self.slow_call
+        now = time.monotonic()
+        with self._lock:
+            if probe:
+                self._probing = False
+                if bad:
+                    self._open(now, "probe failed")
+                else:
+                    self.state = "closed"
+                    self._calls.clear()
+                    self._bad = 0
+                    print(f"[breaker] {self.name} closed")
+                return
+            if self.state != "closed":
+                return  # a call started before the breaker opened
+            self._calls.append((now, bad))
+            self._bad += bad
+            while self._calls and self._calls[0][0] < now - self.window:
+                self._bad -= self._calls.popleft()[1]
+            if len(self._calls) >= self.min_calls and self._bad >= self.failure_rate * len(self._calls):
+                self._open(now, f"{self._bad}/{len(self._calls)} calls failed or slow")
+
+    def release(self, probe: bool) -> None:
+        """The call ended without telling anything about the provider (cancelled, or out of request time)."""
+        if probe:
+            with self._lock:
+                self._probing = False
+
+    def _open(self, now: float, reason: str) -> None:
+        self.state = "open"
+        self._opened_at = now
+        print(f"[breaker] {self.name} open for {self.open_seconds:g}s: {reason}")
+
+
+_breakers: dict = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(provider: str) -> CircuitBreaker:
+    """The process-wide breaker of `provider`, configured from the BREAKER_* settings."""
+    b = _breakers.get(provider)
+    if b is None:
+        with _breakers_lock:
+            b = _breakers.get(provider)
+            if b is None:
+                b = _breakers[provider] = CircuitBreaker(
+                    provider,
+                    window=float(_setting("BREAKER_WINDOW_SECONDS", 30)),
+                    min_calls=int(_setting("BREAKER_MIN_CALLS", 5)),
+                    failure_rate=float(_setting("BREAKER_FAILURE_RATE", 0.5)),
+                    slow_call=float(_setting("BREAKER_SLOW_CALL_SECONDS", 5)),
+                    open_seconds=float(_setting("BREAKER_OPEN_SECONDS", 15)),
+                )
+    return b
+
+
+class _Call:
+    __slots__ = ("timeout", "failed")
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.failed = False
+
+    def fail(self) -> None:
+        """Count the call as failed although it raised nothing (e.g. an empty answer)."""
+        self.failed = True
+
+    def check(self, status: int) -> None:
+        # Rate limiting and server errors count against the provider; other 4xx are our requests
+        if status == 429 or status >= 500:
+            self.failed = True
+
+
+@contextmanager
+def guard(provider: str, timeout: float):
+    """
+    Make one call to `provider` under its breaker and the request deadline.
+    Yields a handle whose `timeout` (the smaller of `timeout` and the time left)
+    the call must use. Raises CircuitOpen or DeadlineExceeded instead of calling.
+    """
+    left = remaining()
+    if left is not None and left <= 0:
+        _cut_short()
+        raise DeadlineExceeded(f"request deadline spent before calling {provider}")
+    b = breaker(provider)
+    probe = b.before()
+    call = _Call(timeout if left is None else min(timeout, left))
+    started = time.monotonic()
+    try:
+        yield call
+    except Exception:
+        elapsed = time.monotonic() - started
+        by_deadline = call.timeout < timeout and elapsed >= call.timeout
+        if by_deadline:
+            _cut_short()
+        if by_deadline and elapsed <= b.slow_call:
+            # Cut short by our own deadline: says nothing about the provider
+            b.release(probe)
+        else:
+            b.record(False, elapsed, probe)
+        raise
+    except BaseException:
+        b.release(probe)
+        raise
+    b.record(not call.failed, time.monotonic() - started, probe)
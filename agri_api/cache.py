@@ -0,0 +1,198 @@
+"""
+Response caching for the read-only agri_api endpoints.
+
+Price responses only change when the trained model or the processed features
+change, so they are cached server-side under a key made from the view name,
+the normalized query params and the artifact version. The same key doubles as
+the ETag: a client that sends a matching If-None-Match gets a 304 without the
+view (or the cache) being touched.
+"""
+import hashlib
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+
+from .singleflight import flights
+
+
+def _normalized_query(request) -> str:
+    # Sorted keys, stripped values and no empty params, so `?a=1&b=` == `?a=1`
+    pairs = []
+    for key in sorted(request.GET.keys()):
+        for value in request.GET.getlist(key):
+            value = (value or "").strip()
+            if value:
+                pairs.append(f"{key}={value}")
+    return "&".join(pairs)
+
+
+def cache_response(version_func: Callable[[], str], max_age: int | None = None):
+    """
+    Cache successful (200) JSON responses of a GET view.
+
+    `version_func` returns a string identifying the data the view depends on;
+    when it changes, keys and ETags change with it and old entries age out.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            version = version_func()
+            raw_key = f"{view_func.__name__}|{_normalized_query(request)}|{version}"
+            digest = hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+            etag = f'"{digest}"'
+            response_key = cache_key("response", digest)
+            client_max_age = max_age if max_age is not None else getattr(settings, "API_CACHE_MAX_AGE", 300)
+
+            if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+            # Weak comparison: CompressionMiddleware marks the tag weak on compressed responses
+            client_etags = [tag.removeprefix("W/") for tag in parse_etags(if_none_match or "")]
+            entry = None
+            if if_none_match and if_none_match.strip() == "*":
+                # "*" matches any current representation, so only one we have cached (a 200):
+                # a query that would fail never existed and must not be "not modified"
+                entry = cache.get(response_key)
+                matched = entry is not None
+            else:
+                matched = etag in client_etags
+            if matched:
+                response = HttpResponseNotModified()
+                response["ETag"] = etag
+                patch_cache_control(response, public=True, max_age=client_max_age)
+                return response
+
+            if entry is None:
+                entry = cache.get(response_key)
+            if entry is not None:
+                response = HttpResponse(entry["content"], content_type=entry["content_type"])
+                response["X-Cache"] = "HIT"
+            else:
+                response = view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                cache.set(
+                    response_key,
+                    {"content": response.content, "content_type": response["Content-Type"]},
+                    getattr(settings, "API_CACHE_TIMEOUT", 24 * 60 * 60),
+                )
+                response["X-Cache"] = "MISS"
+
+            response["ETag"] = etag
+            patch_cache_control(response, public=True, max_age=client_max_age)
+            return response
+        return _wrapped
+    return decorator
+
+
+# ---------------- Namespaced value cache shared by the service wrappers ----------------
+
+# Default lifetimes per namespace (seconds); override with settings.CACHE_TIMEOUTS
+_DEFAULT_TIMEOUTS = {
+    "price": 24 * 60 * 60,
+    "weather": 30 * 60,
+    "translate": 7 * 24 * 60 * 60,
+    # Price snapshots; old versions are kept around to answer delta requests
+    "snapshot": 30 * 24 * 60 * 60,
+    # Learned Sarvam endpoint: kept until a call through it fails
+    "tts_endpoint": None,
+}
+
+
+def _django_cache():
+    # Service modules are also imported outside Django (scripts, benchmarks)
+    return cache if settings.configured else None
+
+
+def cache_key(namespace: str, *parts) -> str:
+    """
+    Build a namespaced key: `<namespace>:v<version>:<sha1 of parts>`.
+
+    Bumping a namespace in settings.CACHE_NAMESPACE_VERSIONS invalidates every
+    entry in it without touching the others.
+    """
+    versions = getattr(settings, "CACHE_NAMESPACE_VERSIONS", {}) if settings.configured else {}
+    raw = "|".join(str(p) for p in parts)
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+    return f"{namespace}:v{versions.get(namespace, 1)}:{digest}"
+
+
+def get_cached(namespace: str, parts):
+    """Return the cached value for (namespace, parts), or None on a miss or backend error."""
+    backend = _django_cache()
+    if backend is None:
+        return None
+    try:
+        return backend.get(cache_key(namespace, *parts))
+    except Exception:
+        return None
+
+
+def set_cached(namespace: str, parts, value, timeout: int | None = None) -> None:
+    """Store a value under (namespace, parts) using the namespace's default lifetime."""
+    backend = _django_cache()
+    if backend is None:
+        return
+    if timeout is None:
+        timeouts = {**_DEFAULT_TIMEOUTS, **getattr(settings, "CACHE_TIMEOUTS", {})}
+        timeout = timeouts.get(namespace)
+    try:
+        backend.set(cache_key(namespace, *parts), value, timeout)
+    except Exception:
+        pass
+
+
+def delete_cached(namespace: str, parts) -> None:
+    backend = _django_cache()
+    if backend is None:
+        return
+    try:
+        backend.delete(cache_key(namespace, *parts))
+    except Exception:
+        pass
+
+
+def get_or_compute(namespace: str, parts, compute: Callable, should_cache: Callable = None, timeout: int | None = None):
+    """
+    Return the cached value for (namespace, parts) or compute and store it.
+
+    `should_cache` decides whether a freshly computed value is stored; by
+    default anything except None is, so failed upstream calls are retried.
+    Cache backend errors never break the caller, they just skip caching.
+
+    Concurrent misses for the same entry share one compute() (agri_api.singleflight),
+    also with aget_or_compute() callers.
+    """
+    value = get_cached(namespace, parts)
+    if value is not None:
+        return value
+
+    def fill():
+        value = compute()
+        keep = should_cache(value) if should_cache else value is not None
+        if keep:
+            set_cached(namespace, parts, value, timeout)
+        return value
+
+    return flights.do(cache_key(namespace, *parts), fill)
+
+
+async def aget_or_compute(namespace: str, parts, acompute: Callable, should_cache: Callable = None, timeout: int | None = None):
+    """get_or_compute() for async views: `acompute` is a coroutine function, the cache is read and written in a thread."""
+    from asgiref.sync import sync_to_async
+
+    value = await sync_to_async(get_cached, thread_sensitive=False)(namespace, parts)
+    if value is not None:
+        return value
+
+    async def fill():
+        value = await acompute()
+        keep = should_cache(value) if should_cache else value is not None
+        if keep:
+            await sync_to_async(set_cached, thread_sensitive=False)(namespace, parts, value, timeout)
+        return value
+
+    return await flights.ado(cache_key(namespace, *parts), fill)
@@ -0,0 +1,101 @@
+"""
+On-the-fly compression of JSON API responses.
+
+Django's GZipMiddleware compresses everything above 200 bytes, including
+streaming responses, which would hold back the NDJSON audio chunks of
+/api/text-to-speech/stream/. This one only touches complete JSON bodies of at
+least API_COMPRESS_MIN_BYTES (default 1024), uses brotli when the `brotli`
+package is installed and the client accepts it, gzip otherwise, and leaves
+responses that are already encoded (price snapshots) alone.
+
+Static files are compressed ahead of time by collectstatic (WhiteNoise's
+CompressedManifestStaticFilesStorage), not here.
+"""
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # optional; gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json",)
+
+
+def available_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def preferred_encoding(accept_encoding: str, available) -> str:
+    """The first of br, gzip that is in `available` and accepted by the client, else "identity"."""
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = re.search(r"q=([0-9.]+)", params)
+        if name and not (q and float(q.group(1)) == 0):
+            accepted.add(name.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return "identity"
+
+
+def compress(content: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    Compress for a Content-Encoding. Moderate levels by default, since most
+    responses are compressed per request; `best` for content encoded once and stored.
+    """
+    if encoding == "br":
+        return brotli.compress(content, quality=11 if best else 5)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(content, compresslevel=9 if best else 6, mtime=0)
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = int(getattr(settings, "API_COMPRESS_MIN_BYTES", 1024))
+        self.encodings = available_encodings()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header("Content-Encoding"):
+            return response
+        if not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES):
+            return response
+        # The body depends on Accept-Encoding from here on, even if it stays uncompressed
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if len(response.content) < self.min_bytes:
+            return response
+
+        encoding = preferred_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), self.encodings)
+        if encoding == "identity":
+            return response
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = encoding
+        # The bytes differ per encoding, so a strong validator becomes weak (as GZipMiddleware does)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
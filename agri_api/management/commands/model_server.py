@@ -0,0 +1,41 @@
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from agri_api.model_server import ModelServer
+from agri_api.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = "Serve the price and crop models over a Unix socket, micro-batching concurrent requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", help="socket path (default MODEL_SERVER_SOCKET)")
+        parser.add_argument("--window-ms", type=float, help="batching window (default MODEL_SERVER_WINDOW_MS)")
+        parser.add_argument("--max-rows", type=int, default=4096, help="rows that close a batch early")
+
+    def handle(self, *args, **options):
+        path = options["socket"] or settings.MODEL_SERVER_SOCKET
+        if not path:
+            raise CommandError("pass --socket or set MODEL_SERVER_SOCKET")
+        window_ms = options["window_ms"] if options["window_ms"] is not None else settings.MODEL_SERVER_WINDOW_MS
+
+        # Load both models before accepting connections (not through the client: this is the server)
+        from commodity_price import load_model
+        from smart_farming import crop_recommender
+
+        warm_up("imports")
+        load_model()
+        crop_recommender()
+
+        server = ModelServer(str(path), window=window_ms / 1000, max_rows=options["max_rows"])
+        # Stop on SIGTERM as on Ctrl-C, removing the socket file
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        self.stdout.write(f"Model server on {path} (window {window_ms:g} ms)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from agri_api.prewarm import prewarm
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-compute the most requested price predictions, snapshots, weather/crop advisories and "
+        "TTS answers (from the query log) within a time budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, help="(commodity, market) pairs to predict (default PREWARM_TOP)")
+        parser.add_argument("--cities", type=int, help="cities to fetch weather for (default PREWARM_CITIES)")
+        parser.add_argument("--days", type=int, help="query log window (default PREWARM_DAYS)")
+        parser.add_argument("--budget", type=float, help="seconds before pending work is skipped (default PREWARM_BUDGET_SECONDS)")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--ph", type=float, default=6.5, help="soil pH for the crop recommendation")
+        parser.add_argument("--no-tts", action="store_true", help="skip rendering TTS audio")
+        parser.add_argument("--every", type=float, default=0, help="repeat every N seconds (0 = run once)")
+
+    def handle(self, *args, **options):
+        while True:
+            report = prewarm(
+                top=options["top"],
+                cities=options["cities"],
+                days=options["days"],
+                budget=options["budget"],
+                workers=options["workers"],
+                ph=options["ph"],
+                tts=not options["no_tts"],
+            )
+            for step in ("price", "snapshot", "advisory", "tts"):
+                r = report[step]
+                self.stdout.write(f"{step:<9} {r['done']:>4} done {r['failed']:>4} failed {r['skipped']:>4} skipped")
+            self.stdout.write(f"{report['seconds']}s")
+            if not options["every"]:
+                break
+            time.sleep(max(0.0, options["every"] - report["seconds"]))
@@ -0,0 +1,222 @@
+"""
+Lightweight in-process latency metrics.
+
+Spans time a pipeline stage or an external call and feed a histogram:
+
+    with span("translate_in"):
+        ...
+    with upstream(url) as call:
+        resp = requests.post(url, ...)
+        if not resp.ok:
+            call.fail()  # counted as outcome="error"; so is an exception
+
+Histograms are exposed in Prometheus text format by `metrics_view` (/metrics),
+and MetricsMiddleware times every request and can add a `Server-Timing` header
+listing the spans of that request (SERVER_TIMING setting).
+
+With METRICS_ENABLED = False every span is one shared no-op context manager.
+Metrics live in process memory, so each gunicorn worker reports its own series.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def fail(self) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+
+# Spans of the current request, collected for Server-Timing; None outside one
+_request_spans: contextvars.ContextVar = contextvars.ContextVar("agri_request_spans", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [count per bucket..., count above the last bucket, sum, count]
+        self._series: dict = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, labels: tuple) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-1]}")
+        return lines
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+STAGES = Histogram("agri_stage_duration_seconds", "Time spent in a pipeline stage.", ("stage",))
+UPSTREAM = Histogram(
+    "agri_upstream_duration_seconds", "External HTTP call latency by host.", ("host", "outcome")
+)
+REQUESTS = Histogram(
+    "agri_http_request_duration_seconds", "Request latency by route.", ("route", "method", "status")
+)
+REGISTRY = [REQUESTS, STAGES, UPSTREAM]
+
+
+def enabled() -> bool:
+    return settings.configured and getattr(settings, "METRICS_ENABLED", True)
+
+
+class _Span:
+    __slots__ = ("histogram", "label", "timing_name", "started", "failed")
+
+    def __init__(self, histogram: Histogram, label: str, timing_name: str):
+        self.histogram = histogram
+        self.label = label
+        self.timing_name = timing_name
+        self.failed = False
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def fail(self) -> None:
+        """Record an upstream call that raised nothing as outcome="error" (e.g. an empty answer)."""
+        self.failed = True
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        if self.histogram is UPSTREAM:
+            self.histogram.observe(elapsed, (self.label, "error" if exc_type or self.failed else "ok"))
+        else:
+            self.histogram.observe(elapsed, (self.label,))
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((self.timing_name, self.label, elapsed))
+        return False
+
+
+def span(stage: str):
+    """Time a pipeline stage (agri_stage_duration_seconds{stage=...})."""
+    if not enabled():
+        return _NOOP
+    return _Span(STAGES, stage, stage)
+
+
+def upstream(url: str):
+    """Time an external call by host (agri_upstream_duration_seconds{host=...})."""
+    if not enabled():
+        return _NOOP
+    return _Span(UPSTREAM, urlsplit(url).netloc or url, "upstream")
+
+
+def render() -> str:
+    lines = []
+    for histogram in REGISTRY:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def server_timing_header(spans: list, total: float) -> str:
+    entries = []
+    for name, label, seconds in spans:
+        desc = f';desc="{label}"' if name != label else ""
+        entries.append(f"{name}{desc};dur={seconds * 1000:.1f}")
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """Times each request by route and, with SERVER_TIMING, reports its spans."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not enabled():
+            return self.get_response(request)
+        started, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            spans = _request_spans.get()
+            _request_spans.reset(token)
+        return self._finish(request, response, started, spans)
+
+    async def __acall__(self, request):
+        if not enabled():
+            return await self.get_response(request)
+        started, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            spans = _request_spans.get()
+            _request_spans.reset(token)
+        return self._finish(request, response, started, spans)
+
+    def _start(self):
+        spans = [] if getattr(settings, "SERVER_TIMING", False) else None
+        return time.perf_counter(), _request_spans.set(spans)
+
+    def _finish(self, request, response, started, spans):
+        elapsed = time.perf_counter() - started
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "unmatched"
+        REQUESTS.observe(elapsed, (route, request.method, str(response.status_code)))
+        if spans is not None:
+            response["Server-Timing"] = server_timing_header(spans, elapsed)
+        return response
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueryLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(db_index=True)),
+                ('route', models.CharField(max_length=100)),
+                ('intent', models.CharField(blank=True, max_length=40)),
+                ('commodity', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('market', models.CharField(blank=True, max_length=100)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('language', models.CharField(blank=True, max_length=20)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('duration_ms', models.FloatField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['intent', 'created_at'], name='agri_api_qu_intent_5f2eb4_idx')],
+            },
+        ),
+    ]
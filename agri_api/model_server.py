@@ -0,0 +1,234 @@
+"""
+Optional model server: one process owns the price model (Commodity_Model) and
+the crop recommender (Model2) and serves predictions over a Unix socket.
+
+    python manage.py model_server --socket /run/agri/models.sock
+    MODEL_SERVER_SOCKET=/run/agri/models.sock gunicorn base.wsgi
+
+With MODEL_SERVER_SOCKET set, commodity_price and smart_farming send their
+feature rows here instead of loading the models in every worker; the workers
+keep only the feature frames they build rows from. Rows travel as raw float32
+(price) or float64 (crop) buffers that the server wraps with np.frombuffer, no
+per-value encoding. Each connection is served by its own thread, and concurrent
+requests are micro-batched (agri_api.batching) over MODEL_SERVER_WINDOW_MS into
+one predict call per model.
+
+When the server cannot be reached the client raises ModelServerUnavailable,
+stops trying for a few seconds, and the callers predict in-process instead.
+
+Wire format, both directions: struct "!II" (header length, body length), a JSON
+header, then the body. Requests carry {"op": "price" | "crop" | "ping", "shape"};
+replies {"ok": true, ...} or {"ok": false, "error": "..."}.
+"""
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .batching import MicroBatcher
+
+_FRAME = struct.Struct("!II")
+
+
+class ModelServerUnavailable(Exception):
+    """The model server could not be reached; predict in-process instead."""
+
+
+class ModelServerError(Exception):
+    """The model server answered with an error."""
+
+
+def _recv_exact(sock, n: int) -> bytes | None:
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        read = sock.recv_into(view[got:])
+        if not read:
+            if got == 0:
+                return None
+            raise ConnectionError("connection closed mid-frame")
+        got += read
+    return bytes(buf)
+
+
+def send_frame(sock, header: dict, body: bytes = b"") -> None:
+    head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(head), len(body)) + head + body)
+
+
+def recv_frame(sock) -> tuple[dict, bytes] | None:
+    """The next (header, body), or None when the peer closed the connection between frames."""
+    prefix = _recv_exact(sock, _FRAME.size)
+    if prefix is None:
+        return None
+    head_len, body_len = _FRAME.unpack(prefix)
+    head = _recv_exact(sock, head_len) if head_len else b"{}"
+    body = _recv_exact(sock, body_len) if body_len else b""
+    if head is None or body is None:
+        raise ConnectionError("connection closed mid-frame")
+    return json.loads(head), body
+
+
+# ---------------- Server ----------------
+
+def _price_predict(rows: np.ndarray) -> np.ndarray:
+    from commodity_price import load_model
+
+    return np.asarray(load_model().predict(rows), dtype=np.float32)
+
+
+def _crop_predict(rows: np.ndarray) -> np.ndarray:
+    from smart_farming import crop_recommender
+
+    return np.asarray(crop_recommender().predict_batch(rows), dtype=object)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                frame = recv_frame(self.request)
+            except (OSError, ValueError):
+                return
+            if frame is None:
+                return
+            try:
+                reply, body = self.server.dispatch(*frame)
+            except Exception as e:
+                reply, body = {"ok": False, "error": str(e)}, b""
+            try:
+                send_frame(self.request, reply, body)
+            except OSError:
+                return
+
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, window: float = 0.002, max_rows: int = 4096,
+                 price_predict=_price_predict, crop_predict=_crop_predict):
+        if os.path.exists(path):
+            os.unlink(path)  # left over from a server that did not shut down cleanly
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+        self.path = path
+        self.price = MicroBatcher(price_predict, window, max_rows)
+        self.crop = MicroBatcher(crop_predict, window, max_rows)
+
+    def dispatch(self, header: dict, body: bytes) -> tuple[dict, bytes]:
+        op = header.get("op")
+        if op == "price":
+            rows = np.frombuffer(body, dtype=np.float32).reshape(header["shape"])
+            preds = np.asarray(self.price(rows), dtype=np.float32)
+            return {"ok": True, "shape": [len(preds)]}, preds.tobytes()
+        if op == "crop":
+            rows = np.frombuffer(body, dtype=np.float64).reshape(header["shape"])
+            return {"ok": True, "labels": [str(label) for label in self.crop(rows)]}, b""
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "batches": self.price.batches + self.crop.batches}, b""
+        return {"ok": False, "error": f"unknown op {op!r}"}, b""
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+# ---------------- Client ----------------
+
+class ModelServerClient:
+    """
+    One connection per thread to the model server. After a connection failure
+    every call raises ModelServerUnavailable for `retry_after` seconds, so a
+    down server costs the callers one failed connect, not one per request.
+    """
+
+    def __init__(self, path: str, timeout: float = 2.0, retry_after: float = 5.0):
+        self.path = path
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def _drop(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def call(self, header: dict, body: bytes = b"") -> tuple[dict, bytes]:
+        if time.monotonic() < self._down_until:
+            raise ModelServerUnavailable(f"{self.path} unreachable; retrying shortly")
+        for attempt in (1, 2):
+            sock = getattr(self._local, "sock", None)
+            reused = sock is not None
+            try:
+                if sock is None:
+                    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    sock.settimeout(self.timeout)
+                    self._local.sock = sock
+                    sock.connect(self.path)
+                send_frame(sock, header, body)
+                frame = recv_frame(sock)
+                if frame is None:
+                    raise ConnectionError("model server closed the connection")
+                break
+            except OSError as e:
+                self._drop()
+                # A kept-alive connection may predate a server restart; retry once on a new one
+                if reused and attempt == 1:
+                    continue
+                self._down_until = time.monotonic() + self.retry_after
+                raise ModelServerUnavailable(f"{self.path}: {e}") from e
+        reply, payload = frame
+        if not reply.get("ok"):
+            raise ModelServerError(reply.get("error") or "model server error")
+        return reply, payload
+
+    def predict_price(self, rows) -> np.ndarray:
+        rows = np.ascontiguousarray(rows, dtype=np.float32)
+        _, payload = self.call({"op": "price", "shape": list(rows.shape)}, rows.tobytes())
+        return np.frombuffer(payload, dtype=np.float32)
+
+    def recommend_crops(self, rows) -> list[str]:
+        rows = np.ascontiguousarray(rows, dtype=np.float64)
+        reply, _ = self.call({"op": "crop", "shape": list(rows.shape)}, rows.tobytes())
+        return reply["labels"]
+
+    def ping(self) -> dict:
+        return self.call({"op": "ping"})[0]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client() -> ModelServerClient | None:
+    """The client for MODEL_SERVER_SOCKET, or None when no model server is configured."""
+    global _client
+    if settings.configured:
+        path = getattr(settings, "MODEL_SERVER_SOCKET", None)
+        timeout = float(getattr(settings, "MODEL_SERVER_TIMEOUT", 2.0))
+    else:
+        # Scripts using commodity_price without Django
+        path = os.getenv("MODEL_SERVER_SOCKET")
+        timeout = float(os.getenv("MODEL_SERVER_TIMEOUT", "2"))
+    if not path:
+        return None
+    if _client is None or _client.path != path:
+        with _client_lock:
+            if _client is None or _client.path != path:
+                _client = ModelServerClient(str(path), timeout)
+    return _client
@@ -0,0 +1,21 @@
+from django.db import models
+
+
+class QueryLog(models.Model):
+    """One API request: what was asked and how long it took (written in batches by agri_api.querylog)."""
+
+    created_at = models.DateTimeField(db_index=True)
+    route = models.CharField(max_length=100)
+    intent = models.CharField(max_length=40, blank=True)
+    commodity = models.CharField(max_length=100, blank=True, db_index=True)
+    market = models.CharField(max_length=100, blank=True)
+    city = models.CharField(max_length=100, blank=True)
+    language = models.CharField(max_length=20, blank=True)
+    status = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+
+    class Meta:
+        indexes = [models.Index(fields=["intent", "created_at"])]
+
+    def __str__(self):
+        return f"{self.created_at:%Y-%m-%d %H:%M:%S} {self.route} {self.intent} {self.commodity or self.city}"
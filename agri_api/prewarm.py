@@ -0,0 +1,197 @@
+"""
+Demand-driven cache pre-warming, run by `python manage.py prewarm`.
+
+Reads the last PREWARM_DAYS days of agri_api.models.QueryLog and, within a time
+budget, fills the shared caches in order of how much each step saves the first
+farmers after a deploy or model refresh:
+
+  1. price      the top (commodity, market) predictions (also loads the model)
+  2. snapshot   the price snapshot of each of those markets (/api/price/snapshot/)
+  3. advisory   OpenWeather forecasts for the most asked-about cities, topped up
+                from CITIES_UP, and the crop recommendation for them
+  4. tts        the spoken price answers of step 1 in the most used languages,
+                translated and synthesized into the TTS audio cache (needs
+                SARVAM_API_KEY)
+
+Each step runs on a small thread pool. Once the budget is spent, tasks not yet
+started are skipped; the ones in flight finish. Everything already cached is a
+cache hit, so a rerun is cheap.
+"""
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+DEFAULT_MARKET = "Varanasi"
+DEFAULT_LANGUAGES = ("en-IN", "hi-IN")
+TTS_VOICE = "Anushka"
+# static/scripts/chat.js streams answers at least this long sentence by sentence
+TTS_STREAM_MIN_CHARS = 160
+
+
+def query_stats(days: int, limit: int) -> dict:
+    """
+    Most frequent (commodity, market) pairs, cities and languages of successful
+    API requests in the last `days`, each as [(value, count)] most common first.
+    """
+    from .models import QueryLog
+    from .views import _normalize_commodity_param
+
+    rows = QueryLog.objects.filter(created_at__gte=timezone.now() - timedelta(days=days), status__lt=400)
+
+    def counts(*fields):
+        return rows.exclude(**{fields[0]: ""}).values_list(*fields).annotate(n=Count("id"))
+
+    # Spelling and case vary between the price endpoints and speech; merge them
+    pairs = Counter()
+    for commodity, market, n in counts("commodity", "market"):
+        pairs[(_normalize_commodity_param(commodity).strip().lower(), market.strip() or DEFAULT_MARKET)] += n
+    cities = Counter()
+    for city, n in counts("city"):
+        cities[city.strip().title()] += n
+    languages = Counter()
+    for language, n in counts("language"):
+        languages[language.strip()] += n
+    return {
+        "pairs": pairs.most_common(limit),
+        "cities": cities.most_common(limit),
+        "languages": languages.most_common(limit),
+    }
+
+
+def _run(tasks: list, stats: dict, deadline: float, workers: int) -> dict:
+    """Run [(label, func)] on a thread pool until `deadline`; returns {label: result} of the ones that worked."""
+    results = {}
+    if time.monotonic() >= deadline:
+        stats["skipped"] += len(tasks)
+        return results
+
+    def tally(future):
+        label = futures.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"[prewarm] {label}: {e}")
+            result = None
+        if result is None or (isinstance(result, dict) and not result.get("ok", True)):
+            stats["failed"] += 1
+        else:
+            stats["done"] += 1
+            results[label] = result
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prewarm")
+    futures = {pool.submit(func): label for label, func in tasks}
+    try:
+        for future in as_completed(list(futures), timeout=max(0.0, deadline - time.monotonic())):
+            tally(future)
+    except FuturesTimeout:  # not the builtin TimeoutError before Python 3.11
+        stats["skipped"] += sum(future.cancel() for future in futures)
+    finally:
+        # Tasks already running when the budget ran out still finish
+        pool.shutdown(wait=True, cancel_futures=True)
+    for future in [f for f in futures if not f.cancelled()]:
+        tally(future)
+    return results
+
+
+def _spoken_texts(answer_en: str, language: str) -> list[str]:
+    """The texts the chat sends to TTS for an answer: translated, then sentence chunks when streamed."""
+    from .tts import split_sentences
+    from .views import _short_lang, _translate_text
+
+    lang = _short_lang(language)
+    text = answer_en if lang == "en" else (_translate_text(answer_en, "en", lang) or answer_en)
+    return split_sentences(text) if len(text) >= TTS_STREAM_MIN_CHARS else [text]
+
+
+def _render_audio(answer_en: str, language: str, voice: str, api_key: str):
+    from .tts import audio_key, audio_store, synthesize, synthesize_once
+
+    store = audio_store()
+    texts = _spoken_texts(answer_en, language)
+    for text in texts:
+        key = audio_key(text, language, voice)
+        if store.get(key) is None:
+            synthesize_once(key, lambda: synthesize(text, language, api_key, voice))
+    return len(texts)
+
+
+def prewarm(
+    top: int | None = None,
+    cities: int | None = None,
+    days: int | None = None,
+    budget: float | None = None,
+    workers: int = 4,
+    ph: float = 6.5,
+    tts: bool = True,
+    tts_languages: int = 2,
+) -> dict:
+    """
+    Warm the caches for the most requested data; returns per-step
+    {"done", "failed", "skipped"} counts plus the stats used and the seconds spent.
+    """
+    from commodity_price import artifact_version
+    from smart_farming import CITIES_UP, get_advisory
+
+    from .snapshot import snapshot
+    from .views import _cached_predict_price, _format_price_answer_en
+
+    top = top or getattr(settings, "PREWARM_TOP", 20)
+    cities = cities or getattr(settings, "PREWARM_CITIES", 10)
+    days = days or getattr(settings, "PREWARM_DAYS", 7)
+    budget = budget or getattr(settings, "PREWARM_BUDGET_SECONDS", 120)
+    started = time.monotonic()
+    deadline = started + budget
+    report = {step: {"done": 0, "failed": 0, "skipped": 0} for step in ("price", "snapshot", "advisory", "tts")}
+
+    try:
+        stats = query_stats(days, max(top, cities))
+    except Exception as e:
+        # No table yet (migrate not run) or no database: warm the defaults
+        print(f"[prewarm] query log unavailable: {e}")
+        stats = {"pairs": [], "cities": [], "languages": []}
+    pairs = [pair for pair, _ in stats["pairs"][:top]]
+    markets = list(dict.fromkeys(market for _, market in pairs)) or [DEFAULT_MARKET]
+    known = {c["name"].lower(): c["name"] for c in CITIES_UP}
+    city_names = [known[city.lower()] for city, _ in stats["cities"] if city.lower() in known]
+    city_names = list(dict.fromkeys(city_names + [c["name"] for c in CITIES_UP]))[:cities]
+    languages = [lang for lang, _ in stats["languages"]][:tts_languages] or list(DEFAULT_LANGUAGES)
+
+    prices = _run(
+        [(pair, lambda pair=pair: _cached_predict_price(*pair)) for pair in pairs],
+        report["price"], deadline, workers,
+    )
+    version = artifact_version()
+    _run(
+        [(market, lambda market=market: snapshot(market, version)) for market in markets],
+        report["snapshot"], deadline, workers,
+    )
+    _run(
+        [(city, lambda city=city: get_advisory(city, ph)) for city in city_names],
+        report["advisory"], deadline, workers,
+    )
+
+    api_key = os.getenv("SARVAM_API_KEY")
+    if tts and api_key:
+        # Most asked first, as `pairs` is ordered
+        answers = [_format_price_answer_en(prices[pair]) for pair in pairs if pair in prices]
+        _run(
+            [
+                ((answer, language), lambda answer=answer, language=language: _render_audio(answer, language, TTS_VOICE, api_key))
+                for answer in answers
+                for language in languages
+            ],
+            report["tts"], deadline, workers,
+        )
+    elif tts:
+        print("[prewarm] SARVAM_API_KEY not set; skipping TTS audio")
+
+    report["stats"] = stats
+    report["seconds"] = round(time.monotonic() - started, 1)
+    return report
@@ -0,0 +1,185 @@
+"""
+Log what farmers ask about: every /api/ request becomes a QueryLog row
+(route, intent, commodity, market, city, language, status, latency).
+
+The request path only appends a tuple to an in-memory deque (about a
+microsecond). A daemon thread per process wakes every QUERY_LOG_FLUSH_SECONDS,
+drains the deque and bulk-inserts the rows QUERY_LOG_BATCH_SIZE at a time. The
+deque holds at most QUERY_LOG_MAX_PENDING rows; if the database is down or too
+slow the oldest are dropped rather than holding up requests. Rows still pending
+at interpreter exit are flushed by an atexit hook.
+
+The middleware fills the fields from the query string (commodity/q, market,
+city, language); views add what only they know with annotate():
+
+    querylog.annotate(request, intent="price", commodity="onion", market="Varanasi")
+"""
+import atexit
+import collections
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Order of the tuples queued by record()
+FIELDS = ("created_at", "route", "intent", "commodity", "market", "city", "language", "status", "duration_ms")
+
+
+def _insert_rows(rows: list[tuple]) -> None:
+    from django.db import close_old_connections
+
+    from .models import QueryLog
+
+    try:
+        QueryLog.objects.bulk_create([
+            QueryLog(
+                created_at=datetime.fromtimestamp(ts, timezone.utc),
+                route=route[:100],
+                intent=intent[:40],
+                commodity=commodity[:100],
+                market=market[:100],
+                city=city[:100],
+                language=language[:20],
+                status=status,
+                duration_ms=round(duration_ms, 1),
+            )
+            for ts, route, intent, commodity, market, city, language, status, duration_ms in rows
+        ])
+    finally:
+        # This thread is outside the request cycle; nothing else closes its connection
+        close_old_connections()
+
+
+class QueryLogWriter:
+    """Queues rows in memory and hands them to `sink` in batches from a background thread."""
+
+    def __init__(self, sink=_insert_rows, flush_seconds: float = 2.0, batch_size: int = 500, max_pending: int = 10000):
+        self.sink = sink
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.pending = collections.deque(maxlen=max_pending)
+        self._pid = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def record(self, row: tuple) -> None:
+        self.pending.append(row)
+        # Threads do not survive fork; start one per worker process
+        if self._pid != os.getpid():
+            self._start()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name="query-log-writer", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def flush(self) -> int:
+        """Write everything pending; returns the number of rows handed to the sink."""
+        written = 0
+        with self._flush_lock:
+            while self.pending:
+                batch = []
+                try:
+                    while len(batch) < self.batch_size:
+                        batch.append(self.pending.popleft())
+                except IndexError:
+                    pass
+                try:
+                    self.sink(batch)
+                    written += len(batch)
+                except Exception as e:
+                    # Losing log rows must never affect serving
+                    print(f"[querylog] dropped {len(batch)} rows: {e}")
+        return written
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def writer() -> QueryLogWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = QueryLogWriter(
+                    flush_seconds=float(getattr(settings, "QUERY_LOG_FLUSH_SECONDS", 2.0)),
+                    batch_size=int(getattr(settings, "QUERY_LOG_BATCH_SIZE", 500)),
+                    max_pending=int(getattr(settings, "QUERY_LOG_MAX_PENDING", 10000)),
+                )
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def annotate(request, **fields) -> None:
+    """Attach intent/commodity/market/city/language to the request's log row."""
+    try:
+        request._query_log.update(fields)
+    except AttributeError:
+        request._query_log = dict(fields)
+
+
+class QueryLogMiddleware:
+    """Queues one QueryLog row per API request; removed when QUERY_LOG_ENABLED is false."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "QUERY_LOG_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.prefixes = tuple(getattr(settings, "QUERY_LOG_PREFIXES", ("/api/",)))
+        self.writer = writer()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _record(self, request, started: float, response) -> None:
+        duration_ms = (time.perf_counter() - started) * 1000
+        try:
+            fields = getattr(request, "_query_log", {})
+            match = request.resolver_match
+            query = request.GET
+            self.writer.record((
+                time.time(),
+                match.route if match else request.path,
+                fields.get("intent") or (match.url_name if match else None) or "",
+                fields.get("commodity") or query.get("commodity") or query.get("q") or "",
+                fields.get("market") or query.get("market") or "",
+                fields.get("city") or query.get("city") or "",
+                fields.get("language") or query.get("language") or "",
+                response.status_code,
+                duration_ms,
+            ))
+        except Exception as e:
+            print(f"[querylog] failed to record {request.path}: {e}")
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not request.path.startswith(self.prefixes):
+            return self.get_response(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, started, response)
+        return response
+
+    async def __acall__(self, request):
+        if not request.path.startswith(self.prefixes):
+            return await self.get_response(request)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, started, response)
+        return response
@@ -0,0 +1,107 @@
+"""
+Single-flight: concurrent identical upstream calls share one call.
+
+    flights.do(key, fetch)             # from a thread
+    await flights.ado(key, afetch)     # from a coroutine
+
+The first caller for a key runs the function; everyone asking for the same key
+while it runs (threads and asyncio tasks alike, in any event loop) waits for it
+and gets the same result, or the same exception. Nothing is kept afterwards:
+remembering results is the cache's job (agri_api.cache.get_or_compute goes
+through here on a miss), this only stops fifty requests for the Varanasi
+forecast that arrive together from becoming fifty OpenWeather calls.
+
+The call runs in the first caller's context, under its request deadline. If
+that deadline, rather than the provider, decided the outcome (the first caller
+was out of time), the others are not handed its fallback: they try again, one
+of them leading the next call.
+
+Per process. A sync caller must not wait from a thread that runs an event loop
+whose task is the one fetching: blocking calls belong in a worker thread there
+anyway (sync_to_async).
+"""
+import asyncio
+import threading
+from concurrent.futures import CancelledError, Future
+
+from .breaker import watch_deadline
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: dict = {}
+        # Totals since start, for tests and benchmarks: calls run, and calls that joined one
+        self.calls = 0
+        self.shared = 0
+
+    def _join(self, key) -> tuple[Future, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.shared += 1
+                return flight, False
+            flight = self._flights[key] = Future()
+            self.calls += 1
+            return flight, True
+
+    def _land(self, key, flight: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _finish(self, key, flight: Future, result=None, error: BaseException | None = None, cut_short: bool = False) -> None:
+        self._land(key, flight)
+        if cut_short:
+            # Decided by the leader's request deadline, not by the call: the others try again
+            flight.cancel()
+        elif error is None:
+            flight.set_result(result)
+        elif isinstance(error, Exception):
+            flight.set_exception(error)
+        else:
+            # The leader was cancelled or interrupted, not the call: the others try again
+            flight.cancel()
+
+    def do(self, key, func, *args):
+        """func(*args), unless a call for `key` is already running; then its result."""
+        while True:
+            flight, lead = self._join(key)
+            if not lead:
+                try:
+                    return flight.result()
+                except CancelledError:
+                    continue
+            with watch_deadline() as watch:
+                try:
+                    result = func(*args)
+                except BaseException as e:
+                    self._finish(key, flight, error=e, cut_short=watch.cut_short)
+                    raise
+            self._finish(key, flight, result, cut_short=watch.cut_short)
+            return result
+
+    async def ado(self, key, func, *args):
+        """await func(*args), unless a call for `key` is already running (sync or async); then its result."""
+        while True:
+            flight, lead = self._join(key)
+            if not lead:
+                try:
+                    # shield: a waiter being cancelled must not cancel the shared call
+                    return await asyncio.shield(asyncio.wrap_future(flight))
+                except asyncio.CancelledError:
+                    if flight.cancelled():
+                        continue
+                    raise
+            with watch_deadline() as watch:
+                try:
+                    result = await func(*args)
+                except BaseException as e:
+                    self._finish(key, flight, error=e, cut_short=watch.cut_short)
+                    raise
+            self._finish(key, flight, result, cut_short=watch.cut_short)
+            return result
+
+
+# Shared by the cache and the upstream clients; keys are namespaced like cache keys
+flights = SingleFlight()
@@ -0,0 +1,104 @@
+"""
+Compact, versioned price snapshots for the chat frontend.
+
+A snapshot is every commodity's price for one market as arrays under a shared
+field list, stamped with the model/features version:
+
+    {"ok": true, "v": "1cf9f96053900dd0", "market": "Varanasi",
+     "fields": ["commodity", "current_price", "predicted_price"],
+     "rows": [["apple", 84.5, 86.1], ...]}
+
+It is built once per (market, version), stored in the shared cache already
+serialized and compressed (gzip, plus brotli when the `brotli` package is
+installed), and served as stored bytes. A client holding version X asks for
+`?since=X` and gets only the rows that changed:
+
+    {"ok": true, "v": "...", "since": "X", "market": "Varanasi", "fields": [...],
+     "upsert": [["onion", 25.5, 26.4]], "delete": ["garlic"]}
+
+If X is no longer in the cache the full snapshot is returned instead.
+"""
+import json
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+from .cache import get_cached, get_or_compute
+from .compression import available_encodings, compress, preferred_encoding
+
+FIELDS = ["commodity", "current_price", "predicted_price"]
+
+
+def _rows(items: list[dict]) -> list[list]:
+    return sorted([[item[f] for f in FIELDS] for item in items], key=lambda row: row[0])
+
+
+def _encode(payload: dict) -> dict:
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    encoded = {"identity": raw}
+    for encoding in available_encodings():
+        encoded[encoding] = compress(raw, encoding, best=True)
+    return encoded
+
+
+def _build_snapshot(market: str, version: str) -> dict | None:
+    from commodity_price import predict_all_prices
+
+    result = predict_all_prices(market)
+    if not result.get("ok"):
+        return None
+    rows = _rows(result["items"])
+    payload = {"ok": True, "v": version, "market": market, "fields": FIELDS, "rows": rows}
+    return {"rows": rows, "encoded": _encode(payload)}
+
+
+def snapshot(market: str, version: str) -> dict | None:
+    """The stored snapshot for (market, version): {"rows", "encoded"}; None if prediction failed."""
+    return get_or_compute("snapshot", (market.strip().lower(), version), lambda: _build_snapshot(market, version))
+
+
+def delta(market: str, since: str, version: str) -> dict | None:
+    """
+    Encoded changes from version `since` to `version`, or None when the
+    snapshot for `since` is gone (the caller then sends the full snapshot).
+    """
+    market_key = market.strip().lower()
+
+    def build():
+        old = get_cached("snapshot", (market_key, since))
+        new = snapshot(market, version)
+        if old is None or new is None:
+            return None
+        old_rows = {row[0]: row for row in old["rows"]}
+        new_names = {row[0] for row in new["rows"]}
+        payload = {
+            "ok": True,
+            "v": version,
+            "since": since,
+            "market": market,
+            "fields": FIELDS,
+            "upsert": [row for row in new["rows"] if old_rows.get(row[0]) != row],
+            "delete": sorted(name for name in old_rows if name not in new_names),
+        }
+        return {"encoded": _encode(payload)}
+
+    entry = get_or_compute("snapshot", ("delta", market_key, since, version), build)
+    return entry["encoded"] if entry else None
+
+
+def encoded_response(request, encoded: dict, etag: str, max_age: int) -> HttpResponse:
+    """Serve pre-encoded JSON in the best encoding the client accepts, with ETag revalidation."""
+    # Weak comparison: the tag names the content, whatever its encoding
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match and f'"{etag}"' in [tag.removeprefix("W/") for tag in parse_etags(if_none_match)]:
+        response = HttpResponseNotModified()
+    else:
+        encoding = preferred_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), encoded)
+        response = HttpResponse(encoded[encoding], content_type="application/json")
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+    response["ETag"] = f'W/"{etag}"'
+    patch_vary_headers(response, ("Accept-Encoding",))
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
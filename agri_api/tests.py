@@ -0,0 +1,1437 @@
+import base64
+import gzip
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from urllib.parse import parse_qs
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from agri_api import metrics, querylog, tts, views
+
+
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "agri-tests"}}
+
+
+def setUpModule():
+    # Test client requests pass through QueryLogMiddleware; keep their rows out of db.sqlite3
+    querylog.writer().sink = lambda rows: None
+
+
+class StubServer:
+    """
+    Minimal local HTTP server for upstream providers. `handler(path, headers, body)`
+    returns (status, payload dict) for GETs (empty body) and POSTs; every request
+    is recorded in `calls`.
+    """
+
+    def __init__(self, handler):
+        self.calls = []
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._answer(b"")
+
+            def do_POST(self):
+                self._answer(self.rfile.read(int(self.headers.get("content-length") or 0)))
+
+            def _answer(self, body):
+                stub.calls.append((self.path, dict(self.headers)))
+                status, payload = handler(self.path, self.headers, body)
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("content-type", "application/json")
+                    self.send_header("content-length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except BrokenPipeError:
+                    pass  # the client stopped waiting
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ALLOWED_HOSTS=["testserver"])
+class SarvamEndpointLearningTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        # The stub only answers on /v1/tts and only to the x-api-key header
+        self.live_path = "/v1/tts"
+        self.payloads = []
+
+        def handler(path, headers, body):
+            self.payloads.append(json.loads(body))
+            if path.split("?")[0] != self.live_path:
+                return 404, {"error": "not found"}
+            if headers.get("x-api-key") != "secret":
+                return 403, {"error": "forbidden"}
+            return 200, {"audios": ["UklGRgAAAAA="]}
+
+        self.stub = StubServer(handler)
+        self.addCleanup(self.stub.close)
+        tts._store = tts.AudioCache(tempfile.mkdtemp(), 10 * 1024 * 1024)
+        self.addCleanup(setattr, tts, "_store", None)
+        env = mock.patch.dict(os.environ, {"SARVAM_TTS_URL": self.stub.url + "/text-to-speech", "SARVAM_API_KEY": "secret"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _speak(self, text):
+        return self.client.post(
+            "/api/text-to-speech/",
+            data=json.dumps({"text": text, "language": "hi-IN"}),
+            content_type="application/json",
+        )
+
+    def test_probe_order_then_single_call(self):
+        resp = self._speak("pehla sawal")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.json()["success"])
+
+        # Configured URL and its key-param variants all 404 on the first header
+        # set; then /v1/tts is tried header set by header set until x-api-key works
+        paths = [p.split("?")[0] for p, _ in self.stub.calls]
+        self.assertEqual(paths, ["/text-to-speech"] * 6 + ["/v1/tts"] * 2)
+        self.assertIn("api-subscription-key", self.stub.calls[-2][1])
+        self.assertIn("x-api-key", self.stub.calls[-1][1])
+
+        self.stub.calls.clear()
+        resp = self._speak("doosra sawal")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(self.stub.calls), 1)
+        self.assertEqual(self.stub.calls[0][0], "/v1/tts")
+
+    def test_async_view_probes_and_shares_the_learned_endpoint(self):
+        resp = self.client.post(
+            "/api/async/text-to-speech/",
+            data=json.dumps({"text": "pehla sawal", "language": "hi-IN"}),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        paths = [p.split("?")[0] for p, _ in self.stub.calls]
+        self.assertEqual(paths, ["/text-to-speech"] * 6 + ["/v1/tts"] * 2)
+
+        self.stub.calls.clear()
+        self._speak("doosra sawal")
+        self.assertEqual([p for p, _ in self.stub.calls], ["/v1/tts"])
+
+    def test_voice_is_sent_and_keys_the_audio(self):
+        for voice in ("Anushka", "Arvind"):
+            resp = self.client.post(
+                "/api/text-to-speech/",
+                data=json.dumps({"text": "pehla sawal", "language": "hi-IN", "voice": voice}),
+                content_type="application/json",
+            )
+            self.assertEqual(resp.status_code, 200)
+            self.assertEqual(self.payloads[-1]["speaker"], voice.lower())
+
+    def test_reprobes_when_learned_endpoint_fails(self):
+        self._speak("pehla sawal")
+        self.live_path = "/tts"
+        self.stub.calls.clear()
+
+        resp = self._speak("doosra sawal")
+        self.assertEqual(resp.status_code, 200)
+        paths = [p.split("?")[0] for p, _ in self.stub.calls]
+        self.assertEqual(paths[0], "/v1/tts")
+        self.assertEqual(paths[-1], "/tts")
+
+        self.stub.calls.clear()
+        self._speak("teesra sawal")
+        self.assertEqual([p for p, _ in self.stub.calls], ["/tts"])
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class AudioCacheTests(SimpleTestCase):
+    AUDIO = b"RIFF" + bytes(range(12))
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.store = tts.AudioCache(self.root, 40)
+
+    def test_key_is_content_addressed(self):
+        key = tts.audio_key("नमस्ते  किसान ", "hi-IN", "Meera")
+        self.assertRegex(key, r"^[0-9a-f]{64}$")
+        self.assertEqual(key, tts.audio_key("नमस्ते किसान", "HI-IN ", "meera"))
+        self.assertNotEqual(key, tts.audio_key("नमस्ते किसान", "hi-IN", "arvind"))
+
+        self.store.put(key, self.AUDIO)
+        self.assertTrue(os.path.isfile(os.path.join(self.root, key[:2], key)))
+        self.assertEqual(self.store.get(key), self.AUDIO)
+        self.assertIsNone(self.store.get("../" + key[3:]))
+
+    def test_least_recently_read_file_is_evicted_at_the_size_bound(self):
+        a, b, c = (tts.audio_key(t, "hi-IN", "") for t in ("a", "b", "c"))
+        self.store.put(a, self.AUDIO)
+        self.store.put(b, self.AUDIO)
+        now = time.time()
+        os.utime(os.path.join(self.root, a[:2], a), (now - 20, now - 20))
+        os.utime(os.path.join(self.root, b[:2], b), (now - 10, now - 10))
+        self.store.get(a)  # a is now the most recently used
+
+        self.store.put(c, self.AUDIO)  # 48 bytes > 40: one file goes
+        self.assertIsNone(self.store.get(b))
+        self.assertEqual(self.store.get(a), self.AUDIO)
+        self.assertEqual(self.store.get(c), self.AUDIO)
+
+    def test_stored_audio_is_served_as_binary_with_ranges(self):
+        from django.urls import reverse
+
+        key = tts.audio_key("pyaz ka bhav", "hi-IN", "")
+        self.store.put(key, self.AUDIO)
+        tts._store = self.store
+        self.addCleanup(setattr, tts, "_store", None)
+        url = reverse("tts_audio", args=[key])
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "audio/wav")
+        self.assertEqual(resp.content, self.AUDIO)
+        self.assertEqual(resp["Accept-Ranges"], "bytes")
+        self.assertEqual(resp["ETag"], f'"{key}"')
+        self.assertIn("immutable", resp["Cache-Control"])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f'"{key}"').status_code, 304)
+        self.assertEqual(self.client.get(reverse("tts_audio", args=["0" * 64])).status_code, 404)
+
+        size = len(self.AUDIO)
+        for header, start, end in (
+            ("bytes=2-5", 2, 5),
+            ("bytes=-4", size - 4, size - 1),  # suffix
+            ("bytes=6-", 6, size - 1),  # open-ended
+            ("bytes=10-999", 10, size - 1),  # end past the file
+        ):
+            resp = self.client.get(url, HTTP_RANGE=header)
+            self.assertEqual(resp.status_code, 206, header)
+            self.assertEqual(resp.content, self.AUDIO[start:end + 1], header)
+            self.assertEqual(resp["Content-Range"], f"bytes {start}-{end}/{size}", header)
+
+        for header in (f"bytes={size}-", "bytes=5-2", "bytes=-0", "bytes=-", "items=0-1"):
+            resp = self.client.get(url, HTTP_RANGE=header)
+            self.assertEqual(resp.status_code, 416, header)
+            self.assertEqual(resp["Content-Range"], f"bytes */{size}", header)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ALLOWED_HOSTS=["testserver"], TTS_STREAM_CONCURRENCY=2)
+class StreamingTTSTests(SimpleTestCase):
+    DELAY = 0.3
+
+    def setUp(self):
+        cache.clear()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        lock = threading.Lock()
+
+        def handler(path, headers, body):
+            with lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            time.sleep(self.DELAY)
+            with lock:
+                self.in_flight -= 1
+            text = json.loads(body)["text"]
+            return 200, {"audios": [base64.b64encode(text.encode("utf-8")).decode("ascii")]}
+
+        self.stub = StubServer(handler)
+        self.addCleanup(self.stub.close)
+        tts._store = tts.AudioCache(tempfile.mkdtemp(), 10 * 1024 * 1024)
+        self.addCleanup(setattr, tts, "_store", None)
+        env = mock.patch.dict(os.environ, {"SARVAM_TTS_URL": self.stub.url + "/text-to-speech", "SARVAM_API_KEY": "k"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def test_split_sentences(self):
+        self.assertEqual(
+            tts.split_sentences("Onion price is likely to increase. Current price is 25 rupees per kg. Ok. Thanks!", min_chars=20),
+            ["Onion price is likely to increase.", "Current price is 25 rupees per kg.", "Ok. Thanks!"],
+        )
+        self.assertEqual(tts.split_sentences("प्याज का भाव बढ़ेगा। आज 25 रुपये है।", min_chars=5), ["प्याज का भाव बढ़ेगा।", "आज 25 रुपये है।"])
+
+    def test_streams_chunks_in_order_with_bounded_parallelism(self):
+        sentences = [f"Sentence number {i} of a fairly long chatbot answer." for i in range(6)]
+        started = time.monotonic()
+        resp = self.client.post(
+            "/api/text-to-speech/stream/",
+            data=json.dumps({"text": " ".join(sentences), "language": "en-IN"}),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        lines = iter(resp.streaming_content)
+        first = json.loads(next(lines))
+        time_to_first = time.monotonic() - started
+        rest = [json.loads(line) for line in lines]
+        total = time.monotonic() - started
+
+        events = [first] + rest[:-1]
+        self.assertEqual(rest[-1], {"done": True, "count": 6})
+        self.assertEqual([e["index"] for e in events], list(range(6)))
+        self.assertEqual([e["text"] for e in events], sentences)
+        self.assertEqual(tts.decode_audio(events[3]["audio_base64"]).decode("utf-8"), sentences[3])
+        # 6 chunks, 2 at a time: first audio after one round trip, the rest after three
+        self.assertLessEqual(self.max_in_flight, 2)
+        self.assertLess(time_to_first, 2 * self.DELAY)
+        self.assertGreaterEqual(total, 3 * self.DELAY)
+
+    def test_chunks_run_in_the_callers_context(self):
+        from agri_api.breaker import deadline, remaining
+
+        with deadline(5):
+            left = [audio for _, _, audio, _ in tts.synthesize_chunks(["a", "b", "c"], lambda chunk: remaining(), 2)]
+        self.assertTrue(all(x is not None and 0 < x <= 5 for x in left), left)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ProcessSpeechPipelineTests(SimpleTestCase):
+    DELAY = 0.3
+
+    def setUp(self):
+        cache.clear()
+
+        def handler(path, headers, body):
+            time.sleep(self.DELAY)
+            # Echo the text back, so a Hindi question yields no English intent
+            return 200, {"translatedText": parse_qs(body.decode("utf-8"))["q"][0]}
+
+        self.stub = StubServer(handler)
+        self.addCleanup(self.stub.close)
+        env = mock.patch.dict(os.environ, {"TRANSLATE_URL": self.stub.url + "/translate"})
+        env.start()
+        self.addCleanup(env.stop)
+
+        def slow_predict(commodity, market):
+            time.sleep(self.DELAY)
+            return {"ok": True, "commodity": commodity, "market": market, "current_price": 20.0,
+                    "predicted_price": 22.0, "change": 2.0, "trend": "increase"}
+
+        predict = mock.patch.object(views, "_cached_predict_price", side_effect=slow_predict)
+        self.predict = predict.start()
+        self.addCleanup(predict.stop)
+
+    def _ask(self, text, language):
+        request = RequestFactory().post(
+            "/api/process-speech/",
+            data=json.dumps({"spoken_text": text, "language": language}),
+            content_type="application/json",
+        )
+        return json.loads(views.process_speech_view(request).content)
+
+    def test_hindi_lookup_overlaps_inbound_translation(self):
+        data = self._ask("प्याज का भाव", "hi-IN")
+        self.assertTrue(data["success"])
+        self.predict.assert_called_once_with("onion", "Varanasi")
+
+        timings = data["timings"]
+        self.assertEqual(set(timings), {"translate_in", "intent_hi", "predict_hi", "intent_en", "translate_out", "total"})
+        # translate_in and the lookup run side by side: about two round trips, not three
+        self.assertLess(timings["total"], 1000 * 2.6 * self.DELAY)
+        self.assertGreaterEqual(timings["total"], 1000 * 2 * self.DELAY)
+
+    def test_english_skips_translation(self):
+        data = self._ask("onion price", "en-US")
+        self.predict.assert_called_once_with("onion", "Varanasi")
+        self.assertEqual(self.stub.calls, [])
+        self.assertNotIn("translate_in", data["timings"])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ALLOWED_HOSTS=["testserver"])
+class AsyncViewTests(SimpleTestCase):
+    """The /api/async/ views answer like their sync counterparts, against the same stubs."""
+
+    AUDIO = base64.b64encode(b"RIFF" + bytes(8)).decode("ascii")
+    FORECAST = {
+        "current": {"temp": 24.5, "humidity": 62},
+        "daily": [{"rain": 1.2, "temp": {"min": 12.0}}, {"rain": 0.5, "temp": {"min": 8.0}}],
+    }
+    TRANSLATIONS = {"प्याज का भाव": "onion price"}
+
+    def setUp(self):
+        import smart_farming
+        import openweather_client  # type: ignore  (on sys.path once smart_farming is imported)
+        from agri_api import async_views, breaker
+
+        cache.clear()
+        breaker._breakers.clear()
+        self.addCleanup(breaker._breakers.clear)
+
+        def handler(path, headers, body):
+            path = path.split("?")[0]
+            if path == "/onecall":
+                return 200, self.FORECAST
+            if path == "/translate":
+                form = parse_qs(body.decode("utf-8"))
+                text, target = form["q"][0], form["target"][0]
+                return 200, {"translatedText": self.TRANSLATIONS.get(text) if target == "en" else f"{text} [{target}]"}
+            return 200, {"audio_base64": self.AUDIO}
+
+        self.stub = StubServer(handler)
+        self.addCleanup(self.stub.close)
+        tts._store = tts.AudioCache(tempfile.mkdtemp(), 10 * 1024 * 1024)
+        self.addCleanup(setattr, tts, "_store", None)
+
+        def predict(commodity, market):
+            return {"ok": True, "commodity": commodity, "market": market, "current_price": 20.0,
+                    "predicted_price": 22.0, "change": 2.0, "trend": "increase"}
+
+        weather_url = self.stub.url + "/onecall"
+        patches = [
+            mock.patch.dict(os.environ, {
+                "TRANSLATE_URL": self.stub.url + "/translate",
+                "SARVAM_TTS_URL": self.stub.url + "/tts",
+                "SARVAM_API_KEY": "secret",
+            }),
+            mock.patch.object(smart_farming, "OPENWEATHER_BASE_URL", weather_url),
+            mock.patch.object(openweather_client, "OPENWEATHER_BASE_URL", weather_url),
+            # async_views imports the helper by name
+            mock.patch.object(views, "_cached_predict_price", side_effect=predict),
+            mock.patch.object(async_views, "_cached_predict_price", side_effect=predict),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _post(self, path, body):
+        data = body if isinstance(body, str) else json.dumps(body)
+        return self.client.post(path, data=data, content_type="application/json")
+
+    def _upstream(self, path):
+        return [p for p, _ in self.stub.calls if p.split("?")[0] == path]
+
+    def test_advisory(self):
+        params = {"city": "Varanasi", "ph": "6.5"}
+        sync = self.client.get("/api/advisory/", params)
+        cache.clear()
+        resp = self.client.get("/api/async/advisory/", params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), sync.json())
+        self.assertTrue(resp.json()["ok"])
+        self.assertEqual(resp.json()["weather"]["rainfall_mm"], 1.2)
+        self.assertEqual(len(self._upstream("/onecall")), 2)
+
+        for params, error in (({"city": "Varanasi"}, "ph is required"), ({"ph": "acid"}, "Invalid ph")):
+            resp = self.client.get("/api/async/advisory/", params)
+            self.assertEqual((resp.status_code, resp.json()["error"]), (400, error))
+
+    def test_process_speech(self):
+        for text, language in (("प्याज का भाव", "hi-IN"), ("onion price in Agra", "en-US"), ("नमस्ते", "hi-IN")):
+            cache.clear()
+            body = {"spoken_text": text, "language": language}
+            sync = self._post("/api/process-speech/", body).json()
+            resp = self._post("/api/async/process-speech/", body)
+            self.assertEqual(resp.status_code, 200, text)
+            data = resp.json()
+            self.assertEqual(set(data["timings"]), set(sync.pop("timings")), text)
+            del data["timings"]
+            self.assertEqual(data, sync, text)
+            if text == "प्याज का भाव":
+                self.assertTrue(data["chatbot_response"].endswith("[hi]"))
+        self.assertTrue(self._upstream("/translate"))
+
+        for body, error in (("{not json", "Invalid JSON body"), ({"language": "hi-IN"}, "spoken_text is required")):
+            for path in ("/api/process-speech/", "/api/async/process-speech/"):
+                resp = self._post(path, body)
+                self.assertEqual((resp.status_code, resp.json()), (400, {"success": False, "error": error}), path)
+
+    def test_text_to_speech(self):
+        from django.urls import reverse
+
+        sync = self._post("/api/text-to-speech/", {"text": "pehla sawal", "language": "hi-IN"}).json()
+        resp = self._post("/api/async/text-to-speech/", {"text": "doosra sawal", "language": "hi-IN"})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(set(data), set(sync))
+        self.assertEqual(data["audio_base64"], self.AUDIO)
+        self.assertEqual(data["audio_url"], reverse("tts_audio", args=[tts.audio_key("doosra sawal", "hi-IN", "Anushka")]))
+        # The endpoint and header set the sync view learned, and the key override
+        self.assertEqual(self.stub.calls[-1][0], "/tts")
+        self.assertEqual(self.stub.calls[-1][1]["api-subscription-key"], "secret")
+        resp = self.client.post(
+            "/api/async/text-to-speech/", data=json.dumps({"text": "teesra sawal", "language": "hi-IN"}),
+            content_type="application/json", HTTP_X_SARVAM_KEY="dev-key",
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.stub.calls[-1][1]["api-subscription-key"], "dev-key")
+
+        # Audio the sync view synthesized is served from disk, as binary when asked
+        calls = len(self.stub.calls)
+        resp = self._post("/api/async/text-to-speech/", {"text": "pehla sawal", "language": "hi-IN", "format": "binary"})
+        self.assertEqual((resp.status_code, resp["Content-Type"]), (200, "audio/wav"))
+        self.assertEqual(resp.content, base64.b64decode(self.AUDIO))
+        self.assertEqual(len(self.stub.calls), calls)
+
+        for body, error in (("{not json", "Invalid JSON body"), ({"language": "hi-IN"}, "text is required")):
+            for path in ("/api/text-to-speech/", "/api/async/text-to-speech/"):
+                resp = self._post(path, body)
+                self.assertEqual((resp.status_code, resp.json()), (400, {"success": False, "error": error}), path)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, ALLOWED_HOSTS=["testserver"], SERVER_TIMING=True)
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        for histogram in metrics.REGISTRY:
+            histogram.clear()
+        self.stub = StubServer(lambda path, headers, body: (200, {"translatedText": "hello"}))
+        self.addCleanup(self.stub.close)
+        env = mock.patch.dict(os.environ, {"TRANSLATE_URL": self.stub.url + "/translate"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _speak(self):
+        return self.client.post(
+            "/api/process-speech/",
+            data=json.dumps({"spoken_text": "namaste", "language": "hi-IN"}),
+            content_type="application/json",
+        )
+
+    def test_histogram_render(self):
+        histogram = metrics.Histogram("t_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, ("a",))
+        histogram.observe(0.5, ("a",))
+        histogram.observe(5.0, ("a",))
+        self.assertEqual(histogram.render()[2:], [
+            't_seconds_bucket{stage="a",le="0.1"} 1',
+            't_seconds_bucket{stage="a",le="1.0"} 2',
+            't_seconds_bucket{stage="a",le="+Inf"} 3',
+            't_seconds_sum{stage="a"} 5.550000',
+            't_seconds_count{stage="a"} 3',
+        ])
+
+    def test_spans_reach_server_timing_and_metrics(self):
+        resp = self._speak()
+        self.assertEqual(resp.status_code, 200)
+        timing = resp["Server-Timing"]
+        host = self.stub.url.split("//")[1]
+        self.assertIn("translate_in;dur=", timing)
+        self.assertIn(f'upstream;desc="{host}";dur=', timing)
+        self.assertIn("total;dur=", timing)
+
+        body = self.client.get("/metrics").content.decode("utf-8")
+        self.assertIn('agri_stage_duration_seconds_count{stage="translate_in"} 1', body)
+        # "namaste" -> "hello" has no price intent, so there is no outbound translation
+        self.assertIn(f'agri_upstream_duration_seconds_count{{host="{host}",outcome="ok"}} 1', body)
+        self.assertIn('agri_http_request_duration_seconds_count{route="api/process-speech/",method="POST",status="200"} 1', body)
+
+    def test_missing_forecast_is_an_upstream_error(self):
+        from urllib.parse import urlsplit
+
+        import smart_farming
+        from agri_api import breaker
+
+        self.addCleanup(breaker._breakers.clear)
+        with mock.patch.object(smart_farming, "fetch_weather_forecast_for", return_value=None):
+            self.assertIsNone(smart_farming._fetch_weather_forecast(25.3, 83.0))
+        host = urlsplit(smart_farming.OPENWEATHER_BASE_URL).netloc
+        body = metrics.render()
+        self.assertIn(f'agri_upstream_duration_seconds_count{{host="{host}",outcome="error"}} 1', body)
+        self.assertNotIn('outcome="ok"', body)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_is_a_no_op(self):
+        self.assertIs(metrics.span("x"), metrics.span("y"))
+        with metrics.upstream("http://example.com") as call:
+            call.fail()
+        resp = self._speak()
+        self.assertNotIn("Server-Timing", resp)
+        self.assertEqual(metrics.render().count("_count{"), 0)
+
+
+class TrafficRecorderTests(SimpleTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "traffic.jsonl")
+        recorder = override_settings(ALLOWED_HOSTS=["testserver"], TRAFFIC_LOG_PATH=self.path)
+        recorder.enable()
+        self.addCleanup(recorder.disable)
+
+    def test_records_api_requests_without_secrets(self):
+        self.client.post(
+            "/api/text-to-speech/",
+            data=json.dumps({"text": "", "language": "hi-IN", "api_key": "secret"}),
+            content_type="application/json",
+        )
+        self.client.get("/api/price/?market=Varanasi&api_key=secret&Key=secret&q=")
+        self.client.get("/metrics")
+
+        with open(self.path, encoding="utf-8") as fh:
+            log = fh.read()
+        self.assertNotIn("secret", log)
+        entries = [json.loads(line) for line in log.splitlines()]
+        self.assertEqual([(e["method"], e["path"], e["status"]) for e in entries], [
+            ("POST", "/api/text-to-speech/", 400),
+            ("GET", "/api/price/", 400),
+        ])
+        self.assertEqual(entries[0]["body"], {"text": "", "language": "hi-IN"})
+        self.assertEqual(entries[0]["content_type"], "application/json")
+        self.assertEqual((entries[1]["query"], entries[1]["body"], entries[1]["content_type"]), ("market=Varanasi&q=", None, None))
+
+
+class ForecastingTests(SimpleTestCase):
+    class LagModel:
+        # Predicts lag_1 + 10 and records the size of every predict call
+        def __init__(self):
+            self.calls = []
+
+        def predict(self, X):
+            self.calls.append(len(X))
+            return X["lag_1"].to_numpy() + 10
+
+    def setUp(self):
+        import commodity_price
+        import numpy as np
+        import pandas as pd
+
+        commodity_price.add_commodity_path()
+        # Two series: one reporting daily, one every three days
+        self.history = pd.DataFrame({
+            "Commodity": ["Onion"] * 9 + ["Potato"] * 3,
+            "Market": ["Varanasi"] * 12,
+            "Arrival_Date": list(pd.date_range("2025-01-01", periods=9, freq="D"))
+            + list(pd.date_range("2025-01-01", periods=3, freq="3D")),
+            "Modal_Price": list(np.arange(1.0, 10.0)) + [50.0, 60.0, 70.0],
+        })
+
+    def test_predictions_feed_back_with_one_batch_per_step(self):
+        from src.forecasting import WINDOW, recursive_forecast, series_state
+
+        series, prices, last_dates, step_days = series_state(self.history)
+        self.assertEqual(list(series["Commodity"]), ["Onion", "Potato"])
+        self.assertEqual(prices.shape, (2, WINDOW + 1))
+        self.assertEqual(list(step_days), [1.0, 3.0])
+
+        model = self.LagModel()
+        preds, dates = recursive_forecast(model, prices, last_dates, step_days, 3)
+        # lag_1 is the price before the latest one, then the latest, then step 1's prediction
+        self.assertEqual(preds[0].tolist(), [18.0, 19.0, 28.0])
+        self.assertEqual(preds[1].tolist(), [70.0, 80.0, 80.0])
+        self.assertEqual(str(dates[1, 0])[:10], "2025-01-10")
+        self.assertEqual(model.calls, [2, 2, 2])
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_weeks_outside_the_bounds_are_rejected(self):
+        import commodity_price
+
+        cache.clear()
+        self.assertEqual(commodity_price._weeks_or_error(None), ([1, 2, 3, 4], None))
+        for weeks in ([], range(1, 1), [0, 1], [commodity_price.MAX_FORECAST_WEEKS + 1]):
+            self.assertIsNotNone(commodity_price._weeks_or_error(weeks)[1], weeks)
+
+        error = f"weeks must be between 1 and {commodity_price.MAX_FORECAST_WEEKS}"
+        with mock.patch.object(commodity_price, "forecast_price", return_value={"ok": True}) as forecast:
+            for weeks in ("0", "-2", "9", "many"):
+                response = views.price_forecast_view(RequestFactory().get("/api/price/forecast/", {"commodity": "onion", "weeks": weeks}))
+                self.assertEqual((response.status_code, json.loads(response.content)["error"]), (400, error), weeks)
+            forecast.assert_not_called()
+            for weeks in ("1", "8"):
+                response = views.price_forecast_view(RequestFactory().get("/api/price/forecast/", {"commodity": "onion", "weeks": weeks}))
+                self.assertEqual(response.status_code, 200, weeks)
+                self.assertEqual(list(forecast.call_args.kwargs["weeks"]), list(range(1, int(weeks) + 1)))
+
+    def test_horizons_follow_each_series_cadence(self):
+        from src.forecasting import forecast_horizons, series_state
+
+        _, prices, last_dates, step_days = series_state(self.history)
+        model = self.LagModel()
+        _, dates, steps = forecast_horizons(model, prices, last_dates, step_days, [7, 14])
+        self.assertEqual(steps.tolist(), [[7, 14], [2, 5]])
+        self.assertEqual(len(model.calls), 14)
+        self.assertEqual(str(dates[0, 1])[:10], "2025-01-23")
+
+
+class ModelSearchTests(SimpleTestCase):
+    def setUp(self):
+        import commodity_price
+
+        commodity_price.add_commodity_path()
+
+    def test_candidates_are_distinct_defaults_first_and_capped(self):
+        from src.model_search import DEFAULT_PARAMS, SEARCH_SPACE, sample_candidates
+
+        candidates = sample_candidates(30, seed=1)
+        self.assertEqual(len(candidates), 30)
+        self.assertEqual(candidates[0], DEFAULT_PARAMS)
+        self.assertEqual(len({tuple(c.values()) for c in candidates}), 30)
+        for params in candidates[1:]:
+            for name, value in params.items():
+                self.assertIn(value, SEARCH_SPACE[name])
+        self.assertEqual(sample_candidates(30, seed=1), candidates)
+
+        space = {"max_depth": [3, 4], "learning_rate": [0.1, 0.2]}
+        with mock.patch.dict("src.model_search.SEARCH_SPACE", space, clear=True), \
+                mock.patch.dict("src.model_search.DEFAULT_PARAMS", {"max_depth": 6, "learning_rate": 0.3}, clear=True):
+            # Asking for more than the space holds stops at its size instead of looping forever
+            capped = sample_candidates(50)
+            self.assertEqual(len(capped), 4)
+            self.assertEqual(len({tuple(c.values()) for c in capped}), 4)
+
+    def test_folds_are_consecutive_windows_ending_at_the_cutoff(self):
+        import pandas as pd
+        from src.model_search import rolling_origin_folds
+
+        folds = rolling_origin_folds("2024-12-31", 3, 30)
+        self.assertEqual(
+            [(str(o.date()), str(e.date())) for o, e in folds],
+            [("2024-10-02", "2024-11-01"), ("2024-11-01", "2024-12-01"), ("2024-12-01", "2024-12-31")],
+        )
+        self.assertEqual(folds[-1][1], pd.Timestamp("2024-12-31"))
+
+    def test_summary_drops_candidates_with_missing_folds(self):
+        from src.model_search import summarize_candidates
+
+        def result(candidate, fold, mae):
+            return {"candidate": candidate, "fold": fold, "mae": mae, "rmse": mae * 2, "best_iteration": 10 + fold}
+
+        candidates = [{"max_depth": 6}, {"max_depth": 3}, {"max_depth": 4}]
+        results = [
+            result(1, 1, 4.0), result(0, 0, 5.0), result(1, 0, 2.0),
+            result(0, 1, 7.0), result(2, 0, 1.0),  # candidate 2 timed out before its second fold
+        ]
+        ranked = summarize_candidates(results, candidates, n_folds=2)
+        self.assertEqual([r["candidate"] for r in ranked], [1, 0])
+        self.assertEqual(ranked[0]["params"], {"max_depth": 3})
+        self.assertEqual(ranked[0]["mae"], 3.0)
+        self.assertEqual(ranked[0]["best_iterations"], [10, 11])
+        self.assertEqual(summarize_candidates(results[:1], candidates, n_folds=2), [])
+
+    def test_workers_below_one_are_rejected(self):
+        from src.model_search import main
+
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            main(["--workers", "0"])
+
+
+class PriceModelTests(SimpleTestCase):
+    def test_booster_export_matches_pickle_and_is_loaded_once(self):
+        import warnings
+
+        import commodity_price
+        import joblib
+        import pandas as pd
+
+        commodity_price.add_commodity_path()
+        from src import config
+
+        X = pd.read_csv(config.PROCESSED_DATA_PATH, nrows=200)[config.FEATURE_COLS]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            pickled = joblib.load(config.MODEL_PATH)
+        booster = commodity_price.BoosterModel(config.BOOSTER_PATH)
+        # Column order is resolved by name
+        self.assertEqual(pickled.predict(X).tolist(), booster.predict(X[X.columns[::-1]]).tolist())
+
+        model = commodity_price.load_model()
+        self.assertIsInstance(model, commodity_price.BoosterModel)
+        self.assertIs(commodity_price.load_model(), model)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, PRICE_BATCH_WINDOW_MS=0)
+class PriceSelectionTests(SimpleTestCase):
+    def setUp(self):
+        import pandas as pd
+
+        cache.clear()
+        rows = []
+        for commodity, price in (("Onion", 25.0), ("Garlic", 90.0), ("Apple", 84.0)):
+            for day, delta in ((1, -1.0), (2, 0.0)):
+                rows.append({
+                    "Commodity": commodity, "Market": "Varanasi", "Arrival_Date": pd.Timestamp(2025, 1, day),
+                    "lag_1": price + delta, "lag_7": price, "rmean_7": price, "rstd_7": 0.0, "weekday": day, "month": 1,
+                })
+        rows.append({**rows[0], "Market": "Agra"})
+        self.frame = pd.DataFrame(rows)
+        self.scored = []
+
+        class Model:
+            def predict(model, X):
+                self.scored.append(len(X))
+                return X["lag_1"].to_numpy() * 1.1
+
+        self.model = Model()
+        load = mock.patch("commodity_price._load_test_frame", side_effect=lambda: (self.model, self.frame, None))
+        load.start()
+        self.addCleanup(load.stop)
+
+    def test_select_runs_before_inference(self):
+        import commodity_price
+
+        offered = []
+
+        def select(names):
+            offered.append(names)
+            self.assertEqual(self.scored, [])
+            return ["onion"]
+
+        result = commodity_price.predict_all_prices("Varanasi", select=select)
+        self.assertEqual(offered, [["apple", "garlic", "onion"]])
+        self.assertEqual(self.scored, [1])
+        self.assertEqual([item["commodity"] for item in result["items"]], ["onion"])
+        self.assertEqual(result["items"][0]["current_price"], 25.0)  # the latest row
+        self.assertEqual(result["available"], ["apple", "garlic", "onion"])
+
+        # Without select every commodity is scored in one call and nothing is offered
+        self.scored.clear()
+        result = commodity_price.predict_all_prices("Varanasi")
+        self.assertEqual((self.scored, result["count"]), ([3], 3))
+        self.assertNotIn("available", result)
+
+    def test_empty_selection_skips_inference(self):
+        import commodity_price
+
+        result = commodity_price.predict_all_prices("varanasi", select=lambda names: [])
+        self.assertEqual(result, {"ok": True, "count": 0, "items": [], "available": ["apple", "garlic", "onion"]})
+        self.assertEqual(self.scored, [])
+
+    def test_query_scores_only_the_matching_commodity(self):
+        response = views.price_all_view(RequestFactory().get("/api/price/all/", {"market": "Varanasi", "q": "Onion"}))
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        self.assertEqual((data["count"], data["resolved_query"]), (1, "Onion"))
+        self.assertEqual(data["items"][0]["commodity"], "onion")
+        self.assertEqual(self.scored, [1])
+
+        response = views.price_all_view(RequestFactory().get("/api/price/all/", {"market": "Varanasi", "q": "mango"}))
+        self.assertEqual(response.status_code, 400)
+        data = json.loads(response.content)
+        self.assertEqual(data["error"], "Commodity not found: mango")
+        self.assertEqual(data["available"], ["apple", "garlic", "onion"])
+        self.assertEqual(self.scored, [1])
+
+
+class PriceBulletinTests(SimpleTestCase):
+    COLUMNS = [
+        "commodity", "market", "state", "district", "as_of", "horizon", "current_price", "predicted_price",
+        "change", "trend", "current_price_quintal", "predicted_price_quintal", "model_version",
+    ]
+
+    def setUp(self):
+        import commodity_price
+        import pandas as pd
+
+        commodity_price.add_commodity_path()
+        from src import config
+
+        rows = []
+        for commodity, market, dates in (
+            ("Onion", "Varanasi", ["2024-06-20", "2024-07-02", "2024-07-09", "2024-07-05"]),
+            ("Onion", "Agra", ["2024-07-01", "2024-07-08"]),
+            ("Garlic", "Varanasi", ["2024-07-03"]),
+            ("Potato", None, ["2024-07-02", "2024-07-04"]),  # no market in the source data
+            ("Apple", "Agra", ["2024-06-01"]),  # nothing since the cutoff
+        ):
+            for n, day in enumerate(dates):
+                rows.append({
+                    "State": "Uttar Pradesh", "District": market, "Market": market, "Commodity": commodity,
+                    "Arrival_Date": day, "lag_1": 10.0 + n, "lag_7": 10.0, "rmean_7": 10.0, "rstd_7": 0.0,
+                    "weekday": 1, "month": 7,
+                })
+        self.path = os.path.join(tempfile.mkdtemp(), "features.csv")
+        pd.DataFrame(rows).to_csv(self.path, index=False)
+        self.scored = []
+
+        class Model:
+            def predict(model, X):
+                self.scored.append(len(X))
+                return X["lag_1"].to_numpy() + 1.0
+
+        patches = [
+            mock.patch.object(config, "PROCESSED_DATA_PATH", self.path),
+            mock.patch.object(commodity_price, "load_model", return_value=Model()),
+            mock.patch.object(commodity_price, "artifact_version", return_value="v1"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_one_row_per_series_from_its_latest_observation(self):
+        import commodity_price
+
+        # Two rows per chunk: series are carried across chunk boundaries
+        bulletin, error = commodity_price.score_all_series(chunksize=2)
+        self.assertIsNone(error)
+        self.assertEqual(self.scored, [4])
+        self.assertEqual(list(bulletin.columns), self.COLUMNS)
+        self.assertEqual(
+            [tuple(r) for r in bulletin[["commodity", "market", "as_of", "current_price", "predicted_price"]].itertuples(index=False)],
+            [
+                ("garlic", "Varanasi", "2024-07-03", 10.0, 11.0),
+                ("onion", "Agra", "2024-07-08", 11.0, 12.0),
+                ("onion", "Varanasi", "2024-07-09", 12.0, 13.0),
+                ("potato", "", "2024-07-04", 11.0, 12.0),
+            ],
+        )
+        self.assertEqual(set(bulletin["model_version"]), {"v1"})
+
+        output = commodity_price.write_bulletin(bulletin, os.path.join(tempfile.mkdtemp(), "out", "bulletin.csv"))
+        with open(output, encoding="utf-8") as fh:
+            self.assertEqual(fh.readline().strip().split(","), self.COLUMNS)
+
+    def test_no_recent_series_is_an_error(self):
+        import commodity_price
+        import pandas as pd
+
+        pd.read_csv(self.path).query("Arrival_Date < '2024-07-01'").to_csv(self.path, index=False)
+        bulletin, error = commodity_price.score_all_series()
+        self.assertIsNone(bulletin)
+        self.assertEqual(error, {"ok": False, "error": "No recent data available for predictions."})
+        self.assertEqual(self.scored, [])
+
+    def test_cli_writes_the_bulletin(self):
+        import price_bulletin
+
+        output = os.path.join(tempfile.mkdtemp(), "bulletin.csv")
+        with mock.patch("sys.stdout"):
+            self.assertEqual(price_bulletin.main(["--output", output, "--chunksize", "3"]), 0)
+        with open(output, encoding="utf-8") as fh:
+            self.assertEqual(len(fh.readlines()), 1 + 4)
+
+        os.remove(self.path)
+        with mock.patch("sys.stderr"):
+            self.assertEqual(price_bulletin.main(["--output", output]), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, API_CACHE_MAX_AGE=60)
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        from django.http import JsonResponse
+
+        from agri_api.cache import cache_response
+
+        cache.clear()
+        self.factory = RequestFactory()
+        self.calls = 0
+
+        def price(request):
+            self.calls += 1
+            commodity = request.GET.get("commodity")
+            if commodity == "mango":
+                return JsonResponse({"ok": False, "error": "Commodity not found: mango"}, status=400)
+            return JsonResponse({"ok": True, "commodity": commodity})
+
+        # The real views' version function, so the artifact version feeds the key
+        self.view = cache_response(views._price_artifact_version)(price)
+        version = mock.patch("commodity_price.artifact_version", side_effect=lambda: self.version)
+        version.start()
+        self.addCleanup(version.stop)
+        self.version = "v1"
+
+    def _get(self, query="commodity=onion&market=Varanasi", **headers):
+        return self.view(self.factory.get(f"/api/price/?{query}", **headers))
+
+    def test_miss_then_hit_with_etag_and_cache_control(self):
+        first = self._get()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertRegex(first["ETag"], r'^"[0-9a-f]{40}"$')
+        self.assertEqual(set(first["Cache-Control"].split(", ")), {"public", "max-age=60"})
+
+        second = self._get()
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(json.loads(second.content), json.loads(first.content))
+        self.assertEqual(self.calls, 1)
+
+    def test_reordered_and_empty_params_share_the_entry(self):
+        first = self._get("commodity=onion&market=Varanasi")
+        second = self._get("market=Varanasi&state=&commodity=onion")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(self.calls, 1)
+
+    def test_matching_if_none_match_is_a_304_without_the_view(self):
+        etag = self._get()["ETag"]
+        for header in (etag, "W/" + etag, f'"other", {etag}', "*"):
+            response = self._get(HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, 304, header)
+            self.assertEqual(response["ETag"], etag)
+            self.assertIn("max-age=60", response["Cache-Control"])
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+        self.assertEqual(self.calls, 1)
+
+    def test_star_matches_only_a_cached_response(self):
+        # Nothing cached yet: the view answers
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH="*").status_code, 200)
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH="*").status_code, 304)
+        self.assertEqual(self.calls, 1)
+
+        # A failing query is never cached, so it is never "not modified"
+        for _ in range(2):
+            self.assertEqual(self._get("commodity=mango", HTTP_IF_NONE_MATCH="*").status_code, 400)
+        self.assertEqual(self.calls, 3)
+
+    def test_new_artifact_version_changes_the_etag(self):
+        old = self._get()["ETag"]
+        self.version = "v2"
+        response = self._get(HTTP_IF_NONE_MATCH=old)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertNotEqual(response["ETag"], old)
+        self.assertEqual(self.calls, 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PriceSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.prices = {"onion": (25.5, 26.4), "garlic": (90.0, 88.0), "apple": (84.0, 83.6)}
+        self.version = "v1"
+        patches = [
+            mock.patch.object(views, "_price_artifact_version", lambda: self.version),
+            mock.patch("commodity_price.predict_all_prices", side_effect=self._predict_all),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def _predict_all(self, market):
+        items = [{"commodity": c, "current_price": cur, "predicted_price": pred} for c, (cur, pred) in self.prices.items()]
+        return {"ok": True, "count": len(items), "items": items}
+
+    def _get(self, **params):
+        response = views.price_snapshot_view(self.factory.get("/api/price/snapshot/", params))
+        return response, json.loads(response.content)
+
+    def test_full_snapshot_then_delta_after_model_refresh(self):
+        response, data = self._get()
+        self.assertEqual(data["v"], "v1")
+        self.assertEqual(data["fields"], ["commodity", "current_price", "predicted_price"])
+        self.assertEqual([row[0] for row in data["rows"]], ["apple", "garlic", "onion"])
+
+        self.version = "v2"
+        self.prices["onion"] = (25.5, 27.0)
+        del self.prices["garlic"]
+        response, data = self._get(since="v1")
+        self.assertEqual((data["since"], data["v"]), ("v1", "v2"))
+        self.assertEqual(data["upsert"], [["onion", 25.5, 27.0]])
+        self.assertEqual(data["delete"], ["garlic"])
+
+        # Unknown versions get the full list
+        response, data = self._get(since="v0")
+        self.assertEqual([row[0] for row in data["rows"]], ["apple", "onion"])
+
+    def test_gzip_and_revalidation(self):
+        request = self.factory.get("/api/price/snapshot/", HTTP_ACCEPT_ENCODING="gzip, br;q=0")
+        response = views.price_snapshot_view(request)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(json.loads(gzip.decompress(response.content))["v"], "v1")
+
+        request = self.factory.get("/api/price/snapshot/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(views.price_snapshot_view(request).status_code, 304)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def _run(self, response, accept="gzip"):
+        from agri_api.compression import CompressionMiddleware
+
+        request = RequestFactory().get("/api/text-to-speech/", HTTP_ACCEPT_ENCODING=accept)
+        with override_settings(API_COMPRESS_MIN_BYTES=1024):
+            return CompressionMiddleware(lambda r: response)(request)
+
+    def test_large_json_is_compressed_small_and_streaming_are_not(self):
+        from django.http import JsonResponse, StreamingHttpResponse
+
+        payload = {"ok": True, "audio_base64": base64.b64encode(bytes(range(256)) * 40).decode()}
+        response = self._run(JsonResponse(payload))
+        self.assertIn(response["Content-Encoding"], ("gzip", "br"))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        if response["Content-Encoding"] == "gzip":
+            self.assertEqual(json.loads(gzip.decompress(response.content)), payload)
+
+        self.assertFalse(self._run(JsonResponse(payload), accept="identity").has_header("Content-Encoding"))
+        self.assertFalse(self._run(JsonResponse({"ok": True})).has_header("Content-Encoding"))
+        # The TTS stream is NDJSON
+        stream = StreamingHttpResponse(iter([b'{"index": 0}\n']), content_type="application/x-ndjson")
+        self.assertFalse(self._run(stream).has_header("Content-Encoding"))
+
+
+class QueryLogTests(SimpleTestCase):
+    def test_rows_are_queued_then_written_in_batches(self):
+        from django.http import JsonResponse
+        from agri_api.querylog import QueryLogMiddleware, QueryLogWriter, annotate
+
+        batches = []
+        writer = QueryLogWriter(sink=batches.append, flush_seconds=3600, batch_size=2)
+
+        def view(request):
+            annotate(request, intent="price", commodity="onion")
+            return JsonResponse({"ok": True})
+
+        with mock.patch("agri_api.querylog.writer", return_value=writer):
+            middleware = QueryLogMiddleware(view)
+        factory = RequestFactory()
+        for _ in range(3):
+            middleware(factory.get("/api/price/", {"market": "Varanasi", "language": "hi-IN"}))
+        middleware(factory.get("/static/styles.css"))
+
+        self.assertEqual(batches, [])  # nothing written on the request path
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual([len(b) for b in batches], [2, 1])
+        row = dict(zip(("created_at", "route", "intent", "commodity", "market", "city", "language", "status"),
+                       batches[0][0]))
+        self.assertEqual(
+            (row["intent"], row["commodity"], row["market"], row["language"], row["status"]),
+            ("price", "onion", "Varanasi", "hi-IN", 200),
+        )
+
+    def test_sink_errors_drop_the_batch(self):
+        from agri_api.querylog import QueryLogWriter
+
+        def failing(rows):
+            raise RuntimeError("database is locked")
+
+        writer = QueryLogWriter(sink=failing, flush_seconds=3600, max_pending=2)
+        for i in range(3):
+            writer.record((i,))
+        self.assertEqual(list(writer.pending), [(1,), (2,)])  # oldest dropped when full
+        self.assertEqual(writer.flush(), 0)
+        self.assertFalse(writer.pending)
+
+
+class PrewarmTests(SimpleTestCase):
+    def test_most_requested_first_within_budget(self):
+        from agri_api import prewarm
+
+        stats = {
+            "pairs": [(("onion", "Varanasi"), 9), (("tomato", "Lucknow"), 4), (("potato", "Varanasi"), 1)],
+            "cities": [("Agra", 5), ("Atlantis", 3)],
+            "languages": [("hi-IN", 10)],
+        }
+        predicted, advised = [], []
+
+        def predict(commodity, market):
+            predicted.append(commodity)
+            return {"ok": True, "commodity": commodity}
+
+        def advisory(city, ph):
+            advised.append(city)
+            time.sleep(0.2)
+            return {"ok": True}
+
+        with mock.patch.object(prewarm, "query_stats", return_value=stats), \
+                mock.patch("agri_api.views._cached_predict_price", side_effect=predict), \
+                mock.patch("agri_api.snapshot.snapshot", return_value={"rows": []}), \
+                mock.patch("smart_farming.get_advisory", side_effect=advisory), \
+                mock.patch("commodity_price.artifact_version", return_value="v1"), \
+                mock.patch.dict(os.environ, {"SARVAM_API_KEY": ""}):
+            report = prewarm.prewarm(top=2, cities=5, budget=0.3, workers=1)
+
+        self.assertEqual(predicted, ["onion", "tomato"])
+        self.assertEqual(report["snapshot"]["done"], 2)
+        # Logged cities first, unknown ones dropped, then CITIES_UP; the budget ends the step early
+        self.assertEqual(advised[0], "Agra")
+        self.assertGreater(report["advisory"]["skipped"], 0)
+        self.assertEqual(report["advisory"]["done"] + report["advisory"]["skipped"], 5)
+
+
+class WarmupTests(SimpleTestCase):
+    def test_startup_leaves_heavy_imports_to_the_warm_up(self):
+        from agri_api.warmup import warm_up
+
+        code = (
+            "import sys, django; django.setup(); import base.urls; "
+            "print(sorted(m for m in ('pandas', 'xgboost', 'sklearn') if m in sys.modules))"
+        )
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "base.settings", "WARMUP": "none"}
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, env=env, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "[]")
+        self.assertEqual(warm_up("none"), {})
+        with self.assertRaises(ValueError):
+            warm_up("everything")
+
+    def test_price_module_imports_nothing_heavy_and_leaves_sys_path(self):
+        code = (
+            "import sys; path = list(sys.path); import commodity_price; "
+            "print(sys.path == path, sorted(m for m in ('numpy', 'pandas', 'agri_api', 'src') if m in sys.modules))"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "True []")
+
+
+class ModelServerTests(SimpleTestCase):
+    def test_concurrent_requests_are_batched_and_fall_back_when_down(self):
+        import numpy as np
+        from concurrent.futures import ThreadPoolExecutor
+        from agri_api.model_server import ModelServer, ModelServerClient
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "models.sock")
+            server = ModelServer(
+                path, window=0.02,
+                price_predict=lambda rows: rows.sum(axis=1),
+                crop_predict=lambda rows: np.array(["rice"] * len(rows), dtype=object),
+            )
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            try:
+                client = ModelServerClient(path)
+                rows = [np.full((i % 3 + 1, 6), i, dtype=np.float32) for i in range(24)]
+                with ThreadPoolExecutor(8) as pool:
+                    results = list(pool.map(client.predict_price, rows))
+                for i, preds in enumerate(results):
+                    self.assertEqual(preds.tolist(), [6.0 * i] * (i % 3 + 1))
+                self.assertLess(server.price.batches, 24)
+                self.assertEqual(client.recommend_crops([[25, 60, 1.0, 6.5]]), ["rice"])
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            import commodity_price
+
+            local = mock.Mock()
+            local.predict.return_value = np.array([1.5], dtype=np.float32)
+            with mock.patch.object(commodity_price, "load_model", return_value=local):
+                model = commodity_price.RemoteModel(ModelServerClient(path))
+                self.assertEqual(model.predict(np.zeros((1, 6), dtype=np.float32)).tolist(), [1.5])
+
+
+class PriceBatchingTests(SimpleTestCase):
+    def test_announced_calls_share_one_predict_and_a_lone_call_does_not_wait(self):
+        import numpy as np
+        from agri_api.batching import MicroBatcher
+
+        batcher = MicroBatcher(lambda rows: rows.sum(axis=1), window=5.0, announced=True)
+        started = time.perf_counter()
+        with batcher.expect():
+            self.assertEqual(batcher(np.ones((2, 3))).tolist(), [3.0, 3.0])
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+        results = {}
+        ready = threading.Barrier(8)
+
+        def call(i):
+            with batcher.expect():
+                ready.wait()
+                results[i] = batcher(np.full((1, 3), i)).tolist()
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, {i: [3.0 * i] for i in range(8)})
+        self.assertEqual((batcher.calls, batcher.batches), (9, 2))
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+    def test_predict_price_gives_the_same_result_batched(self):
+        import commodity_price
+
+        with override_settings(PRICE_BATCH_WINDOW_MS=0):
+            self.assertIsNone(commodity_price.price_batcher())
+            direct = commodity_price.predict_price("onion", "Varanasi")
+        with override_settings(PRICE_BATCH_WINDOW_MS=2):
+            batcher = commodity_price.price_batcher()
+            batched = commodity_price.predict_price("onion", "Varanasi")
+        self.assertTrue(direct["ok"])
+        self.assertEqual(direct, batched)
+        self.assertGreater(batcher.calls, 0)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_threads_and_tasks_share_one_call(self):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        from agri_api.singleflight import SingleFlight
+
+        group = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {"temp": 31}
+
+        async def afetch():
+            calls.append(1)
+            return {"temp": 0}
+
+        async def waiters():
+            tasks = [asyncio.create_task(group.ado("weather:varanasi", afetch)) for _ in range(5)]
+            await asyncio.sleep(0.05)
+            release.set()
+            return await asyncio.gather(*tasks)
+
+        with ThreadPoolExecutor(4) as pool:
+            threads = [pool.submit(group.do, "weather:varanasi", fetch) for _ in range(4)]
+            time.sleep(0.05)
+            results = asyncio.run(waiters()) + [f.result() for f in threads]
+        self.assertEqual(results, [{"temp": 31}] * 9)
+        self.assertEqual((len(calls), group.calls, group.shared), (1, 1, 8))
+
+        def failing():
+            raise RuntimeError("upstream down")
+
+        with self.assertRaisesMessage(RuntimeError, "upstream down"):
+            group.do("weather:varanasi", failing)
+        # Nothing is kept once the call is done
+        self.assertEqual(group.do("weather:varanasi", lambda: {"temp": 20}), {"temp": 20})
+
+    @override_settings(CACHES=LOCMEM_CACHE)
+    def test_concurrent_cache_misses_compute_once(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from agri_api.cache import get_or_compute
+
+        cache.clear()
+        calls = []
+
+        def translate():
+            calls.append(1)
+            time.sleep(0.1)
+            return "प्याज का भाव"
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda _: get_or_compute("translate", ("en", "hi", "onion price"), translate), range(8)))
+        self.assertEqual(results, ["प्याज का भाव"] * 8)
+        self.assertEqual(len(calls), 1)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHE, ALLOWED_HOSTS=["testserver"], REQUEST_DEADLINE_SECONDS=0.3,
+    BREAKER_MIN_CALLS=2, BREAKER_SLOW_CALL_SECONDS=0.2, BREAKER_OPEN_SECONDS=0.5,
+)
+class UpstreamBreakerTests(SimpleTestCase):
+    def setUp(self):
+        from agri_api import breaker
+
+        cache.clear()
+        self.delay = 0.6
+
+        def handler(path, headers, body):
+            time.sleep(self.delay)
+            if path.startswith("/translate"):
+                return 200, {"translatedText": "translated"}
+            if path.startswith("/weather"):
+                return 200, {"current": {"temp": 21.5, "humidity": 60}}
+            return 200, {"audios": ["UklGRgAAAAA="]}
+
+        self.stub = StubServer(handler)
+        self.addCleanup(self.stub.close)
+        breaker._breakers.clear()
+        self.addCleanup(breaker._breakers.clear)
+        tts._store = tts.AudioCache(tempfile.mkdtemp(), 10 * 1024 * 1024)
+        self.addCleanup(setattr, tts, "_store", None)
+        env = mock.patch.dict(os.environ, {
+            "TRANSLATE_URL": self.stub.url + "/translate",
+            "SARVAM_TTS_URL": self.stub.url + "/text-to-speech",
+            "SARVAM_API_KEY": "secret",
+        })
+        env.start()
+        self.addCleanup(env.stop)
+
+    def _timed_post(self, path, body):
+        started = time.perf_counter()
+        resp = self.client.post(path, data=json.dumps(body), content_type="application/json")
+        return resp, time.perf_counter() - started
+
+    def test_slow_translation_degrades_to_the_untranslated_answer(self):
+        from agri_api.breaker import breaker
+
+        predict = mock.patch.object(views, "_cached_predict_price", return_value={
+            "ok": True, "commodity": "onion", "market": "Varanasi", "current_price": 20.0,
+            "predicted_price": 22.0, "change": 2.0, "trend": "increase",
+        })
+        predict.start()
+        self.addCleanup(predict.stop)
+        body = {"spoken_text": "प्याज का भाव", "language": "hi-IN"}
+        for _ in range(2):
+            resp, elapsed = self._timed_post("/api/process-speech/", body)
+            # The Hindi parser found the commodity; the answer stays in English
+            self.assertTrue(resp.json()["chatbot_response"].startswith("Onion price is likely to increase"))
+            self.assertLess(elapsed, self.delay)  # the deadline, not the stub, ended the wait
+        self.assertEqual(breaker("translate").state, "open")
+
+        # Open: answered without calling LibreTranslate at all
+        calls = len(self.stub.calls)
+        resp, elapsed = self._timed_post("/api/process-speech/", body)
+        self.assertTrue(resp.json()["chatbot_response"].startswith("Onion price"))
+        self.assertEqual(len(self.stub.calls), calls)
+        self.assertLess(elapsed, 0.1)
+
+    def test_tts_fails_fast_then_probes_and_recovers(self):
+        from agri_api.breaker import breaker
+
+        for text in ("pehla", "doosra"):
+            resp, elapsed = self._timed_post("/api/text-to-speech/", {"text": text, "language": "hi-IN"})
+            self.assertEqual(resp.status_code, 504)
+            self.assertLess(elapsed, self.delay)
+
+        calls = len(self.stub.calls)
+        resp, elapsed = self._timed_post("/api/text-to-speech/", {"text": "teesra", "language": "hi-IN"})
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.json()["fallback"], "text")
+        self.assertEqual(len(self.stub.calls), calls)
+        self.assertLess(elapsed, 0.1)
+
+        # Sarvam is back: after BREAKER_OPEN_SECONDS one probe goes through and closes the breaker
+        self.delay = 0
+        time.sleep(0.5)
+        resp, _ = self._timed_post("/api/text-to-speech/", {"text": "chautha", "language": "hi-IN"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(breaker("sarvam").state, "closed")
+
+    def test_shared_call_is_not_decided_by_the_first_callers_deadline(self):
+        from agri_api.breaker import deadline
+
+        results = {}
+
+        def leader():
+            with deadline(0.15):
+                results["leader"] = views._translate_text("namaste", "hi", "en")
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        time.sleep(0.05)
+        # Joins the leader's call, then makes its own once the leader runs out of time
+        results["follower"] = views._translate_text("namaste", "hi", "en")
+        thread.join()
+
+        self.assertEqual(results, {"leader": None, "follower": "translated"})
+        self.assertEqual(len(self.stub.calls), 2)
+
+    def test_shared_weather_fetch_is_not_decided_by_the_first_callers_deadline(self):
+        import smart_farming
+        import openweather_client  # type: ignore  (on sys.path once smart_farming is imported)
+        from agri_api.breaker import breaker, deadline
+        from agri_api.cache import get_or_compute
+
+        url = self.stub.url + "/weather"
+        for module in (smart_farming, openweather_client):
+            patcher = mock.patch.object(module, "OPENWEATHER_BASE_URL", url)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        results = {}
+
+        def fetch(name):
+            parts = smart_farming._weather_parts(25.3, 83.0)
+            results[name] = get_or_compute("weather", parts, lambda: smart_farming._fetch_weather_forecast(25.3, 83.0))
+
+        def leader():
+            with deadline(0.15):
+                fetch("leader")
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        time.sleep(0.05)
+        fetch("follower")
+        thread.join()
+
+        self.assertEqual(results, {"leader": None, "follower": {"current": {"temp": 21.5, "humidity": 60}}})
+        self.assertEqual(len(self.stub.calls), 2)
+        # Only the follower's own call is recorded; the leader's was cut short by its deadline
+        self.assertEqual(len(breaker("openweather")._calls), 1)
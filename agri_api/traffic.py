@@ -0,0 +1,135 @@
+"""
+Record API traffic as JSONL for replay with benchmarks/replay.py.
+
+Enabled by the TRAFFIC_LOG_PATH setting. Each request under TRAFFIC_LOG_PREFIXES
+appends one line:
+
+    {"ts": 1760862000.123, "method": "POST", "path": "/api/process-speech/",
+     "query": "", "content_type": "application/json",
+     "body": {"spoken_text": "...", "language": "hi-IN"},
+     "status": 200, "duration_ms": 812.4}
+
+Headers are not recorded, and secret-looking fields (api_key, key, ...) are
+dropped from JSON bodies, form bodies and the query string. Lines are appended with a single write on an O_APPEND descriptor, so
+several gunicorn workers can share one file.
+"""
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Body fields and query params never written to the log (the Sarvam key params included)
+SECRET_FIELDS = {
+    "api_key", "apikey", "api-key", "x-api-key", "subscription-key", "key",
+    "appid", "access_token", "token", "password", "secret",
+}
+MAX_BODY_BYTES = 64 * 1024
+
+
+class TrafficLog:
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def write(self, entry: dict) -> None:
+        line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._lock:
+            if self._fd is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line)
+
+
+def scrub_query(query: str) -> str:
+    """`query` (a=1&b=2) without its secret params; order and blank values are kept."""
+    if not query:
+        return ""
+    pairs = parse_qsl(query, keep_blank_values=True)
+    return urlencode([(k, v) for k, v in pairs if k.lower() not in SECRET_FIELDS])
+
+
+def request_entry(request, started: float, status: int, duration: float) -> dict:
+    body = None
+    raw = request.body if request.method in ("POST", "PUT", "PATCH") else b""
+    # Django reports text/plain for bodiless requests; only keep a real one
+    content_type = request.content_type if raw else ""
+    if raw and len(raw) <= MAX_BODY_BYTES:
+        if content_type == "application/json":
+            try:
+                body = json.loads(raw)
+            except ValueError:
+                body = raw.decode("utf-8", "replace")
+            if isinstance(body, dict):
+                body = {k: v for k, v in body.items() if k.lower() not in SECRET_FIELDS}
+        elif content_type == "application/x-www-form-urlencoded":
+            body = scrub_query(raw.decode("utf-8", "replace"))
+        else:
+            body = raw.decode("utf-8", "replace")
+    return {
+        "ts": round(started, 3),
+        "method": request.method,
+        "path": request.path,
+        "query": scrub_query(request.META.get("QUERY_STRING", "")),
+        "content_type": content_type or None,
+        "body": body,
+        "status": status,
+        "duration_ms": round(duration * 1000, 1),
+    }
+
+
+class TrafficRecorderMiddleware:
+    """Appends sampled API requests to TRAFFIC_LOG_PATH; removed when it is unset."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        path = getattr(settings, "TRAFFIC_LOG_PATH", None)
+        if not path:
+            raise MiddlewareNotUsed
+        self.log = TrafficLog(str(path))
+        self.sample = float(getattr(settings, "TRAFFIC_LOG_SAMPLE", 1.0))
+        self.prefixes = tuple(getattr(settings, "TRAFFIC_LOG_PREFIXES", ("/api/",)))
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _wanted(self, request) -> bool:
+        return request.path.startswith(self.prefixes) and (self.sample >= 1.0 or random.random() < self.sample)
+
+    def _record(self, request, started, perf_started, response) -> None:
+        try:
+            entry = request_entry(request, started, response.status_code, time.perf_counter() - perf_started)
+            self.log.write(entry)
+        except Exception as e:
+            # Recording must never break the request
+            print(f"[traffic] failed to record {request.path}: {e}")
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._wanted(request):
+            return self.get_response(request)
+        # Read the body now; views may consume the stream
+        request.body
+        started, perf_started = time.time(), time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, started, perf_started, response)
+        return response
+
+    async def __acall__(self, request):
+        if not self._wanted(request):
+            return await self.get_response(request)
+        request.body
+        started, perf_started = time.time(), time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, started, perf_started, response)
+        return response
@@ -0,0 +1,587 @@
+"""
+Shared helpers for the Sarvam TTS views (agri_api.views and base.views).
+
+Synthesized audio is stored in a content-addressed, size-bounded LRU on disk:
+the file name is a hash of the normalized text, language and voice, so the
+same answer is synthesized once and then served from disk by every worker.
+"""
+import base64
+import contextvars
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+
+from .breaker import UpstreamUnavailable, guard
+from .cache import delete_cached, get_cached, set_cached
+from .metrics import upstream
+from .singleflight import flights
+
+
+_AUDIO_TYPES = [
+    (b"RIFF", "audio/wav"),
+    (b"OggS", "audio/ogg"),
+    (b"ID3", "audio/mpeg"),
+    (b"\xff\xfb", "audio/mpeg"),
+    (b"\xff\xf3", "audio/mpeg"),
+    (b"fLaC", "audio/flac"),
+]
+
+_KEY_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def audio_content_type(data: bytes) -> str:
+    for magic, ctype in _AUDIO_TYPES:
+        if data.startswith(magic):
+            return ctype
+    # Sarvam returns WAV unless asked otherwise
+    return "audio/wav"
+
+
+def normalize_tts_text(text: str) -> str:
+    # NFC + collapsed whitespace: "नमस्ते  किसान " and "नमस्ते किसान" share one entry
+    text = unicodedata.normalize("NFC", text or "")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def audio_key(text: str, language: str, voice: str) -> str:
+    raw = "\x1f".join([normalize_tts_text(text), (language or "").strip().lower(), (voice or "").strip().lower()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Content-addressed audio files under `root`, evicted least-recently-used
+    once their total size exceeds `max_bytes`.
+
+    Reads bump the file mtime, which is what eviction orders by, so the LRU
+    order is shared by every process using the same directory.
+    """
+
+    def __init__(self, root, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> bytes | None:
+        if not _KEY_RE.match(key or ""):
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not _KEY_RE.match(key or "") or not data:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so concurrent readers never see a partial file
+            tmp = path.with_name(f".{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            total = 0
+            for shard in self.root.iterdir() if self.root.exists() else []:
+                if not shard.is_dir():
+                    continue
+                for f in shard.iterdir():
+                    if f.name.startswith("."):
+                        continue
+                    try:
+                        st = f.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, f))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort(key=lambda e: e[0])
+            for _, size, f in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    f.unlink()
+                    total -= size
+                except OSError:
+                    pass
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def audio_store() -> AudioCache:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                root = getattr(settings, "TTS_AUDIO_CACHE_DIR", None) or (Path(settings.BASE_DIR) / ".cache" / "tts")
+                max_bytes = getattr(settings, "TTS_AUDIO_CACHE_MAX_BYTES", 200 * 1024 * 1024)
+                _store = AudioCache(root, max_bytes)
+    return _store
+
+
+def resolve_api_key(request, body: dict) -> str:
+    """Sarvam key: X-Sarvam-Key header, then body `api_key` (dev overrides), then SARVAM_API_KEY."""
+    header_key = (request.headers.get("X-Sarvam-Key") or request.META.get("HTTP_X_SARVAM_KEY") or "").strip()
+    body_key = (body.get("api_key") or "").strip()
+    return (header_key or body_key or os.getenv("SARVAM_API_KEY", "")).strip()
+
+
+def wants_binary(request, body: dict) -> bool:
+    """Binary audio is opt-in: body/query `format=binary`, or an Accept header asking for audio/*."""
+    fmt = (body.get("format") or request.GET.get("format") or "").strip().lower()
+    if fmt:
+        return fmt in ("binary", "audio", "raw")
+    return request.headers.get("Accept", "").lower().startswith("audio/")
+
+
+def _parse_range(header: str, size: int):
+    """Parse a single `bytes=` range; returns (start, end) inclusive, or None if unsatisfiable."""
+    m = re.match(r"^bytes=(\d*)-(\d*)$", (header or "").strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = int(m.group(2)) if m.group(2) else size - 1
+    else:
+        # Suffix range: last N bytes
+        length = int(m.group(2))
+        if length == 0:
+            return None
+        start = max(size - length, 0)
+        end = size - 1
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def audio_response(request, data: bytes, key: str | None = None) -> HttpResponse:
+    """Binary audio response honouring a single `Range` request header."""
+    ctype = audio_content_type(data)
+    size = len(data)
+    range_header = request.headers.get("Range")
+    if range_header:
+        rng = _parse_range(range_header, size)
+        if rng is None:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        start, end = rng
+        response = HttpResponse(data[start:end + 1], content_type=ctype, status=206)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        response = HttpResponse(data, content_type=ctype)
+    response["Accept-Ranges"] = "bytes"
+    if key:
+        # Content-addressed: the bytes behind a key never change
+        response["ETag"] = f'"{key}"'
+        response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+def decode_audio(audio_base64: str) -> bytes | None:
+    try:
+        return base64.b64decode(audio_base64, validate=False)
+    except Exception:
+        return None
+
+
+def tts_success_response(request, body: dict, data: bytes, key: str):
+    """Answer a TTS request with cached/synthesized audio, as JSON (default) or binary."""
+    if wants_binary(request, body):
+        return audio_response(request, data, key)
+    return JsonResponse({
+        "success": True,
+        "audio_base64": base64.b64encode(data).decode("ascii"),
+        # Same audio as a cacheable binary resource (supports Range requests)
+        "audio_url": reverse("tts_audio", args=[key]),
+    })
+
+
+# ---------------- Sarvam endpoint discovery ----------------
+
+# Path variants tried after the configured SARVAM_TTS_URL, in order
+_SARVAM_PATH_SUFFIXES = [
+    "/text-to-speech",
+    "/v1/tts",
+    "/tts",
+    "/v1/text-to-speech",
+    "/v1/speech/tts",
+    "/speech/tts",
+    "/v1/voice/tts",
+    "/voice/tts",
+    "/v1/audio/speech",
+    "/audio/speech",
+]
+
+# Query params that may carry the key, tried after the bare URL
+_SARVAM_KEY_PARAMS = ["subscription-key", "api_key", "apikey", "api-key", "x-api-key"]
+
+_SARVAM_HEADER_SETS = [
+    "api-subscription-key",
+    "x-api-key",
+    "api-key",
+    "Ocp-Apim-Subscription-Key",
+    "Authorization-Bearer",
+    "Authorization-Raw",
+]
+
+
+def sarvam_headers(header_set: str, api_key: str) -> dict:
+    headers = {"Content-Type": "application/json"}
+    if header_set == "Authorization-Bearer":
+        headers["Authorization"] = f"Bearer {api_key}"
+    elif header_set == "Authorization-Raw":
+        headers["Authorization"] = api_key
+    else:
+        headers[header_set] = api_key
+    return headers
+
+
+def sarvam_request_url(url: str, key_param: str | None, api_key: str) -> str:
+    """The request URL for a candidate, with the key added as `key_param` if given."""
+    if not key_param:
+        return url
+    from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+    parsed = urlparse(url)
+    q = dict(parse_qsl(parsed.query))
+    q[key_param] = api_key
+    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, urlencode(q), parsed.fragment))
+
+
+def sarvam_candidates(configured_url: str) -> list[tuple[str, str | None, str]]:
+    """
+    Every (url, key_param, header_set) combination the prober may try, in order:
+    the configured URL first, then path variants on the same host; for each
+    URL the bare form and then each key query param; for each of those every
+    header set.
+    """
+    from urllib.parse import urlparse
+
+    urls = [configured_url]
+    parsed = urlparse(configured_url)
+    if parsed.scheme and parsed.netloc:
+        base = f"{parsed.scheme}://{parsed.netloc}"
+        for suffix in _SARVAM_PATH_SUFFIXES:
+            if base + suffix not in urls:
+                urls.append(base + suffix)
+
+    candidates = []
+    for url in urls:
+        for key_param in [None, *_SARVAM_KEY_PARAMS]:
+            for header_set in _SARVAM_HEADER_SETS:
+                candidates.append((url, key_param, header_set))
+    return candidates
+
+
+def _endpoint_cache_parts(configured_url: str):
+    return (configured_url,)
+
+
+def learned_sarvam_endpoint(configured_url: str) -> tuple[str, str | None, str] | None:
+    """The (url, key_param, header_set) that last worked for this configured URL, if any."""
+    entry = get_cached("tts_endpoint", _endpoint_cache_parts(configured_url))
+    if not entry:
+        return None
+    return entry["url"], entry["key_param"], entry["header_set"]
+
+
+def remember_sarvam_endpoint(configured_url: str, url: str, key_param: str | None, header_set: str) -> None:
+    # Stored in the shared cache without the key itself, so all workers reuse it
+    set_cached(
+        "tts_endpoint",
+        _endpoint_cache_parts(configured_url),
+        {"url": url, "key_param": key_param, "header_set": header_set},
+    )
+
+
+def forget_sarvam_endpoint(configured_url: str) -> None:
+    delete_cached("tts_endpoint", _endpoint_cache_parts(configured_url))
+
+
+class SarvamError(Exception):
+    """A failed synthesis; `payload`/`status` are what the views return as JSON."""
+
+    def __init__(self, payload: dict, status: int = 502):
+        super().__init__(payload.get("error", "Sarvam error"))
+        self.payload = payload
+        self.status = status
+
+
+def sarvam_unavailable(e: Exception) -> SarvamError:
+    # Breaker open or request deadline spent: answer at once, the client speaks with its own voice
+    return SarvamError({"success": False, "error": f"Sarvam unavailable: {e}", "fallback": "text"}, 503)
+
+
+def _synthesis_plan(text: str, language: str, api_key: str, voice: str, configured_url: str | None):
+    """
+    The Sarvam endpoint selection shared by synthesize() and asynthesize().
+
+    A generator: it yields (url, headers, payload, header_set) for each call to
+    make and is sent back (response, exception) for it; it returns the decoded
+    audio or raises SarvamError. The caller makes the calls, sync or async.
+    """
+    # Default to official Sarvam TTS endpoint per docs
+    # https://docs.sarvam.ai/api-reference-docs/text-to-speech/convert
+    configured_url = configured_url or os.getenv("SARVAM_TTS_URL", "https://api.sarvam.ai/text-to-speech")
+    # Official payload expects 'text' and 'target_language_code'.
+    # Keep only documented fields to improve success rate.
+    payload = {
+        "text": text,
+        "target_language_code": language,
+    }
+    voice = (voice or "").strip().lower()
+    if voice:
+        # Part of the audio key: the voice asked for must be the voice stored
+        payload["speaker"] = voice
+
+    candidates = sarvam_candidates(configured_url)
+    learned = learned_sarvam_endpoint(configured_url)
+    if learned in candidates:
+        candidates.remove(learned)
+        candidates.insert(0, learned)
+    else:
+        learned = None
+
+    attempts = []
+    dead_urls = set()
+    for i, candidate in enumerate(candidates):
+        if learned and i == 1:
+            # The remembered endpoint just failed; drop it and probe afresh
+            forget_sarvam_endpoint(configured_url)
+        url, key_param, hdr_name = candidate
+        url_try = sarvam_request_url(url, key_param, api_key)
+        if url_try in dead_urls:
+            continue
+        resp, error = yield url_try, sarvam_headers(hdr_name, api_key), payload, hdr_name
+        if error is not None:
+            attempts.append({"endpoint": url_try, "header_set": hdr_name, "exception": str(error)})
+            continue
+
+        if resp.status_code == 200:
+            ct = resp.headers.get("content-type", "")
+            data = resp.json() if ct.startswith("application/json") else {}
+            # Official response contains 'audios': [ base64, ... ]
+            audio_base64 = data.get("audio_base64") or data.get("audio")
+            if (not audio_base64) and isinstance(data.get("audios"), list) and data["audios"]:
+                audio_base64 = data["audios"][0]
+            if not audio_base64:
+                raise SarvamError({
+                    "success": False,
+                    "error": "No audio returned from Sarvam",
+                    "provider_body": resp.text[:500],
+                    "content_type": ct,
+                    "endpoint": url_try,
+                    "header_set": hdr_name,
+                })
+            audio = decode_audio(audio_base64)
+            if not audio:
+                raise SarvamError({"success": False, "error": "Invalid audio returned from Sarvam"})
+            if candidate != learned:
+                remember_sarvam_endpoint(configured_url, url, key_param, hdr_name)
+            return audio
+
+        attempts.append({
+            "endpoint": url_try,
+            "status": resp.status_code,
+            "header_set": hdr_name,
+            "body": resp.text[:300],
+        })
+        if resp.status_code == 404:
+            # 404 indicates wrong path; no need to try other header sets for this URL
+            dead_urls.add(url_try)
+
+    # If we get here, all attempts failed (likely 404 variants)
+    raise SarvamError({
+        "success": False,
+        "error": "Sarvam API not found at any known endpoint",
+        "attempts": attempts,
+    })
+
+
+def _advance(plan, reply=None):
+    # Resume the plan: ("post", request) for the next call, or ("done", audio)
+    try:
+        return "post", (next(plan) if reply is None else plan.send(reply))
+    except StopIteration as done:
+        return "done", done.value
+
+
+def _timeout_error(url: str, header_set: str) -> SarvamError:
+    return SarvamError({"success": False, "error": "Sarvam API timeout", "endpoint": url, "header_set": header_set}, 504)
+
+
+def synthesize(text: str, language: str, api_key: str, voice: str = "", configured_url: str | None = None) -> bytes:
+    """
+    Synthesize `text` with Sarvam in `voice` and return the decoded audio bytes.
+
+    The first (endpoint, auth scheme) that works is remembered in the shared
+    cache and tried first, so a normal call is a single HTTP request. Only when
+    it stops working do we fall back to probing every combination. Raises
+    SarvamError on failure.
+    """
+    plan = _synthesis_plan(text, language, api_key, voice, configured_url)
+    step, value = _advance(plan)
+    while step == "post":
+        url, headers, payload, header_set = value
+        resp, error = None, None
+        try:
+            with guard("sarvam", 30) as call, upstream(url):
+                resp = requests.post(url, headers=headers, json=payload, timeout=call.timeout)
+                call.check(resp.status_code)
+        except UpstreamUnavailable as e:
+            raise sarvam_unavailable(e)
+        except requests.Timeout:
+            raise _timeout_error(url, header_set)
+        except Exception as e:
+            error = e
+        step, value = _advance(plan, (resp, error))
+    return value
+
+
+async def asynthesize(text: str, language: str, api_key: str, client, voice: str = "", configured_url: str | None = None) -> bytes:
+    """
+    synthesize() for async views: same endpoint selection and learned endpoint,
+    with the calls made on the httpx.AsyncClient `client` and the cache
+    lookups in a worker thread.
+    """
+    import httpx
+    from asgiref.sync import sync_to_async
+
+    advance = sync_to_async(_advance, thread_sensitive=False)
+    plan = _synthesis_plan(text, language, api_key, voice, configured_url)
+    step, value = await advance(plan)
+    while step == "post":
+        url, headers, payload, header_set = value
+        resp, error = None, None
+        try:
+            with guard("sarvam", 30) as call, upstream(url):
+                resp = await client.post(url, headers=headers, json=payload, timeout=call.timeout)
+                call.check(resp.status_code)
+        except UpstreamUnavailable as e:
+            raise sarvam_unavailable(e)
+        except httpx.TimeoutException:
+            raise _timeout_error(url, header_set)
+        except Exception as e:
+            error = e
+        step, value = await advance(plan, (resp, error))
+    return value
+
+
+def synthesize_once(key: str, synth) -> bytes:
+    """
+    synth() -> audio for the audio `key`, put in audio_store(). Concurrent
+    requests for the same key share one call (agri_api.singleflight) and its
+    result or SarvamError.
+    """
+    def fill():
+        store = audio_store()
+        # A call that finished since the caller looked may have stored it already
+        audio = store.get(key)
+        if not audio:
+            audio = synth()
+            store.put(key, audio)
+        return audio
+
+    return flights.do(f"tts:{key}", fill)
+
+
+async def asynthesize_once(key: str, asynth) -> bytes:
+    """synthesize_once() for async views: `asynth` is a coroutine function; shares flights with sync callers."""
+    from asgiref.sync import sync_to_async
+
+    async def fill():
+        store = audio_store()
+        audio = await sync_to_async(store.get, thread_sensitive=False)(key)
+        if not audio:
+            audio = await asynth()
+            await sync_to_async(store.put, thread_sensitive=False)(key, audio)
+        return audio
+
+    return await flights.ado(f"tts:{key}", fill)
+
+
+# ---------------- Sentence-chunked streaming ----------------
+
+# Split after sentence punctuation (including the Devanagari danda)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?\u0964\u0965])\s+")
+
+
+def split_sentences(text: str, min_chars: int = 40, max_chars: int = 300) -> list[str]:
+    """
+    Split text into speakable chunks: whole sentences, short ones merged up to
+    `min_chars` so we don't pay a round trip per "OK.", long ones cut at word
+    boundaries around `max_chars`.
+    """
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(normalize_tts_text(text)):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if not sentence:
+            continue
+        current = f"{current} {sentence}".strip() if current else sentence
+        if len(current) >= min_chars:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def synthesize_chunks(chunks: list[str], synth, max_workers: int = 3):
+    """
+    Run `synth(chunk) -> bytes` for every chunk with at most `max_workers` in
+    flight, yielding (index, chunk, audio, error) in order as soon as each
+    chunk and all chunks before it are done. Time to the first yield is the
+    time to synthesize the first chunk, whatever the total length.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="tts-stream")
+    try:
+        # Each chunk runs in a copy of the caller's context (spans, request deadline), like views._submit
+        futures = [executor.submit(contextvars.copy_context().run, synth, chunk) for chunk in chunks]
+        for index, (chunk, future) in enumerate(zip(chunks, futures)):
+            try:
+                yield index, chunk, future.result(), None
+            except SarvamError as e:
+                yield index, chunk, None, e.payload.get("error", "Sarvam error")
+            except Exception as e:
+                yield index, chunk, None, str(e)
+    finally:
+        # Client went away or we're done: don't synthesize what nobody will hear
+        executor.shutdown(wait=False, cancel_futures=True)
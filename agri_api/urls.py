@@ -2,15 +2,32 @@ from django.urls import path
 from .views import (
     price_prediction_view,
     price_all_view,
+    price_forecast_view,
+    price_snapshot_view,
     advisory_view,
     text_to_speech_view,
+    text_to_speech_stream_view,
+    tts_audio_view,
     process_speech_view,
 )
+from .async_views import (
+    advisory_view_async,
+    text_to_speech_view_async,
+    process_speech_view_async,
+)
 
 urlpatterns = [
     path("price/", price_prediction_view, name="price_prediction"),
     path("price/all/", price_all_view, name="price_all"),
+    path("price/forecast/", price_forecast_view, name="price_forecast"),
+    path("price/snapshot/", price_snapshot_view, name="price_snapshot"),
     path("advisory/", advisory_view, name="advisory"),
     path("text-to-speech/", text_to_speech_view, name="text_to_speech"),
+    path("text-to-speech/stream/", text_to_speech_stream_view, name="text_to_speech_stream"),
+    path("tts-audio/<str:key>/", tts_audio_view, name="tts_audio"),
     path("process-speech/", process_speech_view, name="process_speech"),
+    # Async (ASGI) variants of the views that wait on external services
+    path("async/advisory/", advisory_view_async, name="advisory_async"),
+    path("async/text-to-speech/", text_to_speech_view_async, name="text_to_speech_async"),
+    path("async/process-speech/", process_speech_view_async, name="process_speech_async"),
 ]
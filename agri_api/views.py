@@ -1,40 +1,129 @@
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import HttpResponseNotModified, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_GET, require_POST
 from django.views.decorators.csrf import csrf_exempt
+from django.urls import reverse
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import contextvars
+import hashlib
 import json
 import os
 import requests
 import re
+import threading
+import time
+
+from .breaker import UpstreamUnavailable, guard
+from .cache import cache_response, get_or_compute
+from .metrics import span, upstream
+from .querylog import annotate
+from .tts import (
+    audio_key,
+    audio_response,
+    audio_store,
+    decode_audio,
+    resolve_api_key,
+    SarvamError,
+    sarvam_unavailable,
+    split_sentences,
+    synthesize,
+    synthesize_chunks,
+    synthesize_once,
+    tts_success_response,
+)
+
+
+def _price_artifact_version() -> str:
+    # Lazy import to avoid importing heavy deps at startup
+    from commodity_price import artifact_version
+    return artifact_version()
+
+
+def _cached_predict_price(commodity: str, market: str | None) -> dict:
+    """predict_price() through the shared cache; only successful results are kept."""
+    from commodity_price import predict_price
+    return get_or_compute(
+        "price",
+        (commodity.strip().lower(), market, _price_artifact_version()),
+        lambda: predict_price(commodity, market),
+        should_cache=lambda r: bool(r.get("ok")),
+    )
 
 
 @require_GET
+@cache_response(_price_artifact_version)
 def price_prediction_view(request):
-    # Lazy import to avoid importing heavy deps at startup
-    from commodity_price import predict_price
     commodity_raw = request.GET.get("commodity", "")
     commodity = _normalize_commodity_param(commodity_raw)
     market = request.GET.get("market") or "Varanasi"
     if not commodity.strip():
         return JsonResponse({"ok": False, "error": "commodity is required"}, status=400)
-    result = predict_price(commodity, market)
+    result = _cached_predict_price(commodity, market)
+    status = 200 if result.get("ok") else 400
+    return JsonResponse(result, status=status)
+
+
+@require_GET
+@cache_response(_price_artifact_version)
+def price_forecast_view(request):
+    # Lazy import
+    from commodity_price import MAX_FORECAST_WEEKS, forecast_price
+    commodity = _normalize_commodity_param(request.GET.get("commodity", ""))
+    market = request.GET.get("market") or "Varanasi"
+    if not commodity.strip():
+        return JsonResponse({"ok": False, "error": "commodity is required"}, status=400)
+    try:
+        weeks = int(request.GET.get("weeks") or 4)
+    except ValueError:
+        weeks = 0
+    if not 1 <= weeks <= MAX_FORECAST_WEEKS:
+        return JsonResponse({"ok": False, "error": f"weeks must be between 1 and {MAX_FORECAST_WEEKS}"}, status=400)
+    result = forecast_price(commodity, market, weeks=range(1, weeks + 1))
     status = 200 if result.get("ok") else 400
     return JsonResponse(result, status=status)
 
 
 @require_GET
+def price_snapshot_view(request):
+    """Compact price list for clients that answer price questions locally (see agri_api/snapshot.py)."""
+    from .snapshot import delta, encoded_response, snapshot
+    market = request.GET.get("market") or "Varanasi"
+    since = (request.GET.get("since") or "").strip()
+    version = _price_artifact_version()
+    market_tag = hashlib.sha1(market.strip().lower().encode("utf-8")).hexdigest()[:8]
+
+    encoded = delta(market, since, version) if since else None
+    etag = f"{since}..{version}-{market_tag}"
+    if encoded is None:
+        entry = snapshot(market, version)
+        if entry is None:
+            return JsonResponse({"ok": False, "error": "Price predictions are unavailable"}, status=503)
+        encoded = entry["encoded"]
+        etag = f"{version}-{market_tag}"
+    return encoded_response(request, encoded, etag, getattr(settings, "API_CACHE_MAX_AGE", 300))
+
+
+@require_GET
+@cache_response(_price_artifact_version)
 def price_all_view(request):
     # Lazy import
     from commodity_price import predict_all_prices
     market = request.GET.get("market") or "Varanasi"
     q = (request.GET.get("q") or "").strip()
-    result = predict_all_prices(market)
+
+    def _select_query(names: list[str]) -> list[str]:
+        # Resolve q against the commodity names before any inference runs
+        best = _filter_items_by_query([{"commodity": n} for n in names], q)
+        return [best["commodity"]] if best is not None else []
+
+    result = predict_all_prices(market, select=_select_query if q else None)
     if result.get("ok") and q:
         items = result.get("items") or []
-        best = _filter_items_by_query(items, q)
-        if best is not None:
-            result = {"ok": True, "count": 1, "items": [best], "resolved_query": q}
+        if items:
+            result = {"ok": True, "count": 1, "items": [items[0]], "resolved_query": q}
         else:
-            result = {"ok": False, "error": f"Commodity not found: {q}", "available": [it.get("commodity") for it in items]}
+            result = {"ok": False, "error": f"Commodity not found: {q}", "available": result.get("available", [])}
     status = 200 if result.get("ok") else 400
     return JsonResponse(result, status=status)
 
@@ -73,11 +162,18 @@ def text_to_speech_view(request):
 
     text = (body.get("text") or "").strip()
     language = (body.get("language") or "en-IN").strip()
+    annotate(request, language=language)
     # Support selecting Sarvam voice/model; default to 'Anushka' per request
     voice = (body.get("voice") or body.get("model") or "Anushka").strip()
     if not text:
         return JsonResponse({"success": False, "error": "text is required"}, status=400)
 
+    # Repeated answers (greetings, popular prices) are served from the on-disk audio cache
+    key = audio_key(text, language, voice)
+    cached_audio = audio_store().get(key)
+    if cached_audio:
+        return tts_success_response(request, body, cached_audio, key)
+
     api_key = os.getenv("SARVAM_API_KEY")
     if not api_key:
         return JsonResponse({"success": False, "error": "SARVAM_API_KEY not configured"}, status=500)
@@ -98,34 +194,118 @@ def text_to_speech_view(request):
         # You may add: 'format': 'mp3', 'speed': 1.0, etc., if supported by API
     }
 
-    try:
-        resp = requests.post(sarvam_url, headers=headers, json=payload, timeout=30)
+    def fetch() -> bytes:
+        try:
+            with guard("sarvam", 30) as call, upstream(sarvam_url):
+                resp = requests.post(sarvam_url, headers=headers, json=payload, timeout=call.timeout)
+                call.check(resp.status_code)
+        except UpstreamUnavailable as e:
+            raise sarvam_unavailable(e)
+        except requests.Timeout:
+            raise SarvamError({"success": False, "error": "Sarvam API timeout"}, 504)
         if resp.status_code != 200:
-            return JsonResponse({"success": False, "error": f"Sarvam API error: {resp.status_code}"}, status=502)
+            raise SarvamError({"success": False, "error": f"Sarvam API error: {resp.status_code}"})
         data = resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
         audio_base64 = data.get("audio_base64") or data.get("audio")
         if not audio_base64:
-            return JsonResponse({"success": False, "error": "No audio returned from Sarvam"}, status=502)
-        return JsonResponse({"success": True, "audio_base64": audio_base64})
-    except requests.Timeout:
-        return JsonResponse({"success": False, "error": "Sarvam API timeout"}, status=504)
+            raise SarvamError({"success": False, "error": "No audio returned from Sarvam"})
+        audio = decode_audio(audio_base64)
+        if not audio:
+            raise SarvamError({"success": False, "error": "Invalid audio returned from Sarvam"})
+        return audio
+
+    try:
+        with span("tts"):
+            # Identical requests arriving together share one Sarvam call
+            audio = synthesize_once(key, fetch)
+    except SarvamError as e:
+        return JsonResponse(e.payload, status=e.status)
     except Exception as e:
         return JsonResponse({"success": False, "error": str(e)}, status=502)
+    return tts_success_response(request, body, audio, key)
+
+
+@csrf_exempt
+@require_POST
+def text_to_speech_stream_view(request):
+    """
+    Sentence-chunked Sarvam TTS, streamed as newline-delimited JSON.
+    Expects JSON body: {"text": "...", "language": "hi-IN", "voice": "Anushka"}
+    Streams one line per chunk, in order, as soon as it is ready:
+      {"index": 0, "count": 3, "text": "...", "audio_base64": "...", "audio_url": "..."}
+    (or "error" instead of the audio), then {"done": true, "count": 3}.
+    """
+    try:
+        body = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        return JsonResponse({"success": False, "error": "Invalid JSON body"}, status=400)
+
+    text = (body.get("text") or "").strip()
+    language = (body.get("language") or "en-IN").strip()
+    annotate(request, language=language)
+    voice = (body.get("voice") or body.get("model") or "Anushka").strip()
+    chunks = split_sentences(text)
+    if not chunks:
+        return JsonResponse({"success": False, "error": "text is required"}, status=400)
+
+    api_key = resolve_api_key(request, body)
+    if not api_key:
+        return JsonResponse({"success": False, "error": "SARVAM_API_KEY not configured"}, status=500)
+
+    store = audio_store()
+
+    def synth(chunk: str) -> bytes:
+        key = audio_key(chunk, language, voice)
+        audio = store.get(key)
+        if not audio:
+            with span("tts"):
+                audio = synthesize_once(key, lambda: synthesize(chunk, language, api_key, voice))
+        return audio
+
+    def events():
+        concurrency = getattr(settings, "TTS_STREAM_CONCURRENCY", 3)
+        for index, chunk, audio, error in synthesize_chunks(chunks, synth, concurrency):
+            event = {"index": index, "count": len(chunks), "text": chunk}
+            if audio:
+                event["audio_base64"] = base64.b64encode(audio).decode("ascii")
+                event["audio_url"] = reverse("tts_audio", args=[audio_key(chunk, language, voice)])
+            else:
+                event["error"] = error
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+        yield json.dumps({"done": True, "count": len(chunks)}) + "\n"
+
+    response = StreamingHttpResponse(events(), content_type="application/x-ndjson")
+    response["Cache-Control"] = "no-cache"
+    # Tell reverse proxies (nginx) not to buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@require_GET
+def tts_audio_view(request, key):
+    """Serve previously synthesized audio by its content key (binary, Range-capable)."""
+    audio = audio_store().get(key)
+    if not audio:
+        return JsonResponse({"success": False, "error": "audio not found"}, status=404)
+    if request.headers.get("If-None-Match") == f'"{key}"':
+        return HttpResponseNotModified()
+    return audio_response(request, audio, key)
 
 
 @csrf_exempt
 @require_POST
 def process_speech_view(request):
     """
-    Pipeline:
+    Pipeline, run as a small dependency graph:
     1) Take user text + language
-    2) Translate to English (best effort)
-    3) Detect intent (commodity price) on English text
-    4) Produce answer (call predict_price)
+    2) Translate to English (best effort) while the Hindi parser reads the original
+    3) Detect intent (commodity price): English first, Hindi as fallback
+    4) Produce answer (call predict_price); started as soon as a parser finds a commodity
     5) Translate answer back to user's language (best effort)
 
     Body: {"spoken_text": "...", "language": "hi-IN"}
-    Returns: {"success": true, "chatbot_response": "...", "detected_language": "hi-IN"}
+    Returns: {"success": true, "chatbot_response": "...", "detected_language": "hi-IN", "timings": {...}}
+    `timings` holds per-stage milliseconds; stages overlap, so they do not add up to `total`.
     """
     try:
         body = json.loads(request.body.decode("utf-8"))
@@ -137,64 +317,103 @@ def process_speech_view(request):
     if not text:
         return JsonResponse({"success": False, "error": "spoken_text is required"}, status=400)
 
-    # 1-2) Translate inbound to English (best-effort)
-    english_text = _translate_text(text, src_lang=_short_lang(user_lang), tgt_lang="en") or text
-
-    # 3) Detect commodity price intent (English first)
-    intent = _detect_price_intent_en(english_text)
-    if intent:
-        commodity = intent.get("commodity")
-        market = intent.get("market") or (request.GET.get("market") or "Varanasi")
-        from commodity_price import predict_price
-        result = predict_price(commodity, market)
-        if not result.get("ok"):
-            return JsonResponse({"success": False, "error": result.get("error", "prediction failed")}, status=400)
-
-        # 4) Compose English answer
-        answer_en = _format_price_answer_en(result)
-        # 5) Translate back to user's language if not English
-        out_lang = _short_lang(user_lang)
-        final_text = _translate_text(answer_en, src_lang="en", tgt_lang=out_lang) if out_lang != "en" else answer_en
-        final_text = final_text or answer_en
-
+    started = time.perf_counter()
+    timings = {}
+    pool = _pipeline_executor()
+    default_market = request.GET.get("market") or "Varanasi"
+    src_lang = _short_lang(user_lang)
+
+    # 1-2) Inbound translation in the background; English needs none
+    translated = None
+    if src_lang != "en":
+        translated = _submit(pool, _timed, timings, "translate_in", _translate_text, text, src_lang, "en")
+
+    predictions = {}
+
+    def predict(commodity, market, stage):
+        # One lookup per (commodity, market), shared by both parsers; timed under the stage that started it
+        key = (commodity, market)
+        if key not in predictions:
+            predictions[key] = _submit(pool, _timed, timings, stage, _cached_predict_price, commodity, market)
+        return predictions[key]
+
+    # 3b) Hindi parser on the original text meanwhile; start its lookup right away
+    intent_hi = _timed(timings, "intent_hi", _detect_price_intent_hi, text)
+    hi_target = None
+    if intent_hi:
+        hi_target = (_normalize_commodity_hi(intent_hi.get("commodity")), intent_hi.get("market") or default_market)
+        predict(*hi_target, "predict_hi")
+
+    # 3) English intent wins when the translation yields one
+    english_text = (translated.result() if translated else None) or text
+    intent = _timed(timings, "intent_en", _detect_price_intent_en, english_text)
+    target = (intent.get("commodity"), intent.get("market") or default_market) if intent else hi_target
+    annotate(request, intent="price" if target else "unknown", language=user_lang)
+    if target:
+        annotate(request, commodity=target[0], market=target[1])
+
+    if target is None:
+        # No known intent matched
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
         return JsonResponse({
             "success": True,
-            "chatbot_response": final_text,
+            "chatbot_response": "I'm not sure I understood. You can ask for commodity prices, e.g., 'price of onion in Varanasi'.",
             "detected_language": user_lang,
+            "timings": timings,
         })
 
-    # 3b) Fallback: try Hindi intent directly on original text
-    intent_hi = _detect_price_intent_hi(text)
-    if intent_hi:
-        raw_comm = intent_hi.get("commodity")
-        market = intent_hi.get("market") or (request.GET.get("market") or "Varanasi")
-        commodity_norm = _normalize_commodity_hi(raw_comm)
-        from commodity_price import predict_price
-        result = predict_price(commodity_norm, market)
-        if not result.get("ok"):
-            return JsonResponse({"success": False, "error": result.get("error", "prediction failed")}, status=400)
-
-        answer_en = _format_price_answer_en(result)
-        out_lang = _short_lang(user_lang)
-        final_text = _translate_text(answer_en, src_lang="en", tgt_lang=out_lang) if out_lang != "en" else answer_en
-        final_text = final_text or answer_en
+    result = predict(*target, "predict_en").result()
+    if not result.get("ok"):
+        return JsonResponse({"success": False, "error": result.get("error", "prediction failed")}, status=400)
 
-        return JsonResponse({
-            "success": True,
-            "chatbot_response": final_text,
-            "detected_language": user_lang,
-        })
+    # 4) Compose English answer
+    answer_en = _format_price_answer_en(result)
+    # 5) Translate back to user's language if not English
+    final_text = answer_en
+    if src_lang != "en":
+        final_text = _timed(timings, "translate_out", _translate_text, answer_en, "en", src_lang) or answer_en
 
-    # No known intent matched
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
     return JsonResponse({
         "success": True,
-        "chatbot_response": "I'm not sure I understood. You can ask for commodity prices, e.g., 'price of onion in Varanasi'.",
+        "chatbot_response": final_text,
         "detected_language": user_lang,
+        "timings": timings,
     })
 
 
 # ---------------- Internal helpers ----------------
 
+_pipeline_pool = None
+_pipeline_pool_lock = threading.Lock()
+
+
+def _pipeline_executor() -> ThreadPoolExecutor:
+    """Threads shared by all process_speech_view requests (SPEECH_PIPELINE_WORKERS)."""
+    global _pipeline_pool
+    with _pipeline_pool_lock:
+        if _pipeline_pool is None:
+            _pipeline_pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, "SPEECH_PIPELINE_WORKERS", 8), thread_name_prefix="speech"
+            )
+    return _pipeline_pool
+
+
+def _submit(pool: ThreadPoolExecutor, func, *args):
+    # Run in the pool with the request's context, so spans reach its Server-Timing
+    return pool.submit(contextvars.copy_context().run, func, *args)
+
+
+def _timed(timings: dict, stage: str, func, *args):
+    # Run func(*args) under a metrics span and record its wall time in milliseconds under `stage`
+    stage_started = time.perf_counter()
+    try:
+        with span(stage):
+            return func(*args)
+    finally:
+        timings[stage] = round((time.perf_counter() - stage_started) * 1000, 1)
+
+
 def _short_lang(lang_code: str) -> str:
     # Map locale like 'hi-IN' -> 'hi'
     return (lang_code or "en").split("-")[0].lower()
@@ -204,14 +423,27 @@ def _translate_text(text: str, src_lang: str, tgt_lang: str) -> str | None:
     """Translate using LibreTranslate-like API if available via TRANSLATE_URL.
     Returns None on failure to allow graceful fallback.
     """
+    if not text:
+        return None
+    return get_or_compute(
+        "translate",
+        (src_lang, tgt_lang, text),
+        lambda: _translate_text_uncached(text, src_lang, tgt_lang),
+    )
+
+
+def _translate_text_uncached(text: str, src_lang: str, tgt_lang: str) -> str | None:
     url = os.getenv("TRANSLATE_URL", "https://libretranslate.de/translate")
     try:
-        resp = requests.post(url, timeout=10, data={
-            "q": text,
-            "source": src_lang,
-            "target": tgt_lang,
-            "format": "text",
-        }, headers={"accept": "application/json"})
+        # Fails fast (None: the caller keeps the untranslated text) while LibreTranslate is down or slow
+        with guard("translate", 10) as call, upstream(url):
+            resp = requests.post(url, timeout=call.timeout, data={
+                "q": text,
+                "source": src_lang,
+                "target": tgt_lang,
+                "format": "text",
+            }, headers={"accept": "application/json"})
+            call.check(resp.status_code)
         if resp.status_code != 200:
             return None
         data = resp.json()
@@ -221,6 +453,11 @@ def _translate_text(text: str, src_lang: str, tgt_lang: str) -> str | None:
         return None
 
 
+# Word characters including Devanagari vowel signs, which `\w` and `\b` do not
+# treat as part of a word (danda excluded)
+_HI_WORD = r"\w\u0900-\u0963\u0966-\u097F"
+
+
 def _detect_price_intent_hi(text_hi: str):
     """Basic Hindi extractor for commodity and optional market.
     Examples: 'लखनऊ में प्याज का भाव', 'टमाटर की कीमत', 'आलू का रेट'
@@ -228,13 +465,13 @@ def _detect_price_intent_hi(text_hi: str):
     t = (text_hi or "").lower()
     # Market capture: ... में <city>
     market = None
-    mkt = re.search(r"\b(?:में|me|mai)\s+([\w\s]{3,})\b", t)
+    mkt = re.search(rf"(?<![{_HI_WORD}])(?:में|me|mai)\s+([{_HI_WORD}\s]{{3,}})(?![{_HI_WORD}])", t)
     if mkt:
         market = mkt.group(1).strip()
 
     patterns = [
-        r"\b([\w\s]{2,}?)\s*(?:का|की)?\s*(?:भाव|कीमत|दाम|रेट)\b",
-        r"(?:भाव|कीमत|दाम|रेट)\s*(?:का|की)?\s*([\w\s]{2,}?)\b",
+        rf"(?<![{_HI_WORD}])([{_HI_WORD}\s]{{2,}}?)\s*(?:का|की)?\s*(?:भाव|कीमत|दाम|रेट)(?![{_HI_WORD}])",
+        rf"(?:भाव|कीमत|दाम|रेट)\s*(?:का|की)?\s*([{_HI_WORD}\s]{{2,}}?)(?![{_HI_WORD}])",
     ]
     for p in patterns:
         m = re.search(p, t, flags=re.UNICODE)
@@ -0,0 +1,89 @@
+"""
+Startup warm-up: pay for the heavy imports and artifact loads before the first
+request instead of during it.
+
+The price code needs numpy, pandas and xgboost (which imports scikit-learn),
+and the crop model scikit-learn; they are imported lazily so management
+commands and tests start fast. Without a warm-up the first request in every
+worker pays for all of it, plus loading the booster, features.csv and training
+the crop model.
+
+The WARMUP setting picks how much AgriApiConfig.ready() does:
+
+    none     nothing (the default; manage.py commands, tests, runserver)
+    imports  import the heavy modules
+    models   also load the price model, the post-cutoff features and the crop model
+
+With MODEL_SERVER_SOCKET set the models live in the model server, so xgboost,
+scikit-learn and the models themselves are left out.
+
+Under gunicorn with preload_app (gunicorn.conf.py sets WARMUP=models) this runs
+once in the master before it forks, so workers start with everything loaded and
+share those pages copy-on-write. Nothing here starts threads or runs inference:
+threads do not survive fork, and XGBoost's OpenMP runtime must not be used in the
+master before forking.
+"""
+import importlib
+import time
+
+LEVELS = ("none", "imports", "models")
+
+# In dependency order; Commodity_Model/src is put on sys.path by warm_up() and
+# Model2 by smart_farming
+HEAVY_MODULES = (
+    "numpy",
+    "pandas",
+    "commodity_price",
+    "smart_farming",
+    "src.forecasting",
+    "src.data_preprocessing",
+)
+# Only needed where the models run: skipped when a model server holds them
+MODEL_MODULES = ("xgboost", "crop_model")
+
+
+def _load_models() -> None:
+    import commodity_price
+    import smart_farming
+
+    from .model_server import client
+
+    commodity_price._read_test_frame()
+    # With a model server the models live there, not in every worker
+    if client() is None:
+        commodity_price.load_model()
+        smart_farming.crop_recommender()
+
+
+def warm_up(level: str = "models") -> dict:
+    """
+    Import (and for "models" load) everything the API needs; returns seconds per
+    step. Failures are printed, never raised: a missing model must not stop the
+    server from starting, the affected endpoints report it themselves.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"WARMUP must be one of {', '.join(LEVELS)}, not {level!r}")
+    timings = {}
+
+    def step(name, func):
+        started = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            print(f"[warmup] {name} failed: {e}")
+        timings[name] = round(time.perf_counter() - started, 3)
+
+    if level == "none":
+        return timings
+    from commodity_price import add_commodity_path
+
+    from .model_server import client
+
+    add_commodity_path()
+
+    modules = HEAVY_MODULES if client() is not None else HEAVY_MODULES + MODEL_MODULES
+    for module in modules:
+        step(module, lambda module=module: importlib.import_module(module))
+    if level == "models":
+        step("models", _load_models)
+    return timings
@@ -54,9 +54,15 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'corsheaders',
+    'agri_api',
 ]
 
 MIDDLEWARE = [
+    'agri_api.metrics.MetricsMiddleware',
+    'agri_api.traffic.TrafficRecorderMiddleware',
+    'agri_api.querylog.QueryLogMiddleware',
+    'agri_api.breaker.DeadlineMiddleware',
+    'agri_api.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -90,14 +96,204 @@ WSGI_APPLICATION = 'base.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# DB_BACKEND: "sqlite" (default, single node) or "postgres" (DATABASE_URL, or
+# the POSTGRES_* variables; needs `psycopg[binary,pool]`).
+
+DB_BACKEND = os.getenv('DB_BACKEND', 'postgres' if os.getenv('DATABASE_URL') else 'sqlite').lower()
+# Seconds a connection is reused across requests instead of reopened for each
+# one (0 = per request, empty = forever). Keep 0 under ASGI, where every
+# request runs in its own thread and persistent connections pile up.
+_conn_max_age = os.getenv('DB_CONN_MAX_AGE', '60')
+DB_CONN_MAX_AGE = int(_conn_max_age) if _conn_max_age else None
+
+if DB_BACKEND == 'postgres':
+    from urllib.parse import unquote, urlparse
+
+    _db_url = urlparse(os.getenv('DATABASE_URL', ''))
+    # psycopg's connection pool (Django 5.1+) replaces persistent connections
+    _db_pool = os.getenv('DB_POOL', 'true').lower() == 'true'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': unquote(_db_url.path.lstrip('/')) or os.getenv('POSTGRES_DB', 'agri'),
+            'USER': unquote(_db_url.username or '') or os.getenv('POSTGRES_USER', ''),
+            'PASSWORD': unquote(_db_url.password or '') or os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': _db_url.hostname or os.getenv('POSTGRES_HOST', 'localhost'),
+            'PORT': _db_url.port or os.getenv('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if _db_pool else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                    'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+                },
+            } if _db_pool else {},
+        }
+    }
+else:
+    # Run on every new connection. WAL lets readers and the writer proceed
+    # together; synchronous=NORMAL is durable with WAL (fsync at checkpoints).
+    SQLITE_PRAGMAS = ';'.join([
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        'PRAGMA cache_size=-20000',  # 20 MB page cache
+        'PRAGMA temp_store=MEMORY',
+        'PRAGMA mmap_size=134217728',
+    ])
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': SQLITE_PRAGMAS,
+                # Take the write lock at BEGIN: a deferred transaction that reads
+                # first fails with "database is locked" instead of waiting.
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds to wait for the write lock (busy_timeout)
+                'timeout': int(os.getenv('SQLITE_TIMEOUT', '20')),
+            },
+        }
+    }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Shared by all gunicorn workers so warm entries survive across processes.
+# CACHE_BACKEND: "file" (default), "db" (SQLite table, run `createcachetable`),
+# "redis" (needs REDIS_URL and the redis package) or "locmem" (per process).
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'redis' if os.getenv('REDIS_URL') else 'file').lower()
+CACHE_DIR = Path(os.getenv('CACHE_DIR', BASE_DIR / '.cache'))
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+_cache_common = {
+    'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'agri'),
+    # Bump to invalidate every entry at once (e.g. after a response format change)
+    'VERSION': int(os.getenv('CACHE_VERSION', '1')),
+    'TIMEOUT': int(os.getenv('CACHE_DEFAULT_TIMEOUT', '3600')),
+}
+# Eviction for the file/db/locmem backends: once MAX_ENTRIES is reached,
+# 1/CULL_FREQUENCY of the entries are dropped. Redis evicts by its own
+# maxmemory-policy (use allkeys-lru).
+_cache_cull = {
+    'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '5000')),
+    'CULL_FREQUENCY': int(os.getenv('CACHE_CULL_FREQUENCY', '4')),
+}
+
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+            **_cache_common,
+        }
+    }
+elif CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'agri_cache',
+            'OPTIONS': _cache_cull,
+            **_cache_common,
+        }
     }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': _cache_cull,
+            **_cache_common,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR / 'django',
+            'OPTIONS': _cache_cull,
+            **_cache_common,
+        }
+    }
+
+# Per-namespace lifetimes (seconds) and versions used by agri_api.cache.get_or_compute
+CACHE_TIMEOUTS = {
+    'price': 24 * 60 * 60,
+    'weather': int(os.getenv('WEATHER_CACHE_TIMEOUT', str(30 * 60))),
+    'translate': 7 * 24 * 60 * 60,
+}
+CACHE_NAMESPACE_VERSIONS = {
+    'price': 1,
+    'weather': 1,
+    'translate': 1,
 }
 
+# Synthesized TTS audio: content-addressed files, LRU-evicted above the size cap (agri_api.tts)
+TTS_AUDIO_CACHE_DIR = Path(os.getenv('TTS_AUDIO_CACHE_DIR', CACHE_DIR / 'tts'))
+TTS_AUDIO_CACHE_MAX_BYTES = int(os.getenv('TTS_AUDIO_CACHE_MAX_MB', '200')) * 1024 * 1024
+# Sentences synthesized in parallel by /api/text-to-speech/stream/
+TTS_STREAM_CONCURRENCY = int(os.getenv('TTS_STREAM_CONCURRENCY', '3'))
+
+# What agri_api loads at startup (agri_api.warmup): none, imports or models.
+# gunicorn.conf.py sets models, so a preloaded master warms once for all workers.
+WARMUP = os.getenv('WARMUP', 'none').lower()
+
+# Optional model server (`python manage.py model_server`, agri_api.model_server):
+# when set, workers send feature rows to this Unix socket instead of loading the
+# price and crop models themselves, and predict in-process while it is down
+MODEL_SERVER_SOCKET = os.getenv('MODEL_SERVER_SOCKET') or None
+MODEL_SERVER_TIMEOUT = float(os.getenv('MODEL_SERVER_TIMEOUT', '2'))
+# How long the server gathers concurrent requests into one predict call
+MODEL_SERVER_WINDOW_MS = float(os.getenv('MODEL_SERVER_WINDOW_MS', '2'))
+
+# Concurrent predict_price calls in one process wait up to this long for each
+# other and share one model.predict (commodity_price.price_batcher); 0 turns it off
+PRICE_BATCH_WINDOW_MS = float(os.getenv('PRICE_BATCH_WINDOW_MS', '2'))
+
+# External providers (agri_api.breaker): each /api/ request gets REQUEST_DEADLINE_SECONDS
+# for all its upstream calls (0 = none); a provider's breaker opens when at least
+# BREAKER_MIN_CALLS calls of the last BREAKER_WINDOW_SECONDS were made and
+# BREAKER_FAILURE_RATE of them failed or took over BREAKER_SLOW_CALL_SECONDS, and
+# lets one probe through after BREAKER_OPEN_SECONDS. Meanwhile the views fall back
+# to untranslated text and no audio.
+REQUEST_DEADLINE_SECONDS = float(os.getenv('REQUEST_DEADLINE_SECONDS', '8'))
+BREAKER_WINDOW_SECONDS = float(os.getenv('BREAKER_WINDOW_SECONDS', '30'))
+BREAKER_MIN_CALLS = int(os.getenv('BREAKER_MIN_CALLS', '5'))
+BREAKER_FAILURE_RATE = float(os.getenv('BREAKER_FAILURE_RATE', '0.5'))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv('BREAKER_SLOW_CALL_SECONDS', '5'))
+BREAKER_OPEN_SECONDS = float(os.getenv('BREAKER_OPEN_SECONDS', '15'))
+
+# Threads shared by agri_api process_speech_view for translation and model lookups
+SPEECH_PIPELINE_WORKERS = int(os.getenv('SPEECH_PIPELINE_WORKERS', '8'))
+
+# Latency histograms served at /metrics (agri_api.metrics); SERVER_TIMING adds a
+# per-request Server-Timing header with the stage and upstream spans
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'
+
+# Record API requests as JSONL for benchmarks/replay.py (agri_api.traffic); off when unset
+TRAFFIC_LOG_PATH = os.getenv('TRAFFIC_LOG_PATH') or None
+TRAFFIC_LOG_SAMPLE = float(os.getenv('TRAFFIC_LOG_SAMPLE', '1.0'))
+
+# Who asks for what: every API request as an agri_api.models.QueryLog row,
+# queued in memory and bulk-inserted by a background thread (agri_api.querylog)
+QUERY_LOG_ENABLED = os.getenv('QUERY_LOG_ENABLED', 'true').lower() == 'true'
+QUERY_LOG_FLUSH_SECONDS = float(os.getenv('QUERY_LOG_FLUSH_SECONDS', '2'))
+QUERY_LOG_BATCH_SIZE = int(os.getenv('QUERY_LOG_BATCH_SIZE', '500'))
+QUERY_LOG_MAX_PENDING = int(os.getenv('QUERY_LOG_MAX_PENDING', '10000'))
+
+# `python manage.py prewarm`: warm the caches for the most requested prices and
+# cities of the last PREWARM_DAYS days, within PREWARM_BUDGET_SECONDS (agri_api.prewarm)
+PREWARM_TOP = int(os.getenv('PREWARM_TOP', '20'))
+PREWARM_CITIES = int(os.getenv('PREWARM_CITIES', '10'))
+PREWARM_DAYS = int(os.getenv('PREWARM_DAYS', '7'))
+PREWARM_BUDGET_SECONDS = float(os.getenv('PREWARM_BUDGET_SECONDS', '120'))
+
+# HTTP caching of the price endpoints (agri_api.cache.cache_response)
+API_CACHE_MAX_AGE = int(os.getenv('API_CACHE_MAX_AGE', '300'))
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', str(24 * 60 * 60)))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -139,6 +335,19 @@ STATICFILES_DIRS = [
 
 STATIC_URL = 'static/'
 
+# collectstatic writes content-hashed copies (styles.3f2a1c.css) plus .gz
+# (and .br when the Brotli package is installed) next to them; WhiteNoise
+# serves the hashed names with a far-future, immutable Cache-Control and
+# picks the precompressed variant from Accept-Encoding.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
+
+# JSON API responses at least this large are compressed per request
+# (agri_api.compression.CompressionMiddleware); base64 TTS audio is the main case.
+API_COMPRESS_MIN_BYTES = int(os.getenv('API_COMPRESS_MIN_BYTES', '1024'))
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -16,12 +16,13 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path,include
-from .views import index, process_speech, text_to_speech
+from .views import index, text_to_speech
+from agri_api.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', index, name='index'),
-    path('api/process-speech/', process_speech, name='process_speech'),
+    path('metrics', metrics_view, name='metrics'),
     path('api/text-to-speech/', text_to_speech, name='text_to_speech'),
     path('api/', include('agri_api.urls')),
 ]
@@ -0,0 +1,162 @@
+"""
+Load test: one sync worker vs one async (ASGI) worker against local stub services.
+
+Both sides run in this process. The sync side is the WSGI application driven
+by `--sync-threads` threads, i.e. one gunicorn gthread worker (`--threads`).
+The async side is the ASGI application serving the /api/async/ routes on one
+event loop. Upstream calls go to a stub (benchmarks/stubs.py, in a child
+process) that answers after `--delay` seconds and reports how many calls it
+saw in flight at once.
+
+    python benchmarks/async_load.py --endpoint tts --requests 400 --concurrency 300 --delay 1
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.stubs import StubProcess  # noqa: E402
+
+# sync path, async path, request builder(i) -> (method, params or json body)
+ENDPOINTS = {
+    "advisory": (
+        "/api/advisory/",
+        "/api/async/advisory/",
+        lambda i: ("GET", {"city": "Varanasi", "ph": str(6.0 + (i % 10) / 10)}),
+    ),
+    "process-speech": (
+        "/api/process-speech/",
+        "/api/async/process-speech/",
+        lambda i: ("POST", {"spoken_text": f"price of onion in Varanasi {i}", "language": "hi-IN"}),
+    ),
+    "tts": (
+        "/api/text-to-speech/",
+        "/api/async/text-to-speech/",
+        lambda i: ("POST", {"text": f"Onion price is likely to increase, request {i}.", "language": "en-IN"}),
+    ),
+}
+
+
+def _summary(path, latencies, statuses, elapsed, stats):
+    latencies.sort()
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+        "statuses": statuses,
+        "upstream_peak_in_flight": stats["peak_in_flight"],
+    }
+
+
+def run_sync(path, build, total, threads, offset, stub):
+    import httpx
+    from base.wsgi import application
+
+    latencies = []
+    statuses = {}
+    client = httpx.Client(transport=httpx.WSGITransport(app=application), base_url="http://localhost", timeout=None)
+
+    def one(i):
+        method, data = build(offset + i)
+        started = time.perf_counter()
+        if method == "GET":
+            resp = client.get(path, params=data)
+        else:
+            resp = client.post(path, json=data)
+        latencies.append(time.perf_counter() - started)
+        statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    stub.stats()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+    return _summary(path, latencies, statuses, elapsed, stub.stats())
+
+
+async def _run_async(path, build, total, concurrency, offset):
+    import httpx
+    from base.asgi import application
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+    transport = httpx.ASGITransport(app=application)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=None) as client:
+        async def one(i):
+            method, data = build(offset + i)
+            async with sem:
+                started = time.perf_counter()
+                if method == "GET":
+                    resp = await client.get(path, params=data)
+                else:
+                    resp = await client.post(path, json=data)
+                latencies.append(time.perf_counter() - started)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def run_async(path, build, total, concurrency, offset, stub):
+    stub.stats()
+    latencies, statuses, elapsed = asyncio.run(_run_async(path, build, total, concurrency, offset))
+    return _summary(path, latencies, statuses, elapsed, stub.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="tts")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=300, help="client requests in flight")
+    parser.add_argument("--sync-threads", type=int, default=8, help="threads of the sync (gthread) worker")
+    parser.add_argument("--delay", type=float, default=1.0, help="stub latency per upstream call (s)")
+    args = parser.parse_args()
+
+    stub = StubProcess(delay=args.delay)
+    os.environ.update(stub.env())
+    # Per-process cache with weather entries expiring at once, so every
+    # advisory waits on the (stub) provider
+    os.environ.setdefault("CACHE_BACKEND", "locmem")
+    os.environ.setdefault("WEATHER_CACHE_TIMEOUT", "0")
+    os.environ.setdefault("TTS_AUDIO_CACHE_DIR", tempfile.mkdtemp(prefix="agri-load-tts-"))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base.settings")
+    import django
+
+    django.setup()
+
+    sync_path, async_path, build = ENDPOINTS[args.endpoint]
+    try:
+        # Distinct inputs per run so neither side is served from the caches
+        results = [
+            run_sync(sync_path, build, args.requests, args.sync_threads, 0, stub),
+            run_async(async_path, build, args.requests, args.concurrency, args.requests, stub),
+        ]
+    finally:
+        stub.close()
+
+    for r in results:
+        print(
+            f"{r['path']:<30} {r['requests']} req in {r['elapsed_s']}s  {r['throughput_rps']} req/s  "
+            f"p50 {r['p50_ms']} ms  p95 {r['p95_ms']} ms  upstream in flight {r['upstream_peak_in_flight']}  "
+            f"{r['statuses']}"
+        )
+    print(f"speedup: {results[1]['throughput_rps'] / results[0]['throughput_rps']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Concurrent predict_price() calls with and without the prediction coalescer
+(PRICE_BATCH_WINDOW_MS, commodity_price.price_batcher).
+
+    python benchmarks/batching.py
+    python benchmarks/batching.py --clients 1,10,100 --requests 2000 --windows 0,2,5
+
+Runs in-process, the way one gunicorn worker's threads share the model: each
+of --clients threads issues predict_price() calls back to back over the
+commodity/market pairs of the post-cutoff features, --requests in total. Per
+client count and window it reports throughput, latency and the mean number of
+calls that shared one model.predict.
+
+Needs a trained model and Commodity_Model/data/processed/features.csv.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import _git, summarize  # noqa: E402
+
+
+def workload(limit: int = 200) -> list:
+    """(commodity, market) pairs with recent rows, the shape of real /api/price/ traffic."""
+    import commodity_price
+
+    test = commodity_price._read_test_frame()
+    pairs = test[["Commodity", "Market"]].drop_duplicates().astype(str).head(limit)
+    return [(c.lower(), m) for c, m in pairs.itertuples(index=False)]
+
+
+def run(clients: int, requests: int, window_ms: float, pairs: list) -> dict:
+    import commodity_price
+
+    os.environ["PRICE_BATCH_WINDOW_MS"] = str(window_ms)
+    batcher = commodity_price.price_batcher()
+    calls, batches = (batcher.calls, batcher.batches) if batcher else (0, 0)
+
+    per_client = max(requests // clients, 1)
+    latencies, errors = [], []
+    lock = threading.Lock()
+    start = threading.Barrier(clients + 1)
+
+    def client(n: int) -> None:
+        mine, failed = [], 0
+        start.wait()
+        for i in range(per_client):
+            commodity, market = pairs[(n * per_client + i) % len(pairs)]
+            started = time.perf_counter()
+            if not commodity_price.predict_price(commodity, market).get("ok"):
+                failed += 1
+            mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for t in threads:
+        t.start()
+    start.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed, sum(errors))
+    if batcher:
+        calls, batches = batcher.calls - calls, batcher.batches - batches
+        result["mean_batch"] = round(calls / batches, 2) if batches else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,10,100", help="comma-separated concurrent client counts")
+    parser.add_argument("--requests", type=int, default=1000, help="predict_price calls per run")
+    parser.add_argument("--windows", default="0,2", help="comma-separated PRICE_BATCH_WINDOW_MS values; 0 is off")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    import commodity_price
+
+    pairs = workload()
+    commodity_price.predict_price(*pairs[0])  # load the model and the frame outside the timings
+
+    results = {"environment": {"git_commit": _git("rev-parse", "HEAD"), "python": sys.version.split()[0]}, "benchmarks": {}}
+    print(f"{'clients':>7} {'window':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'batch':>6}")
+    for clients in (int(c) for c in args.clients.split(",")):
+        for window in (float(w) for w in args.windows.split(",")):
+            r = results["benchmarks"][f"c{clients}_w{window:g}"] = run(clients, args.requests, window, pairs)
+            print(
+                f"{clients:>7} {window:>5g}ms {r['throughput_per_s']:>9.1f} {r['p50_ms']:>9.2f} "
+                f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r.get('mean_batch') or 1:>6}",
+                flush=True,
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Concurrent SQLite writes: Django's default settings against the tuned ones in
+base/settings.py (WAL, IMMEDIATE transactions, longer busy timeout, persistent
+connections).
+
+    python benchmarks/db_writes.py
+    python benchmarks/db_writes.py --workers 8 --requests 300 --read-ms 2
+
+Each worker process plays a gunicorn worker handling --requests requests. A
+request opens a transaction, reads (a lookup, optionally holding the
+transaction --read-ms longer) and then inserts a log row, the shape of a query
+log or profile update. With the default config every request also opens and
+closes its own connection (CONN_MAX_AGE=0).
+
+Reports throughput, latency and the requests that failed with
+"database is locked" per config. Runs on a temporary database.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import summarize  # noqa: E402
+
+
+def configs(path: str) -> dict:
+    from base import settings as app_settings
+
+    default = {"ENGINE": "django.db.backends.sqlite3", "NAME": path, "CONN_MAX_AGE": 0}
+    tuned = {**app_settings.DATABASES["default"], "NAME": path, "CONN_MAX_AGE": 60}
+    if tuned["ENGINE"] != "django.db.backends.sqlite3":
+        raise SystemExit("base.settings is not configured for SQLite (DB_BACKEND)")
+    return {"default": default, "tuned": tuned}
+
+
+def _setup(database: dict) -> None:
+    import django
+    from django.conf import settings
+
+    settings.configure(DATABASES={"default": database}, USE_TZ=True)
+    django.setup()
+
+
+def _create_table(database: dict) -> None:
+    from django.db import connection
+
+    _setup(database)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TABLE IF NOT EXISTS bench_log ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, worker INTEGER, request INTEGER, payload TEXT)"
+        )
+    connection.close()
+
+
+def _worker(database: dict, worker: int, requests: int, read_ms: float, start_at: float, out) -> None:
+    from django.db import OperationalError, close_old_connections, connection, transaction
+
+    _setup(database)
+    latencies, locked = [], 0
+    while time.time() < start_at:
+        time.sleep(0.001)
+    for i in range(requests):
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT COUNT(*) FROM bench_log WHERE worker = %s", [worker])
+                    cursor.fetchone()
+                    if read_ms:
+                        time.sleep(read_ms / 1000)
+                    cursor.execute(
+                        "INSERT INTO bench_log (worker, request, payload) VALUES (%s, %s, %s)",
+                        [worker, i, "x" * 200],
+                    )
+        except OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            locked += 1
+        latencies.append(time.perf_counter() - started)
+        # End of request: Django's request_finished handler
+        close_old_connections()
+    out.put({"latencies": latencies, "locked": locked})
+
+
+def run(database: dict, workers: int, requests: int, read_ms: float) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    setup = ctx.Process(target=_create_table, args=(database,))
+    setup.start()
+    setup.join()
+
+    out = ctx.Queue()
+    start_at = time.time() + 1.5  # let every worker finish importing Django
+    procs = [ctx.Process(target=_worker, args=(database, w, requests, read_ms, start_at, out)) for w in range(workers)]
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    elapsed = time.time() - start_at
+    for p in procs:
+        p.join()
+
+    latencies = [lat for r in results for lat in r["latencies"]]
+    locked = sum(r["locked"] for r in results)
+    summary = summarize(latencies, elapsed, locked)
+    summary["locked_rate"] = round(locked / len(latencies), 4)
+    summary["committed_per_s"] = round((len(latencies) - locked) / elapsed, 1)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per worker")
+    parser.add_argument("--read-ms", type=float, default=1.0, help="time between the read and the write")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base.settings")
+    results = {}
+    print(f"{args.workers} workers x {args.requests} requests, {args.read_ms} ms between read and write")
+    print(f"{'config':<8} {'committed/s':>12} {'locked':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, database in configs("").items():
+        with tempfile.TemporaryDirectory(prefix="agri-db-bench-") as tmp:
+            database = {**database, "NAME": os.path.join(tmp, "bench.sqlite3")}
+            r = results[name] = run(database, args.workers, args.requests, args.read_ms)
+        print(
+            f"{name:<8} {r['committed_per_s']:>12} {r['locked_rate']:>8.1%} {r['p50_ms']:>9.2f} "
+            f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['max_ms']:>9.1f}",
+            flush=True,
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
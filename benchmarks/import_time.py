@@ -0,0 +1,140 @@
+"""
+Import-time profile of the app's startup paths, for tracking in CI.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeats 10 --output import_time.json
+    python benchmarks/import_time.py --baseline old.json --fail-on-regression --check
+
+Each target runs in a fresh interpreter under `python -X importtime`, --repeats
+times. Per target it reports the wall time percentiles and the packages that
+take longest to import (self time of all their modules, from the median run):
+
+    django           django.setup() + URLconf with WARMUP=none (manage.py, tests, a worker
+                     without preload)
+    commodity_price  the module alone (the cached price path imports it for artifact_version())
+    price_code       numpy, pandas and the Commodity_Model code a price request imports
+    smart_farming    Model2 helpers, without the crop model
+    crop_model       scikit-learn
+    warmup_models    django.setup() with WARMUP=models: what a preloaded gunicorn master does
+
+`--check` fails when the `django` or `commodity_price` target imports any of
+LAZY_MODULES: they must stay behind function-level imports and the warm-up. `--baseline` compares with an
+earlier result file the way benchmarks/run.py does.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import _git, compare, summarize  # noqa: E402
+
+_DJANGO = "import django; django.setup(); import base.urls"
+# name -> (code, extra environment)
+TARGETS = {
+    "django": (_DJANGO, {"WARMUP": "none"}),
+    "commodity_price": ("import commodity_price", {}),
+    "price_code": (
+        "import commodity_price; commodity_price.add_commodity_path(); "
+        "import numpy, pandas, src.forecasting, src.data_preprocessing", {},
+    ),
+    "smart_farming": ("import smart_farming", {}),
+    "crop_model": ("import smart_farming, crop_model", {}),
+    "warmup_models": (_DJANGO, {"WARMUP": "models"}),
+}
+LAZY_MODULES = ("numpy", "pandas", "joblib", "xgboost", "sklearn", "scipy")
+# Targets --check holds to LAZY_MODULES
+CHECKED_TARGETS = ("django", "commodity_price")
+
+_WRAPPER = """
+import sys, time, warnings
+warnings.simplefilter("ignore")
+started = time.perf_counter()
+{code}
+print(time.perf_counter() - started)
+"""
+# import time:       self [us] |   cumulative | imported package
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| *(\S+)")
+
+
+def profile_once(code: str, env: dict) -> tuple[float, dict]:
+    """Run `code` in a fresh interpreter; returns (seconds, {top-level package: summed self ms})."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _WRAPPER.format(code=code)],
+        cwd=ROOT, env={**os.environ, "DJANGO_SETTINGS_MODULE": "base.settings", **env},
+        capture_output=True, text=True, check=True,
+    )
+    packages = {}
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            package = match.group(2).split(".")[0]
+            packages[package] = packages.get(package, 0) + int(match.group(1)) / 1000
+    return float(proc.stdout.split()[-1]), packages
+
+
+def profile(code: str, env: dict, repeats: int, top: int) -> dict:
+    runs = [profile_once(code, env) for _ in range(repeats)]
+    packages = sorted(runs, key=lambda r: r[0])[len(runs) // 2][1]
+    result = summarize([seconds for seconds, _ in runs], 0)
+    result["top_packages_ms"] = {
+        name: round(ms, 1) for name, ms in sorted(packages.items(), key=lambda kv: -kv[1])[:top]
+    }
+    result["lazy_imported"] = sorted(m for m in LAZY_MODULES if m in packages)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="comma-separated targets: " + ", ".join(TARGETS))
+    parser.add_argument("--repeats", type=int, default=5, help="fresh interpreters per target")
+    parser.add_argument("--top", type=int, default=8, help="slowest packages listed per target")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--check", action="store_true", help="fail if a CHECKED_TARGETS entry imports a LAZY_MODULES entry")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(TARGETS)
+    unknown = set(names) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    results = {
+        "environment": {"git_commit": _git("rev-parse", "HEAD"), "python": sys.version.split()[0], "repeats": args.repeats},
+        "benchmarks": {},
+    }
+    for name in names:
+        code, env = TARGETS[name]
+        r = results["benchmarks"][name] = profile(code, env, args.repeats, args.top)
+        top = ", ".join(f"{m} {ms:.0f}" for m, ms in r["top_packages_ms"].items())
+        print(f"{name:<16} p50 {r['p50_ms']:>8.1f} ms  max {r['max_ms']:>8.1f} ms   {top}", flush=True)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+    failed = False
+    for name in CHECKED_TARGETS if args.check else ():
+        eager = results["benchmarks"].get(name, {}).get("lazy_imported")
+        if eager:
+            print(f"\n{name} imports {', '.join(eager)}; keep them behind function-level imports")
+            failed = True
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(json.load(fh), results, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"\nregressed: {', '.join(regressions)}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Compare the two price-model artifacts: the joblib-pickled XGBRegressor and the
+native booster export (UBJSON) served through a raw xgb.Booster.
+
+    python benchmarks/model_formats.py
+    python benchmarks/model_formats.py --iterations 2000 --repeats 5 --output formats.json
+
+Measures, for each format:
+  - cold start: import + load in a fresh interpreter (median of --repeats)
+  - single-row predict latency on a one-row DataFrame, as the API calls it
+  - batch predict latency over the post-cutoff feature rows
+and checks that both give the same predictions. Export the booster first if it
+is missing: `cd Commodity_Model && python -m src.model_training`.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import summarize  # noqa: E402
+
+# Run in a fresh interpreter; prints seconds for import + load and whether sklearn got imported
+_COLD_START = {
+    "pickle": "import joblib; model = joblib.load({path!r})",
+    "booster": "import xgboost as xgb; model = xgb.Booster(); model.load_model({path!r})",
+}
+_COLD_START_WRAPPER = """
+import sys, time, warnings
+warnings.simplefilter("ignore")
+started = time.perf_counter()
+{code}
+print(time.perf_counter() - started, "sklearn" in sys.modules)
+"""
+
+
+def cold_start(fmt: str, path: str, repeats: int) -> dict:
+    times, sklearn = [], False
+    for _ in range(repeats):
+        code = _COLD_START_WRAPPER.format(code=_COLD_START[fmt].format(path=path))
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+        sklearn = out[1] == "True"
+    return {"median_ms": round(statistics.median(times) * 1000, 1), "min_ms": round(min(times) * 1000, 1),
+            "imports_sklearn": sklearn}
+
+
+def latency(predict, X, iterations: int) -> dict:
+    for _ in range(min(10, iterations)):
+        predict(X)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        predict(X)
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500, help="single-row predict calls")
+    parser.add_argument("--batch-iterations", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3, help="fresh interpreters per cold-start measurement")
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    import joblib
+    import numpy as np
+    import pandas as pd
+    from commodity_price import BoosterModel, add_commodity_path
+
+    add_commodity_path()
+    from src import config  # type: ignore
+
+    if not os.path.exists(config.BOOSTER_PATH):
+        raise SystemExit(f"{config.BOOSTER_PATH} missing; run `python -m src.model_training` in Commodity_Model")
+
+    warnings.simplefilter("ignore")
+    models = {"pickle": joblib.load(config.MODEL_PATH), "booster": BoosterModel(config.BOOSTER_PATH)}
+    paths = {"pickle": config.MODEL_PATH, "booster": config.BOOSTER_PATH}
+
+    df = pd.read_csv(config.PROCESSED_DATA_PATH, parse_dates=["Arrival_Date"])
+    batch = df[df["Arrival_Date"] >= pd.Timestamp(config.CUTOFF_DATE)][config.FEATURE_COLS]
+    row = batch.iloc[[-1]]
+
+    diff = float(np.max(np.abs(models["pickle"].predict(batch) - models["booster"].predict(batch))))
+    results = {"batch_rows": len(batch), "max_abs_diff": diff, "formats": {}}
+    for fmt, model in models.items():
+        results["formats"][fmt] = {
+            "file_bytes": os.path.getsize(paths[fmt]),
+            "cold_start": cold_start(fmt, paths[fmt], args.repeats),
+            "single_row": latency(model.predict, row, args.iterations),
+            "batch": latency(model.predict, batch, args.batch_iterations),
+        }
+
+    print(f"{'format':<8} {'file KB':>8} {'cold start ms':>14} {'sklearn':>8} {'row p50 ms':>11} {'row p99 ms':>11} "
+          f"{'batch p50 ms':>13}")
+    for fmt, r in results["formats"].items():
+        print(
+            f"{fmt:<8} {r['file_bytes'] / 1024:>8.0f} {r['cold_start']['median_ms']:>14.1f} "
+            f"{str(r['cold_start']['imports_sklearn']):>8} {r['single_row']['p50_ms']:>11.3f} "
+            f"{r['single_row']['p99_ms']:>11.3f} {r['batch']['p50_ms']:>13.2f}"
+        )
+    print(f"\nbatch of {len(batch)} rows; max |pickle - booster| = {diff:.3g}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Replay recorded API traffic (JSONL) against a running instance.
+
+Logs come from agri_api.traffic (set TRAFFIC_LOG_PATH on the server), one
+request per line: ts, method, path, query, content_type, body.
+
+    # original pacing, twice as fast, at most 64 requests in flight
+    python benchmarks/replay.py traffic.jsonl --target http://127.0.0.1:8000 --speed 2 --concurrency 64
+    # fixed 50 req/s regardless of the recorded timestamps, 3 passes over the log
+    python benchmarks/replay.py traffic.jsonl --rate 50 --loop 3
+    # as fast as the server answers
+    python benchmarks/replay.py traffic.jsonl --speed 0 --concurrency 16
+    # size gunicorn from the recorded durations alone (no requests sent)
+    python benchmarks/replay.py traffic.jsonl --analyze --threads 4
+
+Reports throughput, latency percentiles and error rate per endpoint, plus the
+requests in flight, which is what the worker count has to cover.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.run import summarize  # noqa: E402
+
+# Path segments that are identifiers (cache keys, hashes, numbers) group as one endpoint
+_ID_SEGMENT_RE = re.compile(r"^(?:[0-9a-f]{16,}|\d+)$", re.IGNORECASE)
+
+
+def endpoint(entry: dict) -> str:
+    parts = ["<id>" if _ID_SEGMENT_RE.match(p) else p for p in entry.get("path", "/").split("/")]
+    return f"{entry.get('method', 'GET')} {'/'.join(parts)}"
+
+
+def load_log(path: str) -> list:
+    entries, bad = [], 0
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                bad += 1
+                continue
+            if isinstance(entry, dict) and entry.get("path"):
+                entries.append(entry)
+            else:
+                bad += 1
+    if bad:
+        print(f"skipped {bad} malformed line(s)", file=sys.stderr)
+    entries.sort(key=lambda e: e.get("ts") or 0)
+    return entries
+
+
+def schedule(entries: list, speed: float, rate: float | None, loops: int) -> list:
+    """(offset seconds, entry) pairs: recorded pacing / speed, a fixed rate, or all at once."""
+    out = []
+    first = entries[0].get("ts") if entries and entries[0].get("ts") is not None else None
+    span = 0.0
+    if first is not None:
+        span = ((entries[-1].get("ts") or first) - first)
+    for loop in range(loops):
+        for i, entry in enumerate(entries):
+            if rate:
+                offset = (loop * len(entries) + i) / rate
+            elif speed > 0 and first is not None:
+                # Each pass starts one mean gap after the previous one ended
+                gap = span / max(1, len(entries) - 1)
+                offset = (loop * (span + gap) + ((entry.get("ts") or first) - first)) / speed
+            else:
+                offset = 0.0
+            out.append((offset, entry))
+    return out
+
+
+def _peak_overlap(intervals: list) -> int:
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    peak = current = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+def sizing(mean_in_flight: float, peak_in_flight: int, threads: int) -> dict:
+    return {
+        "mean_in_flight": round(mean_in_flight, 2),
+        "peak_in_flight": peak_in_flight,
+        "threads_per_worker": threads,
+        # gthread workers needed to hold the peak without queueing
+        "workers_for_peak": max(1, math.ceil(peak_in_flight / threads)),
+        "workers_for_mean": max(1, math.ceil(mean_in_flight / threads)),
+    }
+
+
+def analyze(entries: list, threads: int) -> dict:
+    """Traffic shape and in-flight requests from the recorded timestamps and durations."""
+    timed = [e for e in entries if e.get("ts") is not None]
+    if not timed:
+        raise SystemExit("log has no timestamps to analyze")
+    intervals = [(e["ts"], e["ts"] + (e.get("duration_ms") or 0) / 1000) for e in timed]
+    start, end = intervals[0][0], max(i[1] for i in intervals)
+    wall = max(end - start, 1e-9)
+    per_second = defaultdict(int)
+    for e in timed:
+        per_second[int(e["ts"])] += 1
+
+    by_endpoint = defaultdict(list)
+    for e in timed:
+        by_endpoint[endpoint(e)].append(e)
+    endpoints = {}
+    for name, group in sorted(by_endpoint.items()):
+        durations = [(g.get("duration_ms") or 0) / 1000 for g in group]
+        errors = sum(1 for g in group if (g.get("status") or 0) >= 400)
+        summary = summarize(durations, wall, errors)
+        summary["error_rate"] = round(errors / len(group), 4)
+        endpoints[name] = summary
+
+    busy = sum(e - s for s, e in intervals)
+    return {
+        "requests": len(timed),
+        "duration_s": round(wall, 3),
+        "mean_rps": round(len(timed) / wall, 2),
+        "peak_rps_1s": max(per_second.values()),
+        "sizing": sizing(busy / wall, _peak_overlap(intervals), threads),
+        "endpoints": endpoints,
+    }
+
+
+async def replay(target: str, plan: list, concurrency: int, timeout: float) -> dict:
+    import httpx
+
+    sem = asyncio.Semaphore(concurrency)
+    records = []
+    in_flight = 0
+    peak_in_flight = 0
+    max_lag = 0.0
+
+    async with httpx.AsyncClient(
+        base_url=target, timeout=timeout, limits=httpx.Limits(max_connections=concurrency)
+    ) as client:
+        started = time.perf_counter()
+
+        async def send(offset: float, entry: dict):
+            nonlocal in_flight, peak_in_flight, max_lag
+            delay = offset - (time.perf_counter() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with sem:
+                max_lag = max(max_lag, time.perf_counter() - started - offset)
+                url = entry["path"] + (f"?{entry['query']}" if entry.get("query") else "")
+                kwargs = {}
+                body = entry.get("body")
+                if body is not None:
+                    if isinstance(body, (dict, list)):
+                        kwargs["json"] = body
+                    else:
+                        kwargs["content"] = str(body).encode("utf-8")
+                        if entry.get("content_type"):
+                            kwargs["headers"] = {"content-type": entry["content_type"]}
+                in_flight += 1
+                peak_in_flight = max(peak_in_flight, in_flight)
+                t0 = time.perf_counter()
+                status, error = None, None
+                try:
+                    resp = await client.request(entry.get("method", "GET"), url, **kwargs)
+                    await resp.aread()
+                    status = resp.status_code
+                except Exception as e:
+                    error = type(e).__name__
+                finally:
+                    in_flight -= 1
+                records.append((endpoint(entry), t0 - started, time.perf_counter() - t0, status, error))
+
+        await asyncio.gather(*(send(offset, entry) for offset, entry in plan))
+        wall = time.perf_counter() - started
+
+    return {"records": records, "wall": wall, "peak_in_flight": peak_in_flight, "max_lag": max_lag}
+
+
+def report(run: dict, plan: list, threads: int) -> dict:
+    records, wall = run["records"], max(run["wall"], 1e-9)
+    by_endpoint = defaultdict(list)
+    for record in records:
+        by_endpoint[record[0]].append(record)
+
+    endpoints = {}
+    for name, group in sorted(by_endpoint.items()):
+        failed = [r for r in group if r[4] or (r[3] or 0) >= 400]
+        summary = summarize([r[2] for r in group], wall, len(failed))
+        summary["error_rate"] = round(len(failed) / len(group), 4)
+        summary["statuses"] = {}
+        for r in group:
+            key = str(r[3]) if r[3] is not None else r[4]
+            summary["statuses"][key] = summary["statuses"].get(key, 0) + 1
+        endpoints[name] = summary
+
+    errors = sum(e["errors"] for e in endpoints.values())
+    offered_span = max((offset for offset, _ in plan), default=0.0)
+    return {
+        "requests": len(records),
+        "duration_s": round(wall, 3),
+        "offered_rps": round((len(plan) - 1) / offered_span, 2) if offered_span else None,
+        "achieved_rps": round(len(records) / wall, 2),
+        "error_rate": round(errors / len(records), 4) if records else 0.0,
+        "max_schedule_lag_ms": round(run["max_lag"] * 1000, 1),
+        "sizing": sizing(sum(r[2] for r in records) / wall, run["peak_in_flight"], threads),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(result: dict) -> None:
+    print(f"{'endpoint':<36} {'n':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9} {'errors':>7}")
+    for name, e in result["endpoints"].items():
+        print(
+            f"{name:<36} {e['n']:>6} {e['throughput_per_s']:>8} {e['p50_ms']:>9.1f} {e['p95_ms']:>9.1f} "
+            f"{e['p99_ms']:>9.1f} {e['max_ms']:>9.1f} {e['error_rate']:>7.1%}"
+        )
+    headline = {k: v for k, v in result.items() if k not in ("endpoints", "sizing")}
+    print("\n" + "  ".join(f"{k}={v}" for k, v in headline.items()))
+    s = result["sizing"]
+    print(
+        f"in flight: mean {s['mean_in_flight']}, peak {s['peak_in_flight']} -> "
+        f"gunicorn workers with --threads {s['threads_per_worker']}: {s['workers_for_peak']} for the peak, "
+        f"{s['workers_for_mean']} for the mean"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", help="JSONL traffic log (see agri_api/traffic.py)")
+    parser.add_argument("--target", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32, help="max requests in flight")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scaling of recorded pacing; 0 = no pacing")
+    parser.add_argument("--rate", type=float, help="fixed request rate (req/s) instead of recorded pacing")
+    parser.add_argument("--loop", type=int, default=1, help="passes over the log")
+    parser.add_argument("--limit", type=int, help="only the first N requests of the log")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn --threads per worker, for sizing")
+    parser.add_argument("--analyze", action="store_true", help="describe the recorded traffic; send nothing")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    entries = load_log(args.log)
+    if args.limit:
+        entries = entries[: args.limit]
+    if not entries:
+        raise SystemExit("no requests in log")
+
+    if args.analyze:
+        result = analyze(entries, args.threads)
+    else:
+        plan = schedule(entries, args.speed, args.rate, args.loop)
+        result = report(asyncio.run(replay(args.target, plan, args.concurrency, args.timeout)), plan, args.threads)
+    print_report(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(result, fh, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
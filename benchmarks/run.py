@@ -0,0 +1,324 @@
+"""
+Offline benchmark suite for the API hot paths and the models behind them.
+
+OpenWeather, LibreTranslate and Sarvam are replaced by local stubs
+(benchmarks/stubs.py) answering after `--delay` seconds, and the app is driven
+in-process through Django's test client, so runs are reproducible without
+network access. Results are written as JSON; pass an earlier file as
+`--baseline` to compare two commits.
+
+    python benchmarks/run.py                          # everything
+    python benchmarks/run.py --only price,predict_price --iterations 200
+    python benchmarks/run.py --baseline benchmarks/results/<old>.json --fail-on-regression
+
+HTTP benchmarks run with every Django cache disabled (DummyCache), so each
+request does the full work; the `*_cached` variants use a local-memory cache
+warmed by the first request. Query logging is switched off for the runs so
+they neither write benchmark rows into db.sqlite3 nor time the log writer.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.stubs import StubProcess  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+DUMMY_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "bench"}}
+
+
+# ---------------- Statistics ----------------
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: list, elapsed: float, errors: int = 0) -> dict:
+    values = sorted(latencies)
+    ms = lambda s: round(s * 1000, 3)  # noqa: E731
+    return {
+        "n": len(values),
+        "errors": errors,
+        "mean_ms": ms(statistics.fmean(values)),
+        "stdev_ms": ms(statistics.stdev(values)) if len(values) > 1 else 0.0,
+        "min_ms": ms(values[0]),
+        "p50_ms": ms(_percentile(values, 50)),
+        "p90_ms": ms(_percentile(values, 90)),
+        "p95_ms": ms(_percentile(values, 95)),
+        "p99_ms": ms(_percentile(values, 99)),
+        "max_ms": ms(values[-1]),
+        "throughput_per_s": round(len(values) / elapsed, 2) if elapsed else None,
+    }
+
+
+# ---------------- HTTP benchmarks ----------------
+
+# name -> (method, path, request builder(i) -> params/body, Django CACHES)
+HTTP_BENCHMARKS = {
+    "price": ("GET", "/api/price/", lambda i: {"commodity": "onion", "market": "Varanasi"}, DUMMY_CACHE),
+    "price_cached": ("GET", "/api/price/", lambda i: {"commodity": "onion", "market": "Varanasi"}, LOCMEM_CACHE),
+    "price_all": ("GET", "/api/price/all/", lambda i: {}, DUMMY_CACHE),
+    "price_all_cached": ("GET", "/api/price/all/", lambda i: {}, LOCMEM_CACHE),
+    "advisory": ("GET", "/api/advisory/", lambda i: {"city": "Varanasi", "ph": "6.5"}, DUMMY_CACHE),
+    "process_speech": (
+        # agri_api.views.process_speech_view: translate -> intent -> predict_price -> translate back
+        "POST", "/api/process-speech/",
+        lambda i: {"spoken_text": f"प्याज का भाव {i}", "language": "hi-IN"}, DUMMY_CACHE,
+    ),
+    "text_to_speech": (
+        # Distinct text per request so the on-disk audio cache never answers
+        "POST", "/api/text-to-speech/",
+        lambda i: {"text": f"Onion price is likely to increase, request {i}.", "language": "en-IN"}, DUMMY_CACHE,
+    ),
+}
+
+
+def run_http(name: str, iterations: int, concurrency: int, warmup: int) -> dict:
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    method, path, build, caches = HTTP_BENCHMARKS[name]
+    local = threading.local()
+    errors = 0
+    lock = threading.Lock()
+
+    def one(i):
+        nonlocal errors
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client(HTTP_HOST="localhost")
+        data = build(i)
+        started = time.perf_counter()
+        if method == "GET":
+            resp = client.get(path, data)
+        else:
+            resp = client.post(path, data=json.dumps(data), content_type="application/json")
+        elapsed = time.perf_counter() - started
+        if resp.status_code >= 400:
+            with lock:
+                errors += 1
+        return elapsed
+
+    # The clients build their middleware inside the override: QueryLogMiddleware drops out
+    with override_settings(CACHES=caches, QUERY_LOG_ENABLED=False):
+        from django.core.cache import caches as cache_handler
+
+        cache_handler["default"].clear()
+        for i in range(warmup):
+            one(-1 - i)
+        errors = 0
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one, range(iterations)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed, errors)
+    result.update({"kind": "http", "method": method, "path": path, "concurrency": concurrency})
+    return result
+
+
+# ---------------- Microbenchmarks ----------------
+
+def _bench_predict_price():
+    from commodity_price import predict_price
+
+    return lambda i: predict_price("onion", "Varanasi")
+
+
+def _bench_predict_all_prices():
+    from commodity_price import predict_all_prices
+
+    return lambda i: predict_all_prices("Varanasi")
+
+
+def _bench_create_features():
+    from commodity_price import add_commodity_path
+
+    add_commodity_path()
+    from src import config  # type: ignore
+    from src.data_preprocessing import load_and_clean  # type: ignore
+    from src.feature_engineering import create_features  # type: ignore
+
+    raw = load_and_clean()
+    scratch = os.path.join(tempfile.mkdtemp(prefix="agri-bench-"), "features.csv")
+
+    def run(i):
+        # create_features() writes its output; keep the real features.csv untouched,
+        # and the path as it was for the benchmarks that read it afterwards
+        real, config.PROCESSED_DATA_PATH = config.PROCESSED_DATA_PATH, scratch
+        try:
+            return create_features(raw.copy())
+        finally:
+            config.PROCESSED_DATA_PATH = real
+
+    return run
+
+
+def _bench_crop_recommender_train():
+    from smart_farming import MODEL2_DIR
+    from crop_model import CropRecommender  # type: ignore
+
+    path = os.path.join(MODEL2_DIR, "Crop_recommendation.csv")
+    return lambda i: CropRecommender(path)
+
+
+def _bench_crop_recommender_predict():
+    from smart_farming import MODEL2_DIR
+    from crop_model import CropRecommender  # type: ignore
+
+    model = CropRecommender(os.path.join(MODEL2_DIR, "Crop_recommendation.csv"))
+    return lambda i: model.predict(temperature=24.5, humidity=62, rainfall=1.2, ph=6.5)
+
+
+MICRO_BENCHMARKS = {
+    "predict_price": _bench_predict_price,
+    "predict_all_prices": _bench_predict_all_prices,
+    "create_features": _bench_create_features,
+    "crop_recommender_train": _bench_crop_recommender_train,
+    "crop_recommender_predict": _bench_crop_recommender_predict,
+}
+
+
+def run_micro(name: str, iterations: int, warmup: int) -> dict:
+    func = MICRO_BENCHMARKS[name]()
+    errors = 0
+    for i in range(warmup):
+        func(-1 - i)
+    latencies = []
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        result = func(i)
+        latencies.append(time.perf_counter() - call_started)
+        if isinstance(result, dict) and result.get("ok") is False:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    result = summarize(latencies, elapsed, errors)
+    result["kind"] = "micro"
+    return result
+
+
+# ---------------- Results ----------------
+
+def _git(*args) -> str | None:
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def environment(args) -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "stub_delay_s": args.delay,
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Print p50/p95 changes against `baseline`; return names that regressed beyond `threshold`."""
+    regressions = []
+    print(f"\n{'benchmark':<26} {'p50 base':>10} {'p50 now':>10} {'change':>8}   {'p95 base':>10} {'p95 now':>10} {'change':>8}")
+    for name, now in current["benchmarks"].items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            print(f"{name:<26} {'(new)':>10}")
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms"):
+            changes.append((now[key] - base[key]) / base[key] if base[key] else 0.0)
+        flag = "  REGRESSION" if changes[0] > threshold else ""
+        if flag:
+            regressions.append(name)
+        print(
+            f"{name:<26} {base['p50_ms']:>10.2f} {now['p50_ms']:>10.2f} {changes[0]:>+8.1%}   "
+            f"{base['p95_ms']:>10.2f} {now['p95_ms']:>10.2f} {changes[1]:>+8.1%}{flag}"
+        )
+    return regressions
+
+
+def main():
+    all_names = list(HTTP_BENCHMARKS) + list(MICRO_BENCHMARKS)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="comma-separated benchmarks: " + ", ".join(all_names))
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1, help="client threads for the HTTP benchmarks")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--delay", type=float, default=0.05, help="stub latency per upstream call (s)")
+    parser.add_argument("--output", help="result file (default benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else all_names
+    unknown = set(names) - set(all_names)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    stub = StubProcess(delay=args.delay)
+    os.environ.update(stub.env())
+    os.environ["TTS_AUDIO_CACHE_DIR"] = tempfile.mkdtemp(prefix="agri-bench-tts-")
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "base.settings")
+    import django
+
+    django.setup()
+
+    results = {"environment": environment(args), "benchmarks": {}}
+    try:
+        for name in names:
+            if name in HTTP_BENCHMARKS:
+                result = run_http(name, args.iterations, args.concurrency, args.warmup)
+            else:
+                result = run_micro(name, args.iterations, args.warmup)
+            results["benchmarks"][name] = result
+            print(
+                f"{name:<26} n={result['n']:<5} p50 {result['p50_ms']:>9.2f} ms  p95 {result['p95_ms']:>9.2f} ms  "
+                f"p99 {result['p99_ms']:>9.2f} ms  {result['throughput_per_s']:>8} /s  errors {result['errors']}",
+                flush=True,
+            )
+    finally:
+        stub.close()
+
+    output = args.output
+    if not output:
+        commit = (results["environment"]["git_commit"] or "nogit")[:10]
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{commit}-{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(results, fh, indent=2, ensure_ascii=False)
+    print(f"\nwrote {output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            regressions = compare(json.load(fh), results, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"\nregressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
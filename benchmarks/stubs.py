@@ -0,0 +1,174 @@
+"""
+Local stand-ins for the external services (OpenWeather, LibreTranslate, Sarvam)
+used by the benchmarks and load tests. Every response is delayed by `delay`
+seconds to model the provider's latency; nothing leaves the machine.
+
+    python benchmarks/stubs.py --port 8765 --delay 0.2
+
+then point the app at it:
+
+    OPENWEATHER_BASE_URL=http://127.0.0.1:8765/weather
+    TRANSLATE_URL=http://127.0.0.1:8765/translate
+    SARVAM_TTS_URL=http://127.0.0.1:8765/text-to-speech SARVAM_API_KEY=stub
+"""
+import argparse
+import base64
+import json
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Shape of an OpenWeather One Call 3.0 response, as far as smart_farming reads it
+FORECAST = {
+    "current": {"temp": 24.5, "humidity": 62},
+    "daily": [{"rain": 1.2 * (i % 3), "temp": {"min": 12.0 + i, "max": 27.0 + i}} for i in range(7)],
+}
+
+# A few bytes of RIFF header; enough for the audio cache and content-type sniffing
+AUDIO_BASE64 = base64.b64encode(b"RIFF\x24\x00\x00\x00WAVEfmt ").decode("ascii")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class StubServices:
+    """Threaded HTTP server answering weather GETs, translate and TTS POSTs."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.2):
+        self.delay = delay
+        self.calls = {"weather": 0, "translate": 0, "tts": 0}
+        # Requests being answered right now, and the most seen at once
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if urlparse(self.path).path == "/__stats":
+                    with stub._lock:
+                        self._send(200, {"calls": stub.calls, "peak_in_flight": stub.peak_in_flight})
+                        stub.peak_in_flight = 0
+                    return
+                stub._count("weather")
+                stub._wait()
+                self._send(200, FORECAST)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("content-length") or 0))
+                path = urlparse(self.path).path
+                if path.endswith("/translate"):
+                    stub._count("translate")
+                    stub._wait()
+                    if self.headers.get("content-type", "").startswith("application/json"):
+                        text = json.loads(body).get("q", "")
+                    else:
+                        text = (parse_qs(body.decode("utf-8")).get("q") or [""])[0]
+                    # Echo the text back; the intent parsers see the original words
+                    self._send(200, {"translatedText": text})
+                else:
+                    stub._count("tts")
+                    stub._wait()
+                    self._send(200, {"audios": [AUDIO_BASE64], "audio_base64": AUDIO_BASE64})
+
+        self.server = _Server((host, port), _Handler)
+        self.url = f"http://{host}:{self.server.server_port}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+
+    def _wait(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+
+    def env(self) -> dict:
+        """Environment variables that point the app at this stub."""
+        return {
+            "OPENWEATHER_BASE_URL": self.url + "/weather",
+            "OPENWEATHER_API_KEY": "stub",
+            "TRANSLATE_URL": self.url + "/translate",
+            "SARVAM_TTS_URL": self.url + "/text-to-speech",
+            "SARVAM_API_KEY": "stub",
+        }
+
+    def start(self) -> "StubServices":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _serve(port_queue, host, delay):
+    stub = StubServices(host, 0, delay)
+    port_queue.put(stub.server.server_port)
+    stub.server.serve_forever()
+
+
+class StubProcess:
+    """
+    StubServices in a child process, so the stub's threads do not compete for
+    the GIL with the app under test. Read counters with stats().
+    """
+
+    def __init__(self, host: str = "127.0.0.1", delay: float = 0.2):
+        ctx = multiprocessing.get_context("spawn")
+        port_queue = ctx.Queue()
+        self.process = ctx.Process(target=_serve, args=(port_queue, host, delay), daemon=True)
+        self.process.start()
+        self.url = f"http://{host}:{port_queue.get(timeout=30)}"
+
+    env = StubServices.env
+
+    def stats(self) -> dict:
+        """Call counts and peak concurrent requests since the previous stats() call."""
+        import requests
+
+        return requests.get(self.url + "/__stats", timeout=10).json()
+
+    def close(self) -> None:
+        self.process.terminate()
+        self.process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds added to every response")
+    args = parser.parse_args()
+
+    stub = StubServices(args.host, args.port, args.delay)
+    for name, value in stub.env().items():
+        print(f"{name}={value}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
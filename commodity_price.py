@@ -1,76 +1,351 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
 import os
 import sys
-from typing import Optional, Dict, Any
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np  # type: ignore
+    import pandas as pd  # type: ignore
 
-# Ensure Commodity_Model modules are importable (they expect `src` at sys.path)
+# numpy, pandas and the Commodity_Model code are imported by the functions that
+# use them, so importing this module (e.g. for artifact_version() on every
+# cached price request) stays cheap; agri_api.warmup pays for them up front.
 BASE_DIR = os.path.dirname(__file__)
 COMMODITY_DIR = os.path.join(BASE_DIR, "Commodity_Model")
-if COMMODITY_DIR not in sys.path:
-    sys.path.append(COMMODITY_DIR)
 
-import pandas as pd  # type: ignore
-import joblib  # type: ignore
-from src import config  # type: ignore
 
+def add_commodity_path() -> None:
+    """Make the Commodity_Model modules importable (they expect `src` at sys.path)."""
+    if COMMODITY_DIR not in sys.path:
+        sys.path.append(COMMODITY_DIR)
 
-def predict_price(commodity: str, market: Optional[str] = None) -> Dict[str, Any]:
+
+def _config():
+    add_commodity_path()
+    from src import config  # type: ignore
+
+    return config
+
+
+def _span(name: str):
+    """agri_api.metrics.span() when the Django app is importable; a no-op for standalone use."""
+    try:
+        from agri_api.metrics import span
+    except ImportError:
+        return contextlib.nullcontext()
+    return span(name)
+
+
+def artifact_version() -> str:
     """
-    Predict next week's price for a commodity (optionally filtered by market).
+    Identify the model/feature artifacts currently on disk.
 
-    Returns a dictionary suitable for JSON serialization.
+    Built from file sizes and modification times only, so it is cheap enough to
+    call on every request; it changes whenever any of the files is rewritten.
     """
-    if not commodity or not isinstance(commodity, str):
-        return {
-            "ok": False,
-            "error": "commodity is required",
-        }
+    config = _config()
+    parts = []
+    for path in (config.MODEL_PATH, config.BOOSTER_PATH, config.PROCESSED_DATA_PATH, config.RAW_DATA_PATH):
+        try:
+            st = os.stat(path)
+            parts.append(f"{st.st_size}-{st.st_mtime_ns}")
+        except OSError:
+            parts.append("missing")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class BoosterModel:
+    """
+    Raw xgb.Booster loaded from the native export (config.BOOSTER_PATH).
+
+    predict() gives the same values as XGBRegressor.predict() but goes straight
+    to inplace_predict on a float32 array, skipping the sklearn wrapper and the
+    DataFrame feature validation on every call.
+    """
+
+    def __init__(self, path: str):
+        import xgboost as xgb  # type: ignore
+
+        config = _config()
+        self.path = path
+        self.booster = xgb.Booster()
+        self.booster.load_model(path)
+        self.feature_names = self.booster.feature_names or list(config.FEATURE_COLS)
+
+    def predict(self, X: Any) -> np.ndarray:
+        import numpy as np  # type: ignore
+        import pandas as pd  # type: ignore
+
+        if isinstance(X, pd.DataFrame):
+            # Select by name so column order never matters; skip the copy when it already matches
+            if list(X.columns) != self.feature_names:
+                X = X[self.feature_names]
+            X = X.to_numpy(dtype=np.float32)
+        return self.booster.inplace_predict(X, validate_features=False)
+
+
+_model_lock = threading.Lock()
+# ((path, size, mtime_ns), model) of the last loaded artifact
+_model_entry: Optional[Tuple[Tuple[Any, ...], Any]] = None
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def load_model() -> Any:
+    """
+    The serving model, loaded once per process.
+
+    Uses the native booster export when it exists (train_model() writes it next
+    to the pickle) and the joblib pickle otherwise. The file's size and mtime
+    are checked on each call, so a retrained model is picked up without a
+    restart. Raises FileNotFoundError when neither artifact exists.
+    """
+    global _model_entry
+    config = _config()
+    path = config.BOOSTER_PATH if os.path.exists(config.BOOSTER_PATH) else config.MODEL_PATH
+    stamp = _file_stamp(path)
+    if stamp is None:
+        raise FileNotFoundError(path)
+    key = (path, *stamp)
+    entry = _model_entry
+    if entry is not None and entry[0] == key:
+        return entry[1]
+    with _model_lock:
+        if _model_entry is None or _model_entry[0] != key:
+            if path == config.BOOSTER_PATH:
+                model = BoosterModel(path)
+            else:
+                import joblib  # type: ignore
+                model = joblib.load(path)
+            _model_entry = (key, model)
+        return _model_entry[1]
+
+
+class RemoteModel:
+    """
+    The price model behind the model server (agri_api.model_server): predict()
+    sends the feature rows there, and uses the in-process model while the server
+    is unreachable.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def predict(self, X: Any) -> np.ndarray:
+        import numpy as np  # type: ignore
+        import pandas as pd  # type: ignore
+        from agri_api.model_server import ModelServerUnavailable
+
+        if isinstance(X, pd.DataFrame):
+            X = X[list(_config().FEATURE_COLS)].to_numpy(dtype=np.float32)
+        try:
+            return self.client.predict_price(X)
+        except ModelServerUnavailable:
+            return load_model().predict(X)
+
+
+def serving_model() -> Any:
+    """The model the API predicts with: a RemoteModel when MODEL_SERVER_SOCKET is set, else load_model()."""
+    from agri_api.model_server import client
+
+    remote = client()
+    return RemoteModel(remote) if remote is not None else load_model()
+
+
+_batcher_lock = threading.Lock()
+_batcher: Optional[Any] = None
+
+
+def _batch_window() -> float:
+    """PRICE_BATCH_WINDOW_MS in seconds; 0 turns coalescing off."""
+    from django.conf import settings
+
+    if settings.configured:
+        window_ms = float(getattr(settings, "PRICE_BATCH_WINDOW_MS", 2))
+    else:
+        window_ms = float(os.getenv("PRICE_BATCH_WINDOW_MS", "2"))
+    return max(window_ms, 0.0) / 1000
+
+
+def _predict_rows(rows: np.ndarray) -> np.ndarray:
+    # Resolved per batch, so a retrained artifact or a model server coming back is picked up
+    return serving_model().predict(rows)
+
+
+def price_batcher() -> Optional[Any]:
+    """
+    The per-process coalescer for price predictions (agri_api.batching), or None
+    when PRICE_BATCH_WINDOW_MS is 0. Concurrent predict_price calls announce
+    themselves on entry and their rows go through one predict call.
+    """
+    global _batcher
+    window = _batch_window()
+    if not window:
+        return None
+    if _batcher is None or _batcher.window != window:
+        from agri_api.batching import MicroBatcher
+
+        with _batcher_lock:
+            if _batcher is None or _batcher.window != window:
+                _batcher = MicroBatcher(_predict_rows, window, announced=True)
+    return _batcher
+
+
+def _predict(model: Any, rows: pd.DataFrame) -> np.ndarray:
+    """model.predict() on the feature columns of `rows`, through price_batcher() when it is on."""
+    import numpy as np  # type: ignore
+
+    config = _config()
+    batcher = price_batcher()
+    if batcher is None:
+        return model.predict(rows[config.FEATURE_COLS])
+    return batcher(rows[list(config.FEATURE_COLS)].to_numpy(dtype=np.float32))
+
+
+_test_frame_lock = threading.Lock()
+# ((size, mtime_ns) of features.csv, post-cutoff rows) of the last read
+_test_frame_entry: Optional[Tuple[Tuple[int, int], Any]] = None
+
+
+def _read_test_frame() -> pd.DataFrame:
+    """
+    The post-cutoff rows of features.csv, read once per process and again only
+    when the file changes. Callers filter it but must not modify it in place.
+    """
+    global _test_frame_entry
+    import pandas as pd  # type: ignore
+
+    config = _config()
+    stamp = _file_stamp(config.PROCESSED_DATA_PATH)
+    if stamp is None:
+        raise FileNotFoundError(config.PROCESSED_DATA_PATH)
+    entry = _test_frame_entry
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    with _test_frame_lock:
+        if _test_frame_entry is None or _test_frame_entry[0] != stamp:
+            df = pd.read_csv(config.PROCESSED_DATA_PATH)
+            try:
+                df["Arrival_Date"] = pd.to_datetime(df["Arrival_Date"])  # may raise if missing
+            except Exception as e:
+                raise ValueError(f"Invalid Arrival_Date in data: {e}") from e
+            _test_frame_entry = (stamp, df[df["Arrival_Date"] >= pd.Timestamp(config.CUTOFF_DATE)])
+        return _test_frame_entry[1]
+
+
+def _load_test_frame() -> Tuple[Any, Optional[pd.DataFrame], Optional[Dict[str, Any]]]:
+    """
+    Load the trained model and the post-cutoff slice of the processed features.
 
+    Returns (model, test_frame, error). On failure model/test_frame are None and
+    error is a dict suitable for returning from the public functions.
+    """
     try:
-        model = joblib.load(config.MODEL_PATH)
-        df = pd.read_csv(config.PROCESSED_DATA_PATH)
+        with _span("model_load"):
+            model = serving_model()
+            test = _read_test_frame()
     except FileNotFoundError:
-        return {
+        return None, None, {
             "ok": False,
             "error": "Trained model or processed data not found. Please train the model first.",
         }
     except Exception as e:
-        return {"ok": False, "error": f"Failed to load model/data: {e}"}
+        return None, None, {"ok": False, "error": f"Failed to load model/data: {e}"}
 
-    cutoff = pd.Timestamp(config.CUTOFF_DATE)
-    try:
-        df["Arrival_Date"] = pd.to_datetime(df["Arrival_Date"])  # may raise if missing
-    except Exception as e:
-        return {"ok": False, "error": f"Invalid Arrival_Date in data: {e}"}
-
-    test = df[df["Arrival_Date"] >= cutoff]
     if test.empty:
-        return {"ok": False, "error": "No recent data available for predictions."}
+        return None, None, {"ok": False, "error": "No recent data available for predictions."}
+    return model, test, None
 
-    X_test = test[config.FEATURE_COLS]
-    try:
-        preds = model.predict(X_test)
-    except Exception as e:
-        return {"ok": False, "error": f"Model prediction failed: {e}"}
 
-    latest_test = test.copy()
-    latest_test["Predicted"] = preds
+def _price_fields(current_price: float, predicted_price: float) -> Dict[str, Any]:
+    price_change = predicted_price - current_price
+    trend = "increase" if price_change > 0 else ("no_change" if price_change == 0 else "decrease")
+    return {
+        "current_price": round(current_price, 2),
+        "predicted_price": round(predicted_price, 2),
+        "change": round(price_change, 2),
+        "trend": trend,
+        # Additional metadata (original quintal scale for reference)
+        "current_price_quintal": round(current_price * 100, 2),
+        "predicted_price_quintal": round(predicted_price * 100, 2),
+    }
+
+
+def _price_fields_frame(current: pd.Series, predicted: Any) -> pd.DataFrame:
+    """Vectorized _price_fields() for many series at once."""
+    import numpy as np  # type: ignore
+    import pandas as pd  # type: ignore
+
+    current = current.astype(float).to_numpy()
+    predicted = np.asarray(predicted, dtype=float)
+    change = predicted - current
+    trend = np.where(change > 0, "increase", np.where(change == 0, "no_change", "decrease"))
+    return pd.DataFrame({
+        "current_price": current.round(2),
+        "predicted_price": predicted.round(2),
+        "change": change.round(2),
+        "trend": trend,
+        "current_price_quintal": (current * 100).round(2),
+        "predicted_price_quintal": (predicted * 100).round(2),
+    })
+
+
+def _match_commodity(commodity_norm: str, available: Iterable[str]) -> Optional[str]:
+    # Commodity matching similar to CLI behavior
+    if not commodity_norm:
+        return None
+    available = list(available)
+    first_word = commodity_norm.split()[0]
+    if first_word in available:
+        return first_word
+    for c in available:
+        if c in commodity_norm:
+            return c
+    return None
+
+
+def predict_price(commodity: str, market: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Predict next week's price for a commodity (optionally filtered by market).
+
+    Returns a dictionary suitable for JSON serialization.
+    """
+    if not commodity or not isinstance(commodity, str):
+        return {
+            "ok": False,
+            "error": "commodity is required",
+        }
+
+    batcher = price_batcher()
+    if batcher is None:
+        return _predict_price(commodity, market)
+    # Announced before the frame lookups, so concurrent calls can wait for each other's rows
+    with batcher.expect():
+        return _predict_price(commodity, market)
+
+
+def _predict_price(commodity: str, market: Optional[str]) -> Dict[str, Any]:
+    model, test, error = _load_test_frame()
+    if error:
+        return error
 
     # Normalize inputs
     commodity_norm = commodity.strip().lower()
     market_norm = market.strip().lower() if market else None
 
-    # Commodity matching similar to CLI behavior
-    available = latest_test["Commodity"].astype(str).str.lower().unique()
-    commodity_name = None
-    if commodity_norm:
-        first_word = commodity_norm.split()[0]
-        if first_word in available:
-            commodity_name = first_word
-        else:
-            for c in available:
-                if c in commodity_norm:
-                    commodity_name = c
-                    break
+    commodity_lower = test["Commodity"].astype(str).str.lower()
+    available = commodity_lower.unique()
+    commodity_name = _match_commodity(commodity_norm, available)
 
     if not commodity_name:
         return {
@@ -80,104 +355,342 @@ def predict_price(commodity: str, market: Optional[str] = None) -> Dict[str, Any
         }
 
     if market_norm:
-        mask = (
-            latest_test["Commodity"].astype(str).str.lower() == commodity_name
-        ) & (latest_test["Market"].astype(str).str.lower() == market_norm)
+        mask = (commodity_lower == commodity_name) & (
+            test["Market"].astype(str).str.lower() == market_norm
+        )
     else:
-        mask = latest_test["Commodity"].astype(str).str.lower() == commodity_name
+        mask = commodity_lower == commodity_name
 
     if mask.sum() == 0:
         return {"ok": False, "error": "No matching rows for given commodity/market"}
 
-    latest_row = latest_test[mask].sort_values("Arrival_Date").iloc[-1]
+    # Only the most recent row is reported, so only that row needs inference
+    latest = test[mask].sort_values("Arrival_Date").iloc[[-1]]
+    try:
+        with _span("model_predict"):
+            preds = _predict(model, latest)
+    except Exception as e:
+        return {"ok": False, "error": f"Model prediction failed: {e}"}
 
-    current_price = float(latest_row["lag_1"])  # per kg
-    predicted_price = float(latest_row["Predicted"])  # per kg
-    price_change = predicted_price - current_price
-
-    trend = "increase" if price_change > 0 else ("no_change" if price_change == 0 else "decrease")
+    current_price = float(latest["lag_1"].iloc[0])  # per kg
+    predicted_price = float(preds[0])  # per kg
 
     return {
         "ok": True,
         "commodity": commodity_name,
         "market": market if market else None,
-        "current_price": round(current_price, 2),
-        "predicted_price": round(predicted_price, 2),
-        "change": round(price_change, 2),
-        "trend": trend,
-        # Additional metadata (original quintal scale for reference)
-        "current_price_quintal": round(current_price * 100, 2),
-        "predicted_price_quintal": round(predicted_price * 100, 2),
+        **_price_fields(current_price, predicted_price),
     }
 
 
-def predict_all_prices(market: Optional[str] = None) -> Dict[str, Any]:
+def predict_all_prices(
+    market: Optional[str] = None,
+    select: Optional[Callable[[List[str]], Iterable[str]]] = None,
+) -> Dict[str, Any]:
     """
     Predict next week's price for all available commodities (optionally filtered by market).
 
+    `select`, if given, receives the sorted lowercase commodity names available
+    for the market and returns the names to score. It runs before inference, so
+    a single-commodity lookup only predicts that commodity's latest row. When
+    `select` is used the result also carries `available` (the names offered).
+
     Returns a dict with ok, count, and items (list of per-commodity results
     using the same fields as predict_price())
     """
+    model, test, error = _load_test_frame()
+    if error:
+        return error
+
+    # If market specified, filter rows by market first
+    market_norm = market.strip().lower() if isinstance(market, str) and market else None
+    if market_norm:
+        test = test[test["Market"].astype(str).str.lower() == market_norm]
+        if test.empty:
+            return {"ok": True, "count": 0, "items": []}
+
+    commodity_lower = test["Commodity"].astype(str).str.lower()
+    available = sorted(commodity_lower.unique())
+    if select is not None:
+        wanted = set(select(available))
+        test = test[commodity_lower.isin(wanted)]
+        commodity_lower = commodity_lower[test.index]
+        if test.empty:
+            return {"ok": True, "count": 0, "items": [], "available": available}
+
+    # For each commodity pick the most recent row, then score them in one call
+    names = []
+    latest_index = []
+    for commodity_name, group in test.groupby(commodity_lower):
+        names.append(commodity_name)
+        latest_index.append(group.sort_values("Arrival_Date").index[-1])
+    latest = test.loc[latest_index]
     try:
-        model = joblib.load(config.MODEL_PATH)
-        df = pd.read_csv(config.PROCESSED_DATA_PATH)
-    except FileNotFoundError:
-        return {
-            "ok": False,
-            "error": "Trained model or processed data not found. Please train the model first.",
-        }
+        with _span("model_predict"):
+            preds = _predict(model, latest)
     except Exception as e:
-        return {"ok": False, "error": f"Failed to load model/data: {e}"}
+        return {"ok": False, "error": f"Model prediction failed: {e}"}
+
+    items = []
+    for commodity_name, current_price, predicted_price in zip(names, latest["lag_1"], preds):
+        items.append({
+            "commodity": commodity_name,
+            "market": market if market else None,
+            **_price_fields(float(current_price), float(predicted_price)),  # per kg
+        })
+
+    # Sort items by commodity name for consistency
+    items.sort(key=lambda x: x["commodity"])
+    result: Dict[str, Any] = {"ok": True, "count": len(items), "items": items}
+    if select is not None:
+        result["available"] = available
+    return result
+
+
+# ---------------- Batch scoring ----------------
+
+# A price series is one commodity in one market (as grouped by create_features)
+SERIES_KEYS = ["Commodity", "Market"]
+BULLETIN_COLUMNS = ["State", "District", "Market", "Commodity", "Arrival_Date"]
+
+
+def latest_series_rows(path: Optional[str] = None, chunksize: int = 200_000) -> pd.DataFrame:
+    """
+    Most recent post-cutoff feature row of every (commodity, market) series.
+
+    The processed CSV is read in chunks and only the running latest row per
+    series is kept, so memory grows with the number of series rather than with
+    the length of the history.
+    """
+    import pandas as pd  # type: ignore
 
+    config = _config()
+    path = path or config.PROCESSED_DATA_PATH
     cutoff = pd.Timestamp(config.CUTOFF_DATE)
+    usecols = list(dict.fromkeys(BULLETIN_COLUMNS + config.FEATURE_COLS))
+    latest = None
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize):
+        # A blank market or district is still a series (groupby would drop it), and written as ""
+        chunk[BULLETIN_COLUMNS[:4]] = chunk[BULLETIN_COLUMNS[:4]].fillna("")
+        chunk["Arrival_Date"] = pd.to_datetime(chunk["Arrival_Date"])
+        chunk = chunk[chunk["Arrival_Date"] >= cutoff]
+        if latest is not None:
+            chunk = pd.concat([latest, chunk], ignore_index=True)
+        latest = chunk.sort_values("Arrival_Date", kind="stable").groupby(SERIES_KEYS, sort=False).tail(1)
+    if latest is None:
+        return pd.DataFrame(columns=usecols)
+    return latest.sort_values(SERIES_KEYS).reset_index(drop=True)
+
+
+def score_all_series(chunksize: int = 200_000) -> Tuple[Optional[pd.DataFrame], Optional[Dict[str, Any]]]:
+    """
+    Next-step price for every (commodity, market) series: one model load and one
+    model.predict over the latest row of each series.
+
+    Returns (bulletin, error); the bulletin has one row per series with the same
+    price fields as predict_price().
+    """
+    import pandas as pd  # type: ignore
+
+    config = _config()
     try:
-        df["Arrival_Date"] = pd.to_datetime(df["Arrival_Date"])
+        with _span("model_load"):
+            model = load_model()
+        rows = latest_series_rows(chunksize=chunksize)
+    except FileNotFoundError:
+        return None, {"ok": False, "error": "Trained model or processed data not found. Please train the model first."}
     except Exception as e:
-        return {"ok": False, "error": f"Invalid Arrival_Date in data: {e}"}
+        return None, {"ok": False, "error": f"Failed to load model/data: {e}"}
+    if rows.empty:
+        return None, {"ok": False, "error": "No recent data available for predictions."}
 
-    test = df[df["Arrival_Date"] >= cutoff]
-    if test.empty:
-        return {"ok": False, "error": "No recent data available for predictions."}
+    try:
+        with _span("model_predict"):
+            preds = model.predict(rows[config.FEATURE_COLS])
+    except Exception as e:
+        return None, {"ok": False, "error": f"Model prediction failed: {e}"}
+
+    bulletin = pd.DataFrame({
+        "commodity": rows["Commodity"].astype(str).str.lower(),
+        "market": rows["Market"].astype(str),
+        "state": rows["State"].astype(str),
+        "district": rows["District"].astype(str),
+        "as_of": rows["Arrival_Date"].dt.date.astype(str),
+        "horizon": 1,
+    })
+    bulletin = pd.concat([bulletin, _price_fields_frame(rows["lag_1"], preds)], axis=1)
+    bulletin["model_version"] = artifact_version()
+    return bulletin, None
+
+
+def write_bulletin(bulletin: pd.DataFrame, path: str) -> str:
+    """Write the bulletin as Parquet (needs pyarrow) or CSV, chosen by the file extension."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(".parquet"):
+        bulletin.to_parquet(path, index=False)
+    else:
+        bulletin.to_csv(path, index=False)
+    return path
+
+
+# ---------------- Multi-step forecasts ----------------
+
+# Default outlook: one to four weeks ahead
+FORECAST_WEEKS = (1, 2, 3, 4)
+MAX_FORECAST_WEEKS = 8
+
+
+def _load_forecast_state() -> Tuple[Any, Optional[tuple], Optional[Dict[str, Any]]]:
+    """
+    Load the model and the recent raw price history of every series.
+
+    Forecasts start from the latest observed price, which features.csv drops
+    (it has no next-row target yet), so the raw data is read instead. Series
+    without observations since the cutoff are left out, as in the bulletin.
+    Returns (model, state, error) with state as returned by series_state().
+    """
+    import numpy as np  # type: ignore
+    import pandas as pd  # type: ignore
+
+    config = _config()  # puts `src` on sys.path
+    from src.data_preprocessing import load_and_clean  # type: ignore
+    from src.forecasting import series_state  # type: ignore
 
-    X_test = test[config.FEATURE_COLS]
     try:
-        preds = model.predict(X_test)
+        with _span("model_load"):
+            model = serving_model()
+            history = load_and_clean()
+    except FileNotFoundError:
+        return None, None, {"ok": False, "error": "Trained model or raw price data not found."}
     except Exception as e:
-        return {"ok": False, "error": f"Model prediction failed: {e}"}
+        return None, None, {"ok": False, "error": f"Failed to load model/data: {e}"}
 
-    latest_test = test.copy()
-    latest_test["Predicted"] = preds
+    series, prices, last_dates, step_days = series_state(history)
+    recent = last_dates >= np.datetime64(pd.Timestamp(config.CUTOFF_DATE))
+    if not recent.any():
+        return None, None, {"ok": False, "error": "No recent data available for predictions."}
+    state = (series[recent].reset_index(drop=True), prices[recent], last_dates[recent], step_days[recent])
+    return model, state, None
 
-    # If market specified, filter rows by market first
-    market_norm = market.strip().lower() if isinstance(market, str) and market else None
-    if market_norm:
-        latest_test = latest_test[
-            latest_test["Market"].astype(str).str.lower() == market_norm
-        ]
-        if latest_test.empty:
-            return {"ok": True, "count": 0, "items": []}
 
-    # For each commodity, pick most recent row and compute metrics
-    items = []
-    for commodity_name, group in latest_test.groupby(latest_test["Commodity"].astype(str).str.lower()):
-        row = group.sort_values("Arrival_Date").iloc[-1]
-        current_price = float(row["lag_1"])  # per kg
-        predicted_price = float(row["Predicted"])  # per kg
-        price_change = predicted_price - current_price
-        trend = (
-            "increase" if price_change > 0 else ("no_change" if price_change == 0 else "decrease")
-        )
-        items.append({
-            "commodity": commodity_name,
-            "market": market if market else None,
-            "current_price": round(current_price, 2),
-            "predicted_price": round(predicted_price, 2),
-            "change": round(price_change, 2),
-            "trend": trend,
-            "current_price_quintal": round(current_price * 100, 2),
-            "predicted_price_quintal": round(predicted_price * 100, 2),
+def _forecast(model, state, weeks: Iterable[int]):
+    add_commodity_path()
+    from src.forecasting import forecast_horizons  # type: ignore
+
+    _, prices, last_dates, step_days = state
+    with _span("model_predict"):
+        return forecast_horizons(model, prices, last_dates, step_days, [7 * w for w in weeks])
+
+
+def _weeks_or_error(weeks: Optional[Iterable[int]]) -> Tuple[List[int], Optional[Dict[str, Any]]]:
+    # Only a missing argument means the default; an empty selection is an error
+    weeks = sorted(set(int(w) for w in (FORECAST_WEEKS if weeks is None else weeks)))
+    if not weeks or weeks[0] < 1 or weeks[-1] > MAX_FORECAST_WEEKS:
+        return weeks, {"ok": False, "error": f"weeks must be between 1 and {MAX_FORECAST_WEEKS}"}
+    return weeks, None
+
+
+def forecast_price(
+    commodity: str, market: Optional[str] = None, weeks: Optional[Iterable[int]] = None
+) -> Dict[str, Any]:
+    """
+    Price outlook for a commodity over the coming weeks (default 1-4).
+
+    The one-step model is applied recursively: each predicted price becomes the
+    next step's lag, so a week ahead is about seven steps for a market reporting
+    daily. Without a market, the market with the most recent report is used.
+    Returns a dict with the latest observed price (`current_price`) and one
+    entry per week in `forecast`, each with the price fields of predict_price().
+    """
+    import numpy as np  # type: ignore
+    import pandas as pd  # type: ignore
+
+    if not commodity or not isinstance(commodity, str):
+        return {"ok": False, "error": "commodity is required"}
+    weeks, error = _weeks_or_error(weeks)
+    if error:
+        return error
+
+    model, state, error = _load_forecast_state()
+    if error:
+        return error
+    series, prices, last_dates, step_days = state
+
+    commodity_lower = series["Commodity"].astype(str).str.lower()
+    available = sorted(commodity_lower.unique())
+    commodity_name = _match_commodity(commodity.strip().lower(), available)
+    if not commodity_name:
+        return {"ok": False, "error": f"Commodity not found: {commodity}", "available": available}
+
+    mask = (commodity_lower == commodity_name).to_numpy()
+    if market:
+        mask = mask & (series["Market"].astype(str).str.lower() == market.strip().lower()).to_numpy()
+    if not mask.any():
+        return {"ok": False, "error": "No matching rows for given commodity/market"}
+
+    # Only the chosen series is rolled forward
+    candidates = np.flatnonzero(mask)
+    i = candidates[np.argmax(last_dates[candidates])]
+    one = (series.iloc[[i]], prices[[i]], last_dates[[i]], step_days[[i]])
+    try:
+        preds, dates, steps = _forecast(model, one, weeks)
+    except Exception as e:
+        return {"ok": False, "error": f"Model prediction failed: {e}"}
+
+    current_price = float(prices[i, -1])  # per kg
+    forecast = []
+    for w, predicted, when, n in zip(weeks, preds[0], dates[0], steps[0]):
+        forecast.append({
+            "weeks": w,
+            "date": str(pd.Timestamp(when).date()),
+            "steps": int(n),
+            **_price_fields(current_price, float(predicted)),
         })
+    return {
+        "ok": True,
+        "commodity": commodity_name,
+        "market": str(series["Market"].iloc[i]),
+        "as_of": str(pd.Timestamp(last_dates[i]).date()),
+        "current_price": round(current_price, 2),
+        "step_days": float(step_days[i]),
+        "forecast": forecast,
+    }
 
-    # Sort items by commodity name for consistency
-    items.sort(key=lambda x: x["commodity"]) 
-    return {"ok": True, "count": len(items), "items": items}
+
+def forecast_all_series(weeks: Optional[Iterable[int]] = None) -> Tuple[Optional[pd.DataFrame], Optional[Dict[str, Any]]]:
+    """
+    Outlook for every (commodity, market) series at once.
+
+    All series are rolled forward together, so the cost is one model.predict
+    per step rather than one per series and step. Returns (bulletin, error);
+    the bulletin has one row per series and week, with `horizon` counting
+    model steps and `forecast_date` the expected date of that step.
+    """
+    import numpy as np  # type: ignore
+    import pandas as pd  # type: ignore
+
+    weeks, error = _weeks_or_error(weeks)
+    if error:
+        return None, error
+    model, state, error = _load_forecast_state()
+    if error:
+        return None, error
+    series, prices, last_dates, step_days = state
+    try:
+        preds, dates, steps = _forecast(model, state, weeks)
+    except Exception as e:
+        return None, {"ok": False, "error": f"Model prediction failed: {e}"}
+
+    n = len(series)
+    bulletin = pd.DataFrame({
+        "commodity": np.repeat(series["Commodity"].astype(str).str.lower().to_numpy(), len(weeks)),
+        "market": np.repeat(series["Market"].astype(str).to_numpy(), len(weeks)),
+        "as_of": np.repeat(pd.DatetimeIndex(last_dates).date.astype(str), len(weeks)),
+        "weeks": np.tile(weeks, n),
+        "horizon": steps.ravel(),
+        "forecast_date": pd.DatetimeIndex(dates.ravel()).date.astype(str),
+    })
+    current = pd.Series(np.repeat(prices[:, -1], len(weeks)))
+    bulletin = pd.concat([bulletin, _price_fields_frame(current, preds.ravel())], axis=1)
+    bulletin["model_version"] = artifact_version()
+    return bulletin, None
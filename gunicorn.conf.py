@@ -0,0 +1,34 @@
+"""
+gunicorn settings, read from the working directory:
+
+    gunicorn base.wsgi
+    GUNICORN_PRELOAD=false WEB_CONCURRENCY=4 gunicorn base.wsgi
+
+With preload_app (the default) the master imports Django and the app and runs
+the agri_api warm-up (WARMUP=models: numpy/pandas/xgboost/scikit-learn, the
+price model, the features slice and the crop model) once, then forks the
+workers. They start ready to serve and share those pages copy-on-write instead
+of each paying ~2 s and its own copy on their first requests. Code changes need
+a full restart (not HUP) in this mode.
+
+Without preloading each worker loads the app, and runs the warm-up, itself.
+"""
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Read by base.settings when the app is loaded
+os.environ.setdefault("WARMUP", "models")
+
+
+def when_ready(server):
+    # Runs in the master after the preloaded app is loaded, before the first fork.
+    # Frozen objects are skipped by the collector, so a worker's first collections
+    # do not write to (and thereby copy) the pages it shares with the master.
+    if preload_app:
+        gc.freeze()
@@ -0,0 +1,60 @@
+"""
+Nightly price bulletin: next-step price for every commodity in every market.
+
+Loads the model once, keeps only the latest feature row per (commodity, market)
+while streaming the processed CSV, scores all series in one model.predict and
+writes one columnar file. With --weeks the bulletin is a 1..N week outlook
+instead, from the recursive forecaster (one model.predict per step for all
+series together).
+
+    python price_bulletin.py                                  # reports/price_bulletin_<date>.parquet|csv
+    python price_bulletin.py --output /srv/bulletins/today.csv --chunksize 100000
+    python price_bulletin.py --weeks 4                        # rows per series for weeks 1-4
+
+Parquet needs pyarrow (`pip install pyarrow`); without it the default output is CSV.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+from commodity_price import COMMODITY_DIR, forecast_all_series, score_all_series, write_bulletin
+
+
+def _default_output() -> str:
+    try:
+        import pyarrow  # noqa: F401
+        ext = "parquet"
+    except ImportError:
+        ext = "csv"
+    return os.path.join(COMMODITY_DIR, "reports", f"price_bulletin_{date.today().isoformat()}.{ext}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="bulletin file (.parquet or .csv)")
+    parser.add_argument("--chunksize", type=int, default=200_000, help="CSV rows read at a time")
+    parser.add_argument("--weeks", type=int, help="forecast 1..N weeks ahead instead of the next step")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    if args.weeks is not None:
+        bulletin, error = forecast_all_series(weeks=range(1, args.weeks + 1))
+    else:
+        bulletin, error = score_all_series(chunksize=args.chunksize)
+    if error:
+        print(f"[ERROR] {error['error']}", file=sys.stderr)
+        return 1
+
+    output = write_bulletin(bulletin, args.output or _default_output())
+    series = bulletin[["commodity", "market"]].drop_duplicates()
+    print(
+        f"Scored {len(series)} series ({bulletin['commodity'].nunique()} commodities, "
+        f"{bulletin['market'].nunique()} markets) in {time.perf_counter() - started:.2f}s -> {output}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
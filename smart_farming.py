@@ -1,6 +1,9 @@
 import os
 import sys
-from typing import Optional, Dict, Any
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import requests
 
 BASE_DIR = os.path.dirname(__file__)
 MODEL2_DIR = os.path.join(BASE_DIR, "Model2")
@@ -8,12 +11,15 @@ if MODEL2_DIR not in sys.path:
     sys.path.append(MODEL2_DIR)
 
 from cities import CITIES_UP  # type: ignore
-from config import LATITUDE, LONGITUDE  # type: ignore
-from openweather_client import get_weather_forecast_for  # type: ignore
-from crop_model import CropRecommender  # type: ignore
+from config import LATITUDE, LONGITUDE, OPENWEATHER_API_KEY, OPENWEATHER_BASE_URL  # type: ignore
+from openweather_client import fetch_weather_forecast_for  # type: ignore
 from irrigation_logic import should_irrigate  # type: ignore
 from yield_risk_logic import cold_risk_warning  # type: ignore
 
+from agri_api.breaker import UpstreamUnavailable, guard
+from agri_api.cache import aget_or_compute, get_or_compute
+from agri_api.metrics import span, upstream
+
 
 def _find_city_by_name(name: str):
     name_norm = name.strip().lower()
@@ -26,6 +32,50 @@ def _find_city_by_name(name: str):
     return None
 
 
+def _resolve_location(city: Optional[str]) -> Tuple[float, float, str]:
+    sel = _find_city_by_name(city) if city else None
+    if sel is None:
+        return LATITUDE, LONGITUDE, city or "Default"
+    return sel["lat"], sel["lon"], sel["name"]
+
+
+_crop_model = None
+_crop_model_lock = threading.Lock()
+
+
+def crop_recommender():
+    """
+    The crop model, trained once per process instead of on every advisory.
+    crop_model pulls in scikit-learn (~1 s), so it is imported here rather than
+    at module load; agri_api.warmup calls this at startup.
+    """
+    global _crop_model
+    if _crop_model is None:
+        with _crop_model_lock:
+            if _crop_model is None:
+                from crop_model import CropRecommender  # type: ignore
+                _crop_model = CropRecommender(os.path.join(MODEL2_DIR, "Crop_recommendation.csv"))
+    return _crop_model
+
+
+def recommend_crop(temperature: float, humidity: float, rainfall: float, ph: float) -> str:
+    """The crop model's pick, from the model server when MODEL_SERVER_SOCKET is set (in-process if it is down)."""
+    from agri_api.model_server import ModelServerUnavailable, client
+
+    remote = client()
+    if remote is not None:
+        try:
+            return remote.recommend_crops([[temperature, humidity, rainfall, ph]])[0]
+        except ModelServerUnavailable:
+            pass
+    return crop_recommender().predict(temperature=temperature, humidity=humidity, rainfall=rainfall, ph=ph)
+
+
+def _weather_parts(lat: float, lon: float) -> tuple:
+    # Cache key parts for a forecast; shared by the sync and async paths
+    return (round(float(lat), 4), round(float(lon), 4))
+
+
 def get_advisory(city: Optional[str], ph: float) -> Dict[str, Any]:
     """
     Build smart farming advisory for a city and soil pH.
@@ -44,15 +94,75 @@ def get_advisory(city: Optional[str], ph: float) -> Dict[str, Any]:
     except Exception:
         return {"ok": False, "error": "Invalid pH value"}
 
-    sel = _find_city_by_name(city) if city else None
-    if sel is None:
-        lat, lon = LATITUDE, LONGITUDE
-        city_name = city or "Default"
-    else:
-        lat, lon = sel["lat"], sel["lon"]
-        city_name = sel["name"]
+    lat, lon, city_name = _resolve_location(city)
+
+    # Forecasts are shared between workers for a while (CACHE_TIMEOUTS["weather"])
+    with span("weather"):
+        forecast = get_or_compute("weather", _weather_parts(lat, lon), lambda: _fetch_weather_forecast(lat, lon))
+    return build_advisory(city_name, lat, lon, forecast, ph_val)
+
+
+def _fetch_weather_forecast(lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    try:
+        # Errors are raised inside guard(), so it can tell a call our deadline cut short
+        with guard("openweather", 10) as call, upstream(OPENWEATHER_BASE_URL) as timing:
+            forecast = fetch_weather_forecast_for(lat, lon, timeout=call.timeout)
+            if not forecast:
+                call.fail()
+                timing.fail()
+        return forecast
+    except UpstreamUnavailable as e:
+        print(f"[ERROR] OpenWeather skipped for {lat},{lon}: {e}")
+        return None
+    except requests.exceptions.RequestException as e:
+        print(f"[ERROR] OpenWeather API failed for {lat},{lon}: {e}")
+        return None
+
+
+async def aget_advisory(city: Optional[str], ph: float, client) -> Dict[str, Any]:
+    """
+    Async get_advisory(): the forecast is fetched with the given httpx.AsyncClient
+    and the CPU-bound crop model runs in a worker thread, so the event loop is
+    free while OpenWeather answers.
+    """
+    from asgiref.sync import sync_to_async
+
+    try:
+        ph_val = float(ph)
+    except Exception:
+        return {"ok": False, "error": "Invalid pH value"}
+
+    lat, lon, city_name = _resolve_location(city)
+    with span("weather"):
+        # Shares the cache entry, and an in-flight fetch, with get_advisory()
+        forecast = await aget_or_compute("weather", _weather_parts(lat, lon), lambda: afetch_weather_forecast(lat, lon, client))
+    return await sync_to_async(build_advisory, thread_sensitive=False)(city_name, lat, lon, forecast, ph_val)
+
+
+async def afetch_weather_forecast(lat: float, lon: float, client) -> Optional[Dict[str, Any]]:
+    """Async counterpart of openweather_client.get_weather_forecast_for()."""
+    params = {
+        "lat": lat,
+        "lon": lon,
+        "appid": OPENWEATHER_API_KEY,
+        "units": "metric",
+        "exclude": "minutely,hourly,alerts",
+    }
+    try:
+        with guard("openweather", 10) as call, upstream(OPENWEATHER_BASE_URL) as timing:
+            response = await client.get(OPENWEATHER_BASE_URL, params=params, timeout=call.timeout)
+            call.check(response.status_code)
+            if response.is_error:
+                timing.fail()
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        print(f"[ERROR] OpenWeather API failed for {lat},{lon}: {e}")
+        return None
+
 
-    forecast = get_weather_forecast_for(lat, lon)
+def build_advisory(city_name: str, lat: float, lon: float, forecast: Optional[Dict[str, Any]], ph_val: float) -> Dict[str, Any]:
+    """Turn a fetched forecast into the advisory dict (crop model, irrigation, cold risk)."""
     if not forecast:
         return {"ok": False, "error": "Failed to fetch weather forecast"}
 
@@ -71,12 +181,9 @@ def get_advisory(city: Optional[str], ph: float) -> Dict[str, Any]:
         rainfall = 0.0
 
     # Crop model
-    dataset_path = os.path.join(MODEL2_DIR, "Crop_recommendation.csv")
     try:
-        model = CropRecommender(dataset_path)
-        crop = model.predict(
-            temperature=temperature, humidity=humidity, rainfall=rainfall, ph=ph_val
-        )
+        with span("crop_model"):
+            crop = recommend_crop(temperature, humidity, rainfall, ph_val)
     except Exception as e:
         crop = f"Unknown (error: {e})"
 
@@ -2,6 +2,11 @@
 
 // Commodity trend helper (fetches from the price API and answers in a fixed sentence)
 const PRICE_API_URL = '/api/price/all/';
+// Compact price list kept in the browser; the server is only asked for changes since our version
+const PRICE_SNAPSHOT_URL = '/api/price/snapshot/';
+const PRICE_SNAPSHOT_STORAGE_KEY = 'priceSnapshot';
+// Check for a new model version at most this often; in between, price questions are answered locally
+const PRICE_SNAPSHOT_MAX_AGE_MS = 5 * 60 * 1000;
 const ADVISORY_API_BASE = '/api/advisory/';
 
 // Removed parse-based commodity extraction; rely on Gemini intent understanding.
@@ -47,13 +52,89 @@ function extractFromTo(item) {
 
 // Track current audio to avoid overlaps
 let __currentTtsAudio = null;
+// Bumped on every stop so queued streaming chunks know they were cancelled
+let __ttsGeneration = 0;
 
 function __stopAnySpeech() {
+    __ttsGeneration++;
     try { if (window && window.speechSynthesis) window.speechSynthesis.cancel(); } catch {}
     try { if (__currentTtsAudio) { __currentTtsAudio.pause(); __currentTtsAudio.currentTime = 0; } } catch {}
     __currentTtsAudio = null;
 }
 
+// Answers longer than this are spoken sentence by sentence via the streaming endpoint
+const TTS_STREAM_MIN_CHARS = 160;
+
+function __playAudioUntilEnd(src, generation) {
+    return new Promise((resolve) => {
+        if (generation !== __ttsGeneration) return resolve();
+        const audio = new Audio(src);
+        __currentTtsAudio = audio;
+        audio.onended = () => resolve();
+        audio.onerror = () => resolve();
+        audio.play().catch(() => resolve());
+    });
+}
+
+// Stream sentence chunks from /api/text-to-speech/stream/ (NDJSON) and play each
+// as soon as it arrives, so the first sentence starts before the rest is synthesized.
+// Resolves to the text still to be spoken: '' when the stream covered it, the
+// whole text when nothing could be played (so the caller can fall back), or the
+// sentences after the last played chunk when the stream broke part-way.
+async function __speakStreaming(text, lang, voice, headers) {
+    const generation = __ttsGeneration;
+    const res = await fetch('/api/text-to-speech/stream/', {
+        method: 'POST',
+        headers,
+        body: JSON.stringify({ text, language: lang, voice })
+    });
+    if (!res.ok || !res.body) return text;
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    // Chunk texts are slices of the server-normalized text (NFC, collapsed whitespace)
+    const normalized = String(text).normalize('NFC').replace(/\s+/g, ' ').trim();
+    let spokenTo = 0;
+    let buffer = '';
+    let playback = Promise.resolve();
+    let played = 0;
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        const event = JSON.parse(line);
+        if (event.done) return;
+        if (!event.audio_base64) {
+            console.warn('[TTS][chat.js] stream chunk failed', event.index, event.error);
+            return;
+        }
+        played++;
+        const at = normalized.indexOf(event.text, spokenTo);
+        if (at >= 0) spokenTo = at + event.text.length;
+        const src = `data:audio/wav;base64,${event.audio_base64}`;
+        playback = playback.then(() => __playAudioUntilEnd(src, generation));
+    };
+    try {
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            if (generation !== __ttsGeneration) { try { await reader.cancel(); } catch {} return ''; }
+            buffer += decoder.decode(value, { stream: true });
+            let nl;
+            while ((nl = buffer.indexOf('\n')) >= 0) {
+                handleLine(buffer.slice(0, nl));
+                buffer = buffer.slice(nl + 1);
+            }
+        }
+        handleLine(buffer + decoder.decode());
+    } catch (e) {
+        if (!played) throw e;
+        // Some sentences are already playing: finish them, then hand back only the rest
+        console.warn('[TTS][chat.js] stream broke after', played, 'chunks:', e?.message || e);
+        await playback;
+        return generation === __ttsGeneration ? normalized.slice(spokenTo).trim() : '';
+    }
+    await playback;
+    return played > 0 ? '' : text;
+}
+
 // Helper: direct Sarvam TTS from browser
 async function __sarvamDirectTTS(text, lang, voice) {
     const url = (typeof window !== 'undefined' && window.SARVAM_TTS_URL) ? window.SARVAM_TTS_URL : '';
@@ -104,10 +185,20 @@ async function speakResponse(text, useHindi) {
         if (typeof window !== 'undefined' && window.SARVAM_API_KEY) {
             ttsHeaders['X-Sarvam-Key'] = window.SARVAM_API_KEY;
         }
+        if (String(text || '').length >= TTS_STREAM_MIN_CHARS) {
+            try {
+                // Whatever the stream could not speak goes through the single request below
+                text = await __speakStreaming(text, lang, voice, ttsHeaders);
+                if (!text) return;
+            } catch (e) {
+                console.warn('[TTS][chat.js] Streaming TTS failed, falling back to single request:', e?.message || e);
+            }
+        }
         const res = await fetch('/api/text-to-speech/', {
             method: 'POST',
             headers: ttsHeaders,
-            body: JSON.stringify({ text, language: lang, voice })
+            // Binary audio skips the ~33% base64 overhead; JSON is still handled below
+            body: JSON.stringify({ text, language: lang, voice, format: 'binary' })
         });
         if (!res.ok) {
             let errText = '';
@@ -115,15 +206,34 @@ async function speakResponse(text, useHindi) {
             console.error('[TTS][chat.js] /api/text-to-speech/ failed', res.status, errText);
             return; // no fallback
         }
-        const data = await res.json();
-        const b64 = data && (data.audio_base64 || data.audio);
-        if (!b64) {
+        let audioSrc = '';
+        let data = null;
+        if ((res.headers.get('content-type') || '').startsWith('audio/')) {
+            audioSrc = URL.createObjectURL(await res.blob());
+        } else {
+            data = await res.json();
+            const b64 = data && (data.audio_base64 || data.audio);
+            if (b64) audioSrc = `data:audio/mp3;base64,${b64}`;
+        }
+        if (!audioSrc) {
             console.error('[TTS][chat.js] No audio in response', data);
             return;
         }
-        const audio = new Audio(`data:audio/mp3;base64,${b64}`);
+        const audio = new Audio(audioSrc);
+        if (audioSrc.startsWith('blob:')) {
+            // Free the blob once it has played (or failed to)
+            const release = () => URL.revokeObjectURL(audioSrc);
+            audio.addEventListener('ended', release, { once: true });
+            audio.addEventListener('error', release, { once: true });
+        }
         __currentTtsAudio = audio;
-        await audio.play();
+        try {
+            await audio.play();
+        } catch (playErr) {
+            // A refused play() fires no 'error' event
+            if (audioSrc.startsWith('blob:')) URL.revokeObjectURL(audioSrc);
+            throw playErr;
+        }
     } catch (e) {
         console.error('[TTS][chat.js] exception', e);
         return;
@@ -301,12 +411,72 @@ function buildAnswerLocalized(commodityName, from, to, useHindi) {
     return `${commodityName} price is going to ${trend} from ${from}/kg to ${to}/kg`;
 }
 
-async function getCommodityTrend(commodityName, apiUrl = PRICE_API_URL, useHindi = false) {
-    const res = await fetch(apiUrl, { cache: 'no-store' });
+let priceSnapshot = null;  // { v, market, fields, rows, checkedAt }
+let priceSnapshotRequest = null;
+
+function loadStoredPriceSnapshot() {
+    try {
+        const stored = JSON.parse(localStorage.getItem(PRICE_SNAPSHOT_STORAGE_KEY) || 'null');
+        return stored && Array.isArray(stored.rows) && Array.isArray(stored.fields) ? stored : null;
+    } catch (e) {
+        return null;
+    }
+}
+
+function applyPriceDelta(snapshot, delta) {
+    const byName = new Map(snapshot.rows.map((row) => [row[0], row]));
+    for (const row of delta.upsert || []) byName.set(row[0], row);
+    for (const name of delta.delete || []) byName.delete(name);
+    const rows = [...byName.values()].sort((a, b) => String(a[0]).localeCompare(String(b[0])));
+    return { ...snapshot, v: delta.v, rows };
+}
+
+async function refreshPriceSnapshot(current) {
+    const url = current ? `${PRICE_SNAPSHOT_URL}?since=${encodeURIComponent(current.v)}` : PRICE_SNAPSHOT_URL;
+    const res = await fetch(url);
+    if (!res.ok) throw new Error(`API error ${res.status}`);
+    const data = await res.json();
+    // A full snapshot comes back when the server no longer has our version
+    const next = Array.isArray(data.rows)
+        ? { v: data.v, market: data.market, fields: data.fields, rows: data.rows }
+        : applyPriceDelta(current, data);
+    next.checkedAt = Date.now();
+    try { localStorage.setItem(PRICE_SNAPSHOT_STORAGE_KEY, JSON.stringify(next)); } catch (e) { /* storage full or disabled */ }
+    return next;
+}
+
+async function getPriceSnapshot() {
+    if (!priceSnapshot) priceSnapshot = loadStoredPriceSnapshot();
+    if (priceSnapshot && Date.now() - (priceSnapshot.checkedAt || 0) < PRICE_SNAPSHOT_MAX_AGE_MS) return priceSnapshot;
+    // One refresh at a time, shared by concurrent questions
+    if (!priceSnapshotRequest) {
+        priceSnapshotRequest = refreshPriceSnapshot(priceSnapshot)
+            .then((next) => (priceSnapshot = next))
+            .finally(() => { priceSnapshotRequest = null; });
+    }
+    try {
+        return await priceSnapshotRequest;
+    } catch (e) {
+        // A slightly stale list still answers the question
+        if (priceSnapshot) return priceSnapshot;
+        throw e;
+    }
+}
+
+async function getPriceList(apiUrl) {
+    if (apiUrl === PRICE_API_URL) {
+        const snapshot = await getPriceSnapshot();
+        return snapshot.rows.map((row) => Object.fromEntries(snapshot.fields.map((field, i) => [field, row[i]])));
+    }
+    const res = await fetch(apiUrl, { cache: 'no-cache' });
     if (!res.ok) throw new Error(`API error ${res.status}`);
     const data = await res.json();
     // Support both array response and wrapped responses like { ok, items: [...] }
-    const list = Array.isArray(data) ? data : (Array.isArray(data.items) ? data.items : (Array.isArray(data.results) ? data.results : []));
+    return Array.isArray(data) ? data : (Array.isArray(data.items) ? data.items : (Array.isArray(data.results) ? data.results : []));
+}
+
+async function getCommodityTrend(commodityName, apiUrl = PRICE_API_URL, useHindi = false) {
+    const list = await getPriceList(apiUrl);
     // Try multiple normalized candidates
     const candidates = normalizeCommodityCandidates(commodityName);
     let item = null;
@@ -374,7 +374,8 @@ async function speakResponseSarvam(text, language) {
         const res = await fetch('/api/text-to-speech/', {
             method: 'POST',
             headers: ttsHeaders,
-            body: JSON.stringify({ text, language: lang, voice })
+            // Binary audio skips the ~33% base64 overhead; JSON is still handled below
+            body: JSON.stringify({ text, language: lang, voice, format: 'binary' })
         });
         if (!res.ok) {
             let errText = '';
@@ -384,21 +385,36 @@ async function speakResponseSarvam(text, language) {
             __scriptWebSpeechFallback(text, lang);
             return;
         }
-        const data = await res.json();
-        const b64 = data && (data.audio_base64 || data.audio);
-        if (!b64) {
+        let audioSrc = '';
+        let data = null;
+        if ((res.headers.get('content-type') || '').startsWith('audio/')) {
+            audioSrc = URL.createObjectURL(await res.blob());
+        } else {
+            data = await res.json();
+            const b64 = data && (data.audio_base64 || data.audio);
+            if (b64) audioSrc = `data:audio/mp3;base64,${b64}`;
+        }
+        if (!audioSrc) {
             console.error('[TTS][script.js] No audio in response', data);
             // Fallback to Web Speech API
             __scriptWebSpeechFallback(text, lang);
             return;
         }
-        const audio = new Audio(`data:audio/mp3;base64,${b64}`);
+        const audio = new Audio(audioSrc);
+        if (audioSrc.startsWith('blob:')) {
+            // Free the blob once it has played (or failed to)
+            const release = () => URL.revokeObjectURL(audioSrc);
+            audio.addEventListener('ended', release, { once: true });
+            audio.addEventListener('error', release, { once: true });
+        }
         audio.playbackRate = (typeof voiceSpeed === 'number' && voiceSpeed > 0) ? voiceSpeed : 1.0;
         __scriptCurrentTtsAudio = audio;
         try {
             await audio.play();
         } catch (playErr) {
             console.warn('[TTS][script.js] Audio play() failed, falling back to Web Speech:', playErr?.message || playErr);
+            // A refused play() fires no 'error' event
+            if (audioSrc.startsWith('blob:')) URL.revokeObjectURL(audioSrc);
             __scriptWebSpeechFallback(text, lang);
         }
     } catch (e) {